@@ -0,0 +1,27 @@
+"""Cost of constructing AlignedPlots (four AxisItems each) and of panning one.
+
+Run with: python benchmarks/bench_axis.py
+"""
+import timeit
+
+import pyqtgraph as pg
+import pyqtgraph_extensions as pgx
+
+app = pg.mkQApp()
+number = 100
+construct = timeit.timeit(pgx.AlignedPlot, number=number) / number
+print('construct AlignedPlot: %.3f ms' % (construct * 1e3))
+
+plt = pgx.AlignedPlot()
+plt.plot([0, 1, 2], [0, 1, 0])
+vb = plt.getViewBox()
+offsets = iter(range(10 ** 6))
+
+
+def pan():
+    x = next(offsets) * 0.01
+    vb.setRange(xRange=(x, x + 1), yRange=(x, x + 1), padding=0)
+
+
+number = 1000
+print('pan: %.3f ms' % (timeit.timeit(pan, number=number) / number * 1e3))
@@ -0,0 +1,26 @@
+"""Per-frame cost of ColorBarItem range estimation against image size.
+
+Run with: python benchmarks/bench_colorbar_range.py
+"""
+import timeit
+
+import numpy as np
+import pyqtgraph_extensions as pgx
+
+modes = {
+    'exact': pgx.RangeEstimator('exact'),
+    'strided': pgx.RangeEstimator('strided'),
+    'threaded': pgx.RangeEstimator('threaded'),
+}
+
+print('%12s' % 'size' + ''.join('%12s' % mode for mode in modes) + '%12s' % 'hint')
+for n in (256, 1024, 2048, 4096):
+    data = np.random.random((n, n)).astype(np.float32)
+    data[0, 0] = np.nan
+    row = '%12s' % ('%dx%d' % (n, n))
+    for estimator in modes.values():
+        number = max(1, 2 ** 24 // data.size)
+        row += '%10.3fms' % (timeit.timeit(lambda: estimator(data), number=number) / number * 1e3)
+    row += '%10.3fms' % (timeit.timeit(lambda: modes['exact'](data, (0, 1)), number=100) / 100 * 1e3)
+    print(row)
+modes['threaded'].close()
@@ -0,0 +1,34 @@
+"""Time per pan of a 10 million point curve with automatic downsampling and clipping
+to view, for pyqtgraph's PlotDataItem ('peak') and pgx.PlotDataItem ('peak', from
+its decimation pyramid, and 'lttb').
+
+Run with: python benchmarks/bench_downsampling.py
+"""
+import time
+
+import numpy as np
+import pyqtgraph as pg
+import pyqtgraph_extensions as pgx
+
+NUM_POINTS = 10 ** 7
+NUM_PANS = 10
+
+app = pg.mkQApp()
+x = np.arange(NUM_POINTS, dtype=float)
+y = np.cumsum(np.random.standard_normal(NUM_POINTS))
+span = NUM_POINTS / 2
+for cls, mode in ((pg.PlotDataItem, 'peak'), (pgx.PlotDataItem, 'peak'), (pgx.PlotDataItem, 'lttb')):
+    glw = pgx.GraphicsLayoutWidget(size=(800, 600))
+    plt = glw.addAlignedPlot()
+    glw.show()
+    plt.addItem(cls(x, y))
+    plt.setDownsampling(auto=True, mode=mode)
+    plt.setClipToView(True)
+    plt.setXRange(0, span, padding=0)
+    app.processEvents()
+    start = time.perf_counter()
+    for n in range(NUM_PANS):
+        plt.setXRange(n * span / 50, n * span / 50 + span, padding=0)
+        app.processEvents()
+    print('%s %s: %.1f ms per pan' % (cls.__module__.split('.')[0], mode, (time.perf_counter() - start) / NUM_PANS * 1e3))
+    glw.close()
@@ -0,0 +1,35 @@
+"""Time to export a figure (an image and two curves) with pgx.export, by format.
+
+PDF and svg-png used to go via Inkscape, in a subprocess per output format; they
+are now rendered in process. Pass 'inkscape' as an argument to time the Inkscape
+backend instead (needs Inkscape on the path).
+
+Run with: python benchmarks/bench_export.py [inkscape]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pyqtgraph as pg
+import pyqtgraph_extensions as pgx
+
+NUM_EXPORTS = 10
+
+app = pg.mkQApp()
+backend = sys.argv[1] if len(sys.argv) > 1 else 'native'
+glw = pgx.GraphicsLayoutWidget()
+plt = glw.addAlignedPlot(labels={'left': 'y', 'bottom': 'x'})
+plt.image(np.random.default_rng(0).random((256, 256)), rect=(0, 0, 1, 1))
+x = np.linspace(0, 1, 1000)
+plt.plot(x, np.sin(10 * x), pen='r')
+plt.plot(x, np.cos(10 * x), pen='b')
+glw.resize(600, 400)
+with tempfile.TemporaryDirectory() as dir:
+    filename = os.path.join(dir, 'figure')
+    for fmt in ('svg', 'pdf', 'svg-png', 'svg-pdf-png'):
+        start = time.perf_counter()
+        for _ in range(NUM_EXPORTS):
+            pgx.export(glw, filename, fmt, fmt_opts={'backend': backend})
+        print('%12s: %.1f ms per export' % (fmt, (time.perf_counter() - start) / NUM_EXPORTS * 1e3))
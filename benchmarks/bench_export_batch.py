@@ -0,0 +1,48 @@
+"""Time to build and export a batch of figures as PDF, serially with pgx.export
+in this process, and with export_batch using increasing numbers of worker
+processes (up to the number of cores).
+
+Run with: python benchmarks/bench_export_batch.py
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+import pyqtgraph as pg
+import pyqtgraph_extensions as pgx
+
+NUM_FIGURES = 48
+
+
+def build_figure(seed):
+    glw = pgx.GraphicsLayoutWidget()
+    rng = np.random.default_rng(seed)
+    for row in range(2):
+        plt = glw.addAlignedPlot(labels={'left': 'y', 'bottom': 'x'})
+        plt.image(rng.random((128, 128)), rect=(0, 0, 1, 1))
+        plt.plot(np.linspace(0, 1, 1000), rng.random(1000), pen='r')
+        glw.nextRows()
+    glw.resize(600, 800)
+    return glw
+
+
+if __name__ == '__main__':
+    app = pg.mkQApp()
+    with tempfile.TemporaryDirectory() as dir:
+        specs = [pgx.ExportSpec(build_figure, os.path.join(dir, 'figure%d' % n), 'pdf', (n,)) for n in
+                 range(NUM_FIGURES)]
+        start = time.perf_counter()
+        for spec in specs:
+            glw = spec.build(*spec.args)
+            pgx.export(glw, spec.filename, spec.fmt)
+            glw.close()
+        print('%16s: %.2f s' % ('serial export', time.perf_counter() - start))
+        workers = 1
+        while workers <= os.cpu_count():
+            start = time.perf_counter()
+            results = pgx.export_batch(specs, workers)
+            assert all(result.error is None for result in results)
+            print('%16s: %.2f s (mean %.0f ms per figure in workers)' % ('%d workers' % workers,
+                  time.perf_counter() - start, np.mean([result.seconds for result in results]) * 1e3))
+            workers *= 2
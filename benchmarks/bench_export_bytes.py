@@ -0,0 +1,42 @@
+"""Time to get a figure as bytes, by exporting to a temporary file and reading it
+back, versus export_bytes, which renders in memory reusing its exporter and
+buffers.
+
+Run with: python benchmarks/bench_export_bytes.py
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+import pyqtgraph as pg
+import pyqtgraph_extensions as pgx
+
+NUM_EXPORTS = 20
+
+
+def via_file(glw, fmt):
+    with tempfile.TemporaryDirectory() as dir:
+        filename = os.path.join(dir, 'figure')
+        pgx.export(glw, filename, fmt)
+        with open(filename + '.' + fmt, 'rb') as file:
+            return file.read()
+
+
+app = pg.mkQApp()
+glw = pgx.GraphicsLayoutWidget()
+plt = glw.addAlignedPlot(labels={'left': 'y', 'bottom': 'x'})
+plt.image(np.random.default_rng(0).random((256, 256)), rect=(0, 0, 1, 1))
+x = np.linspace(0, 1, 1000)
+plt.plot(x, np.sin(10 * x), pen='r')
+glw.resize(600, 400)
+print('%6s%14s%14s' % ('fmt', 'file ms', 'bytes ms'))
+for fmt in ('png', 'svg', 'pdf'):
+    times = []
+    for function in (via_file, pgx.export_bytes):
+        function(glw, fmt)
+        start = time.perf_counter()
+        for _ in range(NUM_EXPORTS):
+            function(glw, fmt)
+        times.append((time.perf_counter() - start) / NUM_EXPORTS * 1e3)
+    print('%6s%14.1f%14.1f' % ((fmt,) + tuple(times)))
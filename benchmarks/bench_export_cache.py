@@ -0,0 +1,40 @@
+"""Time to export an unchanged figure (a 512x512 image and two curves of 10000
+points) with and without an ExportCache, and to fingerprint it.
+
+Run with: python benchmarks/bench_export_cache.py
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+import pyqtgraph as pg
+import pyqtgraph_extensions as pgx
+
+NUM_EXPORTS = 10
+
+app = pg.mkQApp()
+glw = pgx.GraphicsLayoutWidget()
+plt = glw.addAlignedPlot(labels={'left': 'y', 'bottom': 'x'})
+plt.image(np.random.default_rng(0).random((512, 512)), rect=(0, 0, 1, 1))
+x = np.linspace(0, 1, 10000)
+plt.plot(x, np.sin(10 * x), pen='r')
+plt.plot(x, np.cos(10 * x), pen='b')
+glw.resize(600, 400)
+scene = pgx.export_item(glw)
+start = time.perf_counter()
+for _ in range(NUM_EXPORTS):
+    pgx.scene_fingerprint(scene, scene.sceneRect(), 'pdf')
+print('fingerprint: %.1f ms' % ((time.perf_counter() - start) / NUM_EXPORTS * 1e3))
+with tempfile.TemporaryDirectory() as dir:
+    filename = os.path.join(dir, 'figure')
+    cache = pgx.ExportCache(os.path.join(dir, 'cache'))
+    for fmt in ('pdf', 'svg-pdf-png'):
+        times = []
+        for cache_arg in (None, cache):
+            pgx.export(glw, filename, fmt, cache=cache_arg)
+            start = time.perf_counter()
+            for _ in range(NUM_EXPORTS):
+                pgx.export(glw, filename, fmt, cache=cache_arg)
+            times.append((time.perf_counter() - start) / NUM_EXPORTS * 1e3)
+        print('%12s: %.1f ms uncached, %.1f ms cached' % ((fmt,) + tuple(times)))
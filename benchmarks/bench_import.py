@@ -0,0 +1,31 @@
+"""Import time of pyqtgraph_extensions and pyqtgraph_extended in fresh interpreters,
+compared with pyqtgraph itself. The last column includes first use of the lazily
+imported AlignedPlot and exporters.
+
+Run with: python benchmarks/bench_import.py
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPEATS = 10
+env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+def median_time(code):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], env=env, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1e3
+
+
+baseline = median_time('pass')
+print('%-60s%10s' % ('code', 'ms'))
+for code in ('import pyqtgraph', 'import pyqtgraph_extensions', 'import pyqtgraph_extended',
+             'import pyqtgraph_extensions as pgx; pgx.AlignedPlot; pgx.pgex'):
+    print('%-60s%10.1f' % (code, median_time(code) - baseline))
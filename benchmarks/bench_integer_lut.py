@@ -0,0 +1,31 @@
+"""Cost of a level change (setLevels followed by render) on integer camera frames,
+with and without ImageItem's composite lookup table mode.
+
+Run with: python benchmarks/bench_integer_lut.py
+"""
+import timeit
+
+import numpy as np
+import pyqtgraph as pg
+import pyqtgraph_extensions as pgx
+
+app = pg.mkQApp()
+lut = np.array(pgx.get_colormap_lut(), dtype=np.ubyte)
+
+print('%12s%8s%12s%14s%14s' % ('size', 'dtype', 'axisOrder', 'rescale', 'integer_lut'))
+for dtype in (np.uint8, np.uint16):
+    for n in (512, 2048, 4096):
+        data = np.random.randint(0, np.iinfo(dtype).max + 1, (n, n)).astype(dtype)
+        for axis_order in ('col-major', 'row-major'):
+            row = '%12s%8s%12s' % ('%dx%d' % (n, n), np.dtype(dtype).name, axis_order)
+            for integer_lut in (False, True):
+                item = pgx.ImageItem(data, integer_lut=integer_lut, lut=lut, levels=(0, 100), axisOrder=axis_order)
+                levels = iter(range(1, 10 ** 6))
+
+                def drag():
+                    item.setLevels((0, next(levels)))
+                    item.render()
+
+                number = max(1, 2 ** 25 // data.size)
+                row += '%12.3fms' % (timeit.timeit(drag, number=number) / number * 1e3)
+            print(row)
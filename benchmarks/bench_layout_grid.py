@@ -0,0 +1,36 @@
+"""Time to build and lay out a 10x10 grid of AlignedPlots, adding them one by one
+versus with GraphicsLayout.addAlignedPlotGrid (which activates the layout once).
+
+Run with: python benchmarks/bench_layout_grid.py
+"""
+import time
+
+import pyqtgraph as pg
+import pyqtgraph_extensions as pgx
+
+app = pg.mkQApp()
+ROWS = COLS = 10
+
+
+def one_by_one(glw):
+    for row in range(ROWS):
+        for col in range(COLS):
+            glw.addAlignedPlot()
+        glw.nextRows()
+
+
+def grid(glw):
+    glw.addAlignedPlotGrid(ROWS, COLS)
+
+
+for fun in (one_by_one, grid):
+    times = []
+    for repeat in range(3):
+        glw = pgx.GraphicsLayoutWidget(size=(1000, 1000))
+        glw.show()
+        start = time.perf_counter()
+        fun(glw)
+        app.processEvents()
+        times.append(time.perf_counter() - start)
+        glw.close()
+    print('%12s: %.3f s' % (fun.__name__, min(times)))
@@ -0,0 +1,37 @@
+"""Time to add entries to a pgx.LegendItem one at a time, with addItems, and with
+a paged legend (20 entries shown), including the following layout of the scene.
+
+Run with: python benchmarks/bench_legend.py
+"""
+import time
+
+import pyqtgraph as pg
+import pyqtgraph_extensions as pgx
+
+app = pg.mkQApp()
+
+
+def build(num, method):
+    glw = pgx.GraphicsLayoutWidget()
+    plt = glw.addAlignedPlot()
+    glw.show()
+    items = [pg.PlotDataItem([0, 1], [n, n], pen=pgx.tableau10[n % 10]) for n in range(num)]
+    app.processEvents()
+    start = time.perf_counter()
+    legend = pgx.LegendItem(page_size=20 if method == 'paged' else None)
+    legend.setParentItem(plt.vb)
+    entries = [(item, 'channel %d' % n) for n, item in enumerate(items)]
+    if method == 'addItem':
+        for item, name in entries:
+            legend.addItem(item, name)
+    else:
+        legend.addItems(entries)
+    app.processEvents()
+    duration = time.perf_counter() - start
+    glw.close()
+    return duration
+
+
+print('%8s%12s%12s%12s' % ('entries', 'addItem', 'addItems', 'paged'))
+for num in (100, 300, 1000):
+    print('%8d%12.3f%12.3f%12.3f' % ((num,) + tuple(build(num, method) for method in ('addItem', 'addItems', 'paged'))))
@@ -0,0 +1,52 @@
+"""Time to create, repaint, and update one trace of, several hundred overlaid
+traces of 1000 samples, as one PlotDataItem per trace or one MultiCurveItem.
+
+Run with: python benchmarks/bench_multicurve.py
+"""
+import time
+
+import numpy as np
+import pyqtgraph as pg
+import pyqtgraph_extensions as pgx
+
+NUM_REPEATS = 20
+NUM_SAMPLES = 1000
+
+
+def time_per_call(function, num=NUM_REPEATS):
+    start = time.perf_counter()
+    for _ in range(num):
+        function()
+    return (time.perf_counter() - start) / num * 1e3
+
+
+app = pg.mkQApp()
+x = np.arange(NUM_SAMPLES)
+print('%8s%16s%12s%12s%12s' % ('traces', 'item', 'create ms', 'repaint ms', 'update ms'))
+for num_curves in (100, 300, 1000):
+    y = np.sin(x / 50 + np.arange(num_curves)[:, None])
+    pens = [pg.mkPen(pgx.tableau10[n % 10]) for n in range(num_curves)]
+    for kind in ('PlotDataItem', 'MultiCurveItem'):
+        glw = pgx.GraphicsLayoutWidget()
+        plt = glw.addAlignedPlot()
+        glw.resize(800, 600)
+        glw.show()
+        app.processEvents()
+        start = time.perf_counter()
+        if kind == 'PlotDataItem':
+            items = [plt.plot(x, row, pen=pen) for row, pen in zip(y, pens)]
+
+            def update(items=items):
+                items[0].setData(x, np.random.random(NUM_SAMPLES))
+        else:
+            item = pgx.MultiCurveItem(y, x, pens)
+            plt.addItem(item)
+
+            def update(item=item):
+                item.setCurveData(0, np.random.random(NUM_SAMPLES), x)
+        glw.grab()
+        create = (time.perf_counter() - start) * 1e3
+        repaint = time_per_call(glw.grab)
+        update_ms = time_per_call(lambda: (update(), glw.grab()))
+        print('%8d%16s%12.1f%12.1f%12.1f' % (num_curves, kind, create, repaint, update_ms))
+        glw.close()
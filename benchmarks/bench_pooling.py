@@ -0,0 +1,30 @@
+"""Time per refresh of an AlignedPlot showing an image and 5 named curves, redrawn
+with clear=True, with and without item pooling (AlignedPlot.setPooling).
+
+Run with: python benchmarks/bench_pooling.py
+"""
+import time
+
+import numpy as np
+import pyqtgraph as pg
+import pyqtgraph_extensions as pgx
+
+NUM_REFRESHES = 300
+
+app = pg.mkQApp()
+x = np.linspace(0, 1, 1000)
+image = np.random.default_rng(0).random((256, 256))
+for pooling in (False, True):
+    glw = pgx.GraphicsLayoutWidget()
+    plt = glw.addAlignedPlot()
+    plt.addLegend()
+    plt.setPooling(pooling)
+    glw.show()
+    start = time.perf_counter()
+    for n in range(NUM_REFRESHES):
+        plt.image(image, clear=True, levels=(0, 1))
+        for curve in range(5):
+            plt.plot(x, np.sin(10 * x + n + curve), pen=pgx.tableau10[curve], name='curve %d' % curve)
+        app.processEvents()
+    print('pooling %s: %.2f ms per refresh' % (pooling, (time.perf_counter() - start) / NUM_REFRESHES * 1e3))
+    glw.close()
@@ -0,0 +1,38 @@
+"""Time per pan of one of 50 plots whose x ranges are shared, either by a chain of
+setXLink or by a RangeSyncGroup - with the window hidden (cost of propagating the
+range) and shown (including repainting).
+
+Run with: python benchmarks/bench_range_sync.py
+"""
+import time
+
+import numpy as np
+import pyqtgraph as pg
+import pyqtgraph_extensions as pgx
+
+NUM_PLOTS = 50
+NUM_PANS = 100
+
+app = pg.mkQApp()
+x = np.linspace(0, 100, 1000)
+for shown, method in ((False, 'setXLink'), (False, 'RangeSyncGroup'), (True, 'setXLink'), (True, 'RangeSyncGroup')):
+    glw = pgx.GraphicsLayoutWidget(size=(1000, 1000))
+    grid = glw.addAlignedPlotGrid(NUM_PLOTS // 5, 5)
+    plots = [plot for row in grid for plot in row]
+    for plot in plots:
+        plot.plot(x, np.sin(x))
+    if method == 'setXLink':
+        for a, b in zip(plots[:-1], plots[1:]):
+            b.setXLink(a)
+    else:
+        group = pgx.RangeSyncGroup([(plot, 'x') for plot in plots])
+    if shown:
+        glw.show()
+    app.processEvents()
+    start = time.perf_counter()
+    for n in range(NUM_PANS):
+        plots[NUM_PLOTS // 2].setXRange(n / 10, n / 10 + 10, padding=0)
+        app.processEvents()
+    assert plots[0].viewRange()[0] == [(NUM_PANS - 1) / 10, (NUM_PANS - 1) / 10 + 10]
+    print('%s, %s: %.2f ms per pan' % ('shown' if shown else 'hidden', method, (time.perf_counter() - start) / NUM_PANS * 1e3))
+    glw.close()
@@ -0,0 +1,77 @@
+"""Throughput of frames passed from a producer process to an ImageItem, either
+pickled through a multiprocessing.Queue (copy path) or through a SharedFrameRing,
+where only the slot index is sent and setImage views the shared memory.
+
+Each frame is set and rendered in the consumer.
+
+Run with: python benchmarks/bench_shared_frames.py
+"""
+import multiprocessing
+import time
+
+import numpy as np
+import pyqtgraph as pg
+import pyqtgraph_extensions as pgx
+
+NUM_FRAMES = 200
+
+
+def produce_copies(queue, shape):
+    frame = np.zeros(shape, np.uint16)
+    for n in range(NUM_FRAMES):
+        frame[:] = n
+        queue.put(frame)
+    queue.put(None)
+
+
+def produce_shared(queue, spec):
+    ring = pgx.SharedFrameRing.attach(spec)
+    for n in range(NUM_FRAMES):
+        slot = ring.acquire()
+        while slot is None:
+            time.sleep(1e-4)
+            slot = ring.acquire()
+        ring.frame(slot)[:] = n
+        ring.publish(slot)
+        queue.put(slot)
+    queue.put(None)
+    ring.close()
+
+
+def consume(item, queue, frame_for):
+    start = time.perf_counter()
+    while True:
+        message = queue.get()
+        if message is None:
+            break
+        image, release = frame_for(message)
+        item.setImage(image, autoLevels=False, release=release)
+        item.render()
+    item.clear()
+    return NUM_FRAMES / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    app = pg.mkQApp()
+    lut = np.array(pgx.get_colormap_lut(), dtype=np.ubyte)
+    print('%12s%14s%14s' % ('size', 'copy fps', 'shared fps'))
+    for n in (512, 1024, 2048):
+        shape = n, n
+        item = pgx.ImageItem(integer_lut=True, lut=lut, levels=(0, NUM_FRAMES))
+
+        queue = multiprocessing.Queue(4)
+        process = multiprocessing.Process(target=produce_copies, args=(queue, shape))
+        process.start()
+        copy_fps = consume(item, queue, lambda frame: (frame, None))
+        process.join()
+
+        ring = pgx.SharedFrameRing(shape, np.uint16, 4)
+        queue = multiprocessing.Queue(4)
+        process = multiprocessing.Process(target=produce_shared, args=(queue, ring.spec))
+        process.start()
+        shared_fps = consume(item, queue, lambda slot: (ring.frame(slot), ring.release_callback(slot)))
+        process.join()
+        ring.close()
+        ring.unlink()
+
+        print('%12s%14.1f%14.1f' % ('%dx%d' % shape, copy_fps, shared_fps))
@@ -0,0 +1,46 @@
+"""Time per frame of a live curve receiving 100 samples per frame, updated either
+by setData with the whole growing history (concatenated each frame) or by a
+CurveStream keeping the latest 100000 samples.
+
+Run with: python benchmarks/bench_streams.py
+"""
+import time
+
+import numpy as np
+import pyqtgraph as pg
+import pyqtgraph_extensions as pgx
+
+SAMPLES_PER_FRAME = 100
+NUM_FRAMES = 2000
+CAPACITY = 100000
+
+app = pg.mkQApp()
+glw = pgx.GraphicsLayoutWidget()
+plt = glw.addAlignedPlot()
+glw.show()
+
+
+def frames():
+    for n in range(NUM_FRAMES):
+        x = np.arange(n * SAMPLES_PER_FRAME, (n + 1) * SAMPLES_PER_FRAME, dtype=float)
+        yield x, np.sin(x / 1000)
+
+
+curve = plt.plot()
+history_x = np.zeros(0)
+history_y = np.zeros(0)
+start = time.perf_counter()
+for x, y in frames():
+    history_x = np.concatenate((history_x, x))
+    history_y = np.concatenate((history_y, y))
+    curve.setData(history_x, history_y)
+    app.processEvents()
+print('setData with history: %.2f ms per frame' % ((time.perf_counter() - start) / NUM_FRAMES * 1e3))
+plt.removeItem(curve)
+
+stream = plt.stream('stream', CAPACITY)
+start = time.perf_counter()
+for x, y in frames():
+    stream.append(x, y)
+    app.processEvents()
+print('CurveStream: %.2f ms per frame' % ((time.perf_counter() - start) / NUM_FRAMES * 1e3))
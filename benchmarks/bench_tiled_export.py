@@ -0,0 +1,59 @@
+"""Peak memory and time to export a figure at poster resolution, rendering it whole
+with NativeExporter versus tile by tile with TiledImageExporter.
+
+Each case runs in its own process, and peak memory is the growth of its maximum
+resident set size during the export.
+
+Run with: python benchmarks/bench_tiled_export.py [dpi]
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+CASES = ('whole png', 'tiled png', 'tiled tif')
+TILE_SIZE = 512
+
+
+def run(case, dpi, filename):
+    import pyqtgraph as pg
+    import pyqtgraph_extensions as pgx
+    pg.mkQApp()
+    glw = pgx.GraphicsLayoutWidget()
+    plt = glw.addAlignedPlot(labels={'left': 'y', 'bottom': 'x'})
+    plt.image(np.random.default_rng(0).random((256, 256)), rect=(0, 0, 1, 1))
+    x = np.linspace(0, 1, 1000)
+    plt.plot(x, np.sin(10 * x), pen='r')
+    glw.resize(900, 600)
+    item = pgx.export_item(glw)
+    kind, fmt = case.split()
+    if kind == 'whole':
+        exporter = pgx.NativeExporter(item, dpi=dpi)
+    else:
+        exporter = pgx.TiledImageExporter(item, TILE_SIZE, dpi=dpi)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    exporter.export(filename + '.' + fmt)
+    seconds = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+    print(seconds, peak / 1024, os.path.getsize(filename + '.' + fmt) / 2 ** 20)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2:
+        run(sys.argv[1], float(sys.argv[2]), sys.argv[3])
+        sys.exit()
+    dpi = float(sys.argv[1]) if len(sys.argv) > 1 else 900
+    print('10 x 6.7 inch figure at %g dpi, %d x %d tiles' % (dpi, TILE_SIZE, TILE_SIZE))
+    print('%12s%12s%16s%12s' % ('case', 'seconds', 'peak MB', 'file MB'))
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    with tempfile.TemporaryDirectory() as dir:
+        for case in CASES:
+            output = subprocess.run([sys.executable, __file__, case, str(dpi), os.path.join(dir, 'figure')],
+                                    env=env, check=True, capture_output=True, text=True).stdout
+            seconds, peak, size = map(float, output.split()[-3:])
+            print('%12s%12.2f%16.0f%12.1f' % (case, seconds, peak, size))
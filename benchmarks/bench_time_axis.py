@@ -0,0 +1,56 @@
+"""Time per TimeAxisItem.tickStrings call while scrolling a strip chart, compared
+with the previous per-tick time.strftime loop (which also formatted a range label
+that was discarded).
+
+Each step scrolls the view by 1 s, with ticks every 10 s (major) and 1 s (minor).
+Also compares formatting many uncached times.
+
+Run with: python benchmarks/bench_time_axis.py
+"""
+import time
+import timeit
+
+import numpy as np
+import pyqtgraph as pg
+import pyqtgraph_extensions as pgx
+
+NUM_STEPS = 2000
+
+
+def strftime_tick_strings(values):
+    rng = max(values) - min(values)
+    string = '%H:%M:%S'
+    strns = [time.strftime(string, time.localtime(x)) for x in values]
+    label = time.strftime('%b %d -', time.localtime(min(values))) + time.strftime(' %b %d, %Y',
+                                                                                 time.localtime(max(values)))
+    return strns
+
+
+app = pg.mkQApp()
+axis = pgx.TimeAxisItem('bottom')
+start = 1.7e9
+
+
+# Tick values and spacing of the major and minor ticks at each step.
+ticks = []
+for step in range(NUM_STEPS):
+    for spacing in (10, 1):
+        first = np.ceil((start + step) / spacing) * spacing
+        ticks.append((list(first + spacing * np.arange(60 // spacing)), spacing))
+
+
+def scroll(tick_strings):
+    for values, spacing in ticks:
+        tick_strings(values, spacing)
+
+
+old = timeit.timeit(lambda: scroll(lambda values, spacing: strftime_tick_strings(values)), number=1)
+new = timeit.timeit(lambda: scroll(lambda values, spacing: axis.tickStrings(values, 1, spacing)), number=1)
+print('strftime loop: %.1f us per step' % (old / NUM_STEPS * 1e6))
+print('TimeAxisItem:  %.1f us per step' % (new / NUM_STEPS * 1e6))
+
+# Formatting without the cache, e.g. on first showing a range.
+ns = (np.arange(1000) * 1e9 + start * 1e9).astype(np.int64)
+old = timeit.timeit(lambda: [time.strftime('%H:%M:%S', time.localtime(n / 1e9)) for n in ns], number=20) / 20
+new = timeit.timeit(lambda: pgx.format_datetimes(ns, '%H:%M:%S'), number=20) / 20
+print('1000 uncached strings: strftime %.2f ms, format_datetimes %.2f ms' % (old * 1e3, new * 1e3))
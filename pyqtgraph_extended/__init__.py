@@ -3,9 +3,41 @@ Provided I haven't made any mistakes, one should be able to import this package
 instead of pyqtgraph and obtain identical behavior but with the extra features
 of pyqtgraph_extensions available.
 """
+import importlib
+
 from pyqtgraph import *
 
-from pyqtgraph_extensions import *
+import pyqtgraph_extensions
+
+# A star import of pyqtgraph_extensions would import its lazy names' modules, so
+# take only its other public names. Drop any pyqtgraph namesakes of the lazy names
+# (e.g. GraphicsLayoutWidget) for __getattr__ to forward.
+_lazy_modules = {'exporters': 'pyqtgraph.exporters', 'opengl': 'pyqtgraph.opengl', 'recipes': 'pyqtgraph_recipes'}
+for _name in pyqtgraph_extensions.__all__:
+    if _name in pyqtgraph_extensions._lazy_imports:
+        globals().pop(_name, None)
+    else:
+        globals()[_name] = getattr(pyqtgraph_extensions, _name)
+del _name
+# pyqtgraph's public names and all of pyqtgraph_extensions', so a star import
+# resolves the lazy names through __getattr__.
+__all__ = sorted(set(name for name in globals() if not name.startswith('_') and name != 'pyqtgraph_extensions') |
+                 set(pyqtgraph_extensions.__all__))
+
+
+def __getattr__(name):
+    if name in pyqtgraph_extensions._lazy_imports:
+        value = getattr(pyqtgraph_extensions, name)
+    elif name in _lazy_modules:
+        value = importlib.import_module(_lazy_modules[name])
+    else:
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(pyqtgraph_extensions._lazy_imports) | set(_lazy_modules))
 
 if __name__ == "__main__":
     from pyqtgraph import QtCore
@@ -1,8 +1,34 @@
+import warnings
+
+import numpy as np
 import pyqtgraph as pg
 from pyqtgraph import QtCore
 
-from . import AxisItem
+from .AxisItem import AxisItem
+from .downsampling import DOWNSAMPLE_MODES
 from .misc import LegendItem, ImageItem, PlotDataItem
+from .PyramidImageItem import PyramidImageItem
+from .streams import CurveStream
+
+
+def style_key(cls, style):
+    """Return hashable key for items of type cls made with style (dict of keyword arguments).
+
+    Lists and dicts are converted to tuples. Returns None if a value can't be
+    hashed (e.g. an array or QPen), in which case the item isn't pooled.
+    """
+    def freeze(value):
+        if isinstance(value, (list, tuple)):
+            return tuple(freeze(v) for v in value)
+        if isinstance(value, dict):
+            return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+        hash(value)
+        return value
+
+    try:
+        return cls, freeze(style)
+    except TypeError:
+        return None
 
 
 class AlignedPlot(QtCore.QObject):
@@ -66,6 +92,13 @@ class AlignedPlot(QtCore.QObject):
             self.showAxis('bottom')
 
         self.items = []
+        self.streams = {}
+        self.legend = None
+        # Keys (see style_key) of the keyword arguments (other than data) that
+        # items made by plot and image were created with, and hidden items
+        # available for reuse as lists by key. None if pooling is disabled.
+        self.item_styles = {}
+        self.pool = None
 
         if labels is None:
             labels = {}
@@ -83,6 +116,9 @@ class AlignedPlot(QtCore.QObject):
 
         self.log_x = False
         self.log_y = False
+        # None until set, so items keep their own settings.
+        self.downsampling = None
+        self.clip_to_view = None
 
         if len(kargs) > 0:
             self.plot(**kargs)
@@ -141,28 +177,104 @@ class AlignedPlot(QtCore.QObject):
         vbargs = {}
         if 'ignoreBounds' in kargs:
             vbargs['ignoreBounds'] = kargs['ignoreBounds']
-        self.vb.addItem(item, *args, **vbargs)
+        # Items from the pool are still in the view box.
+        if item not in self.vb.addedItems:
+            self.vb.addItem(item, *args, **vbargs)
         name = None
         if hasattr(item, 'implements') and item.implements('plotData'):
             name = item.name()
-        if name is not None and hasattr(self, 'legend') and self.legend is not None:
+        if name is not None and self.legend is not None:
             self.legend.addItem(item, name=name)
         if hasattr(item, 'setLogMode'):
             item.setLogMode(self.log_x, self.log_y)
+        if self.downsampling is not None and hasattr(item, 'setDownsampling'):
+            self.applyDownsampling(item)
+        if self.clip_to_view is not None and hasattr(item, 'setClipToView'):
+            item.setClipToView(self.clip_to_view)
 
     def removeItem(self, item):
         """
-        Remove an item from the internal ViewBox.
+        Remove an item from the internal ViewBox, and from the legend and streams.
+
+        The plot then holds no references to the item.
         """
-        if item.scene() is not None:
-            self.vb.removeItem(item)
+        if item not in self.items:
+            return
+        self.items.remove(item)
+        self.vb.removeItem(item)
+        self.item_styles.pop(item, None)
+        if self.legend is not None:
+            self.legend.removeItem(item)
+        for name, stream in list(self.streams.items()):
+            if stream.item is item:
+                del self.streams[name]
 
     def clear(self):
         """
-        Remove all items from the ViewBox.
+        Remove all items from the ViewBox, including any kept for reuse.
         """
         for i in self.items[:]:
             self.removeItem(i)
+        if self.pool:
+            self.emptyPool()
+
+    def setPooling(self, enabled=True):
+        """Set whether items cleared by plot and image are kept for reuse.
+
+        With pooling, clear=True hides the plot data items and images made by
+        plot and image instead of removing them. Subsequent calls of plot or image
+        with the same keyword arguments (apart from data) then update a hidden item
+        with setData or setImage instead of constructing a new one, so repeatedly
+        refreshing a plot with clear=True creates almost no new objects. Other
+        items are removed as usual.
+
+        Changes made to an item other than through these keyword arguments (e.g.
+        calling setPen on it) carry over when it is reused.
+
+        Items not reused between one clear=True and the next are removed, so the
+        pool holds at most the items of the previous refresh. Items made with
+        keyword arguments that can't be hashed (e.g. arrays) aren't pooled.
+        """
+        if not enabled and self.pool:
+            self.emptyPool()
+        self.pool = {} if enabled else None
+
+    def emptyPool(self):
+        for items in self.pool.values():
+            for item in items:
+                self.vb.removeItem(item)
+        self.pool = {}
+
+    def recycleItems(self):
+        """Hide items made by plot and image for reuse, and remove all others, including pooled items that
+        weren't reused since the last recycle."""
+        self.emptyPool()
+        stream_items = [stream.item for stream in self.streams.values()]
+        for item in self.items[:]:
+            key = self.item_styles.get(item)
+            if key is None or any(item is i for i in stream_items):
+                self.removeItem(item)
+                continue
+            self.items.remove(item)
+            del self.item_styles[item]
+            if self.legend is not None:
+                self.legend.removeItem(item)
+            item.hide()
+            self.pool.setdefault(key, []).append(item)
+
+    def takeFromPool(self, key):
+        """Return hidden item with key (see style_key), or None."""
+        if not self.pool or key is None:
+            return None
+        items = self.pool.get(key)
+        if not items:
+            return None
+        # Oldest first, so items are reused in the order they were made.
+        item = items.pop(0)
+        if not items:
+            del self.pool[key]
+        item.show()
+        return item
 
     def plot(self, *args, **kargs):
         """
@@ -172,14 +284,28 @@ class AlignedPlot(QtCore.QObject):
         Extra allowed arguments are:
             clear    - clear all plots before displaying new data
             params   - meta-parameters to associate with this data
+
+        If pooling is enabled (see setPooling), a hidden item may be reused.
         """
         clear = kargs.get('clear', False)
         params = kargs.get('params', None)
 
         if clear:
-            self.clear()
-
-        item = PlotDataItem(*args, **kargs)
+            if self.pool is None:
+                self.clear()
+            else:
+                self.recycleItems()
+
+        key = None
+        if self.pool is not None:
+            key = style_key(PlotDataItem, {k: v for k, v in kargs.items() if k not in ('x', 'y', 'clear', 'params')})
+        item = self.takeFromPool(key)
+        if item is None:
+            item = PlotDataItem(*args, **kargs)
+        else:
+            item.setData(*args, **kargs)
+        if key is not None:
+            self.item_styles[item] = key
 
         if params is None:
             params = {}
@@ -187,12 +313,62 @@ class AlignedPlot(QtCore.QObject):
 
         return item
 
+    def stream(self, name, capacity=1000, follow=None, **kwargs):
+        """Return CurveStream for appending to a curve of live data, creating it if needed.
+
+        Args:
+            name (str): name of the curve (also used in legend).
+            capacity (int): number of samples kept.
+            follow (float): if not None, the x range scrolls to show the latest
+                follow x units.
+            kwargs: passed on to plot e.g. pen, when the curve is created.
+
+        Returns:
+            CurveStream: use append(x, y) to add samples.
+        """
+        try:
+            return self.streams[name]
+        except KeyError:
+            pass
+        item = self.plot(name=name, **kwargs)
+        stream = CurveStream(item, capacity, follow)
+        self.streams[name] = stream
+        return stream
+
     def image(self, *args, **kwargs):
+        """Add and return a new image.
+
+        Extra allowed arguments are:
+            clear    - clear all items before displaying new image
+            pyramid  - if True, create a PyramidImageItem (for very large images)
+                       instead of an ImageItem
+
+        If pooling is enabled (see setPooling), a hidden ImageItem may be reused.
+        """
         clear = kwargs.get('clear', False)
         params = kwargs.get('params', None)
         if clear:
-            self.clear()
-        item = ImageItem(*args, **kwargs)
+            if self.pool is None:
+                self.clear()
+            else:
+                self.recycleItems()
+        if kwargs.pop('pyramid', False):
+            for k in ('clear', 'params'):
+                kwargs.pop(k, None)
+            item = PyramidImageItem(*args, **kwargs)
+        else:
+            key = None
+            if self.pool is not None:
+                # Rect and levels are set below.
+                key = style_key(ImageItem, {k: v for k, v in kwargs.items()
+                                            if k not in ('image', 'clear', 'params', 'rect', 'levels')})
+            item = self.takeFromPool(key)
+            if item is None:
+                item = ImageItem(*args, **kwargs)
+            else:
+                item.setImage(*args, **kwargs)
+            if key is not None:
+                self.item_styles[item] = key
         rect = kwargs.get('rect', None)
         if rect is not None:
             try:
@@ -280,13 +456,15 @@ class AlignedPlot(QtCore.QObject):
         """Hide one of the PlotItem's axes. ('left', 'bottom', 'right', or 'top')"""
         self.showAxis(axis, False)
 
-    def addLegend(self, size=None, offset=(30, 30)):
+    def addLegend(self, size=None, offset=(30, 30), **kwargs):
         """
         Create a new LegendItem and anchor it over the internal ViewBox.
         Plots will be automatically displayed in the legend if they
         are created with the 'name' argument.
+
+        kwargs (e.g. page_size) are passed on to LegendItem.__init__.
         """
-        self.legend = LegendItem(size, offset)
+        self.legend = LegendItem(size, offset, **kwargs)
         self.legend.setParentItem(self.vb)
         return self.legend
 
@@ -337,13 +515,73 @@ class AlignedPlot(QtCore.QObject):
             self.log_y = y
         self.updateLogMode()
 
+    def setDownsampling(self, ds=None, auto=None, mode=None):
+        """Set downsampling of all current and future plot data items.
+
+        Args:
+            ds (int): downsampling factor, or None to leave unchanged.
+            auto (bool): whether to choose ds automatically from the visible range,
+                or None to leave unchanged.
+            mode (str): 'subsample', 'mean', 'peak' or 'lttb' (see
+                PlotDataItem), or None to leave unchanged.
+        """
+        if mode is not None and mode not in DOWNSAMPLE_MODES:
+            raise ValueError('Unknown downsampling mode %s' % mode)
+        if ds is not None and not (isinstance(ds, (int, np.integer)) and ds >= 1):
+            raise ValueError('Downsampling factor must be a positive integer, not %s' % ds)
+        current = (1, False, 'peak') if self.downsampling is None else self.downsampling
+        ds = current[0] if ds is None else ds
+        auto = current[1] if auto is None else auto
+        mode = current[2] if mode is None else mode
+        self.downsampling = ds, auto, mode
+        for item in self.items:
+            if hasattr(item, 'setDownsampling'):
+                self.applyDownsampling(item)
+
+    def applyDownsampling(self, item):
+        """Apply the downsampling settings to an item.
+
+        Only pyqtgraph_extensions' PlotDataItem supports 'lttb' - other items
+        get 'peak', with a warning.
+        """
+        ds, auto, mode = self.downsampling
+        if mode == 'lttb' and not isinstance(item, PlotDataItem):
+            warnings.warn("%s doesn't support lttb downsampling - using peak" % type(item).__name__)
+            mode = 'peak'
+        item.setDownsampling(ds, auto, mode)
+
+    def setClipToView(self, clip):
+        """Set whether all current and future plot data items are clipped to the visible x range."""
+        self.clip_to_view = clip
+        for item in self.items:
+            if hasattr(item, 'setClipToView'):
+                item.setClipToView(clip)
+
     def close(self):
+        """Remove the plot from its layout and scene, releasing its items.
+
+        The plot can't be used afterwards.
+        """
+        self.clear()
+        if self.legend is not None:
+            # Goes with the view box.
+            self.legend.clear()
+            self.legend = None
+        owned = [self.vb] + [self.axes[k]['item'] for k in self.axes if k not in self.axisItems]
+        if self.create['title']:
+            owned.append(self.titleLabel)
+        for item in owned:
+            if self.layout is not None and item in self.layout.items:
+                self.layout.removeItem(item)
+            elif item.scene() is not None:
+                item.scene().removeItem(item)
         for k in self.axes:
             i = self.axes[k]['item']
             i.close()
         self.axes = None
-        self.scene().removeItem(self.vb)
+        self.vb.close()
         self.vb = None
+        self.layout = None
 
     def setXYLink(self, other):
         """Shorthand for calling setXLink and setYLink in sequence."""
@@ -1,14 +1,36 @@
+import calendar
+import collections
 import logging
 import os
-import time
 from functools import partial
 
+import numpy as np
 import pyqtgraph as pg
 import pyqtgraph.icons as icons
 from pyqtgraph import QtCore, QtGui, QtWidgets
 
 logger = logging.getLogger(__name__)
 
+_icon_pixmaps = {}
+
+
+def get_icon_pixmap(name):
+    """Return pixmap for axis button icon, loaded once per process.
+
+    name is 'auto' (from pyqtgraph's icons) or one of the png files in this package,
+    without extension.
+    """
+    try:
+        return _icon_pixmaps[name]
+    except KeyError:
+        pass
+    if name == 'auto':
+        pixmap = icons.getGraphPixmap('auto')
+    else:
+        pixmap = QtGui.QPixmap(os.path.join(os.path.dirname(os.path.abspath(__file__)), name + '.png'))
+    _icon_pixmaps[name] = pixmap
+    return pixmap
+
 
 # TODO create a ColorBarAxisItem subclass designed to go next to a colorbar and
 # control an image.
@@ -25,33 +47,38 @@ class AxisItem(pg.AxisItem):
     def __init__(self, orientation, pen=None, linkView=None, parent=None, maxTickLength=-5, showValues=True):
         # Note - development branch of pyqtgraph adds extra argument textPen here.
         pg.AxisItem.__init__(self, orientation=orientation, pen=pen, linkView=linkView, parent=parent, maxTicLength=maxTickLength, showValues=showValues)
+        # Buttons are created on first hover (see createButtons) - most axes are never hovered over.
         self.set_lmt_btns = []
         self.aset_lmt_btns = []
-        path = os.path.dirname(os.path.abspath(__file__))
-        self.autorange_toggle_off_pixmap = QtGui.QPixmap(os.path.join(path, 'autorange_toggle_off.png'))
-        self.autorange_toggle_on_pixmap = QtGui.QPixmap(os.path.join(path, 'autorange_toggle_on.png'))
+        self.enable_auto_range_btn = None
+        self.auto_range_enabled = None
+        self.mouseHovering = False
+        self.buttons_enabled = True
+
+    def createButtons(self):
         for type in range(2):
             # set limit button
-            btn = pg.ButtonItem(QtGui.QPixmap(os.path.join(path, 'ellipsis.png')), 14, self)
+            btn = pg.ButtonItem(width=14, parentItem=self, pixmap=get_icon_pixmap('ellipsis'))
             btn.setZValue(-1000)
             btn.setFlag(btn.GraphicsItemFlag.ItemNegativeZStacksBehindParent)
             btn.clicked.connect(partial(self.set_lmt_btn_clicked, type))  # late binding if function used
             self.set_lmt_btns.append(btn)
             # autoset limit button
-            btn = pg.ButtonItem(icons.getGraphPixmap('auto'), 14, self)
+            btn = pg.ButtonItem(width=14, parentItem=self, pixmap=get_icon_pixmap('auto'))
             btn.setZValue(-1000)
             btn.setFlag(btn.GraphicsItemFlag.ItemNegativeZStacksBehindParent)
             btn.clicked.connect(partial(self.aset_lmt_btn_clicked, type))  # late binding if function used
             self.aset_lmt_btns.append(btn)
         # enable autorange button
-        btn = pg.ButtonItem(self.autorange_toggle_off_pixmap, 14, self)
+        btn = pg.ButtonItem(width=14, parentItem=self, pixmap=self.autorange_toggle_pixmap())
         btn.setZValue(-1000)
         btn.setFlag(btn.GraphicsItemFlag.ItemNegativeZStacksBehindParent)
         btn.clicked.connect(self.enable_auto_range_btn_clicked)  # late binding if function used
         self.enable_auto_range_btn = btn
-        self.mouseHovering = False
-        self.buttons_enabled = True
-        self.updateButtons()
+        self.positionButtons()
+
+    def autorange_toggle_pixmap(self):
+        return get_icon_pixmap('autorange_toggle_' + ('on' if self.auto_range_enabled else 'off'))
 
     def close(self):
         for btn in self.set_lmt_btns:
@@ -60,9 +87,12 @@ class AxisItem(pg.AxisItem):
         for btn in self.aset_lmt_btns:
             btn.setParent(None)
         self.aset_lmt_btns = None
-        self.enable_auto_range_btn.setParent(None)
+        if self.enable_auto_range_btn is not None:
+            self.enable_auto_range_btn.setParent(None)
         self.enable_auto_range_btn = None
-        pg.AxisItem.close(self)
+        # Already removed from the scene if its layout was.
+        if self.scene() is not None:
+            pg.AxisItem.close(self)
 
     def axis(self):
         return int(self.orientation in {'left', 'right'})
@@ -77,11 +107,13 @@ class AxisItem(pg.AxisItem):
             view.sigStateChanged.connect(self.respond_linked_view_state_change)
 
     def respond_linked_view_state_change(self):
+        # Called on every pan and zoom, so only touch the button if the state has flipped.
         s = not (self.linkedView().autoRangeEnabled()[self.axis()] is False)
+        if s == self.auto_range_enabled:
+            return
         self.auto_range_enabled = s
-        path = os.path.dirname(os.path.abspath(__file__))
-        self.enable_auto_range_btn.setPixmap(
-            QtGui.QPixmap(os.path.join(path, 'autorange_toggle_' + ('on' if s else 'off') + '.png')))
+        if self.enable_auto_range_btn is not None:
+            self.enable_auto_range_btn.setPixmap(self.autorange_toggle_pixmap())
 
     def resizeEvent(self, ev):
         ## Set the position of the label
@@ -108,8 +140,10 @@ class AxisItem(pg.AxisItem):
 
         self.label.setPos(p)
         self.picture = None
+        self.positionButtons()
 
-        if not hasattr(self, 'set_lmt_btns') or self.set_lmt_btns is None:  ## already closed down
+    def positionButtons(self):
+        if not getattr(self, 'set_lmt_btns', None):  ## not created yet, or already closed down
             return
         lower = self.set_lmt_btns[0]
         rect = self.mapRectFromItem(lower, lower.boundingRect())
@@ -219,13 +253,17 @@ class AxisItem(pg.AxisItem):
         self.updateButtons()
 
     def updateButtons(self):
-        btns = self.set_lmt_btns + self.aset_lmt_btns + [self.enable_auto_range_btn]
+        if self.set_lmt_btns is None:  # closed
+            return
         try:
             if self.mouseHovering and self._exportOpts is False and self.buttons_enabled:
+                if not self.set_lmt_btns:
+                    self.createButtons()
+                btns = self.set_lmt_btns + self.aset_lmt_btns + [self.enable_auto_range_btn]
                 for btn in btns:
                     btn.show()
-            else:
-                for btn in btns:
+            elif self.set_lmt_btns:
+                for btn in self.set_lmt_btns + self.aset_lmt_btns + [self.enable_auto_range_btn]:
                     btn.hide()
         except RuntimeError:
             pass  # this can happen if the plot has been deleted.
@@ -314,40 +352,131 @@ class AxisItem(pg.AxisItem):
         self.updateButtons()
 
 
+# Maps (epoch nanoseconds, format, timezone) to tick string, least recently used first.
+_tick_strings = collections.OrderedDict()
+TICK_STRING_CACHE_SIZE = 4096
+
+_month_abbrs = np.array(calendar.month_abbr[1:])
+
+
+def format_datetimes(ns, format, tz='local'):
+    """Format nanoseconds since the epoch as strings, vectorised.
+
+    The times are converted to ISO 8601 strings by np.datetime_as_string and the
+    fields are sliced out, rather than calling time.strftime for each.
+
+    Args:
+        ns (int64 array): nanoseconds since 1970-01-01T00:00:00 UTC.
+        format (str): one of '%Y', '%b', '%d', '%H:%M:%S' or '%H:%M:%S.%nf' where n
+            is the number (1-9) of decimal places of the seconds.
+        tz: timezone - 'local', 'UTC' or a datetime.tzinfo.
+
+    Returns:
+        array of str.
+    """
+    iso = np.datetime_as_string(np.asarray(ns, dtype=np.int64).astype('datetime64[ns]'), unit='ns', timezone=tz)
+    chars = iso.view('U1').reshape(len(iso), -1)
+    if format == '%b':
+        return _month_abbrs[chars[:, 5].astype(int) * 10 + chars[:, 6].astype(int) - 1]
+    if format.startswith('%H:%M:%S.%'):
+        field = slice(11, 20 + int(format[10:-1]))
+    else:
+        field = {'%Y': slice(0, 4), '%d': slice(8, 10), '%H:%M:%S': slice(11, 19)}[format]
+    return np.ascontiguousarray(chars[:, field]).view('U%d' % (field.stop - field.start)).ravel()
+
+
 class TimeAxisItem(AxisItem):
+    """Axis showing time as dates or time of day.
+
+    Values are seconds since epoch_offset, which is in nanoseconds since
+    1970-01-01T00:00:00 UTC. With the default zero offset, values are Unix
+    timestamps. Float seconds since 1970 have only ~0.2 microsecond precision, so for
+    finer timestamps, set epoch_offset to an int64 nanosecond time near the data and
+    plot seconds relative to it e.g. with toAxisValues.
+
+    Tick strings are formatted for all ticks at once (format_datetimes) and kept
+    in a LRU cache keyed by (time, format, timezone), shared between axes, so
+    repaints (e.g. when scrolling) mostly reuse them.
+    """
+
+    def __init__(self, *args, tz=None, epoch_offset=0, **kwargs):
+        """
+        Args:
+            tz: timezone - None for local time, a name e.g. 'UTC' or
+                'Europe/London', or a datetime.tzinfo.
+            epoch_offset (int): nanoseconds since the Unix epoch of value 0.
+            args, kwargs: passed on to AxisItem.
+        """
+        AxisItem.__init__(self, *args, **kwargs)
+        self.tz = None
+        self.epoch_offset = 0
+        self.setTimezone(tz)
+        self.setEpochOffset(epoch_offset)
+
+    def setTimezone(self, tz):
+        if tz is None:
+            tz = 'local'
+        elif isinstance(tz, str) and tz not in ('local', 'UTC'):
+            import zoneinfo
+            tz = zoneinfo.ZoneInfo(tz)
+        self.tz = tz
+        self.picture = None
+        self.update()
+
+    def setEpochOffset(self, epoch_offset):
+        self.epoch_offset = int(epoch_offset)
+        self.picture = None
+        self.update()
+
+    def toAxisValues(self, ns):
+        """Convert int64 nanoseconds since the Unix epoch to axis values, without loss of precision near the offset."""
+        return (np.asarray(ns, dtype=np.int64) - self.epoch_offset) / 1e9
+
+    @staticmethod
+    def tickFormat(rng, spacing):
+        """Return the format for format_datetimes of ticks spanning rng seconds with the given spacing."""
+        if rng >= 3600 * 24 * 30 * 24:
+            return '%Y'
+        if rng >= 3600 * 24 * 30:
+            return '%b'
+        if rng >= 3600 * 24:
+            return '%d'
+        if spacing >= 1:
+            return '%H:%M:%S'
+        # Enough decimal places to distinguish ticks.
+        places = 1
+        while places < 9:
+            scaled = spacing * 10 ** places
+            if round(scaled) >= 1 and abs(scaled - round(scaled)) < 1e-6 * scaled:
+                break
+            places += 1
+        return '%%H:%%M:%%S.%%%df' % places
+
     def tickStrings(self, values, scale, spacing):
-        """Copied from pyqtgraph examples."""
-        strns = []
         if len(values) == 0:
-            return AxisItem.tickStrings(self, values, scale, spacing)
-        rng = max(values) - min(values)
-        # if rng < 120:
-        #    return pg.AxisItem.tickStrings(self, values, scale, spacing)
-        if rng < 3600 * 24:
-            string = '%H:%M:%S'
-            label1 = '%b %d -'
-            label2 = ' %b %d, %Y'
-        elif rng >= 3600 * 24 and rng < 3600 * 24 * 30:
-            string = '%d'
-            label1 = '%b - '
-            label2 = '%b, %Y'
-        elif rng >= 3600 * 24 * 30 and rng < 3600 * 24 * 30 * 24:
-            string = '%b'
-            label1 = '%Y -'
-            label2 = ' %Y'
-        elif rng >= 3600 * 24 * 30 * 24:
-            string = '%Y'
-            label1 = ''
-            label2 = ''
-        for x in values:
-            try:
-                strns.append(time.strftime(string, time.localtime(x)))
-            except ValueError:  ## Windows can't handle dates before 1970
-                strns.append('')
-        try:
-            label = time.strftime(label1, time.localtime(min(values))) + time.strftime(label2,
-                                                                                       time.localtime(max(values)))
-        except ValueError:
-            label = ''
-        # self.setLabel(text=label)
-        return strns
+            return []
+        values = np.asarray(values, dtype=float)
+        lowest, highest = values.min(), values.max()
+        format = self.tickFormat(highest - lowest, spacing)
+        # Times beyond the range of datetime64[ns] (years 1678 to 2262) are left blank.
+        limit = 2 ** 63 - 2 ** 40
+        valid = None
+        if not (abs(lowest * 1e9 + self.epoch_offset) < limit and abs(highest * 1e9 + self.epoch_offset) < limit):
+            valid = np.abs(values * 1e9 + self.epoch_offset) < limit
+            values = values[valid]
+        ns = (np.round(values * 1e9).astype(np.int64) + self.epoch_offset).tolist()
+        keys = [(n, format, self.tz) for n in ns]
+        strings = [_tick_strings.get(key) for key in keys]
+        if None in strings:
+            missing = [key for key, string in zip(keys, strings) if string is None]
+            formatted = format_datetimes([key[0] for key in missing], format, self.tz).tolist()
+            _tick_strings.update(zip(missing, formatted))
+            strings = [_tick_strings[key] for key in keys]
+        for key in keys:
+            _tick_strings.move_to_end(key)
+        while len(_tick_strings) > TICK_STRING_CACHE_SIZE:
+            _tick_strings.popitem(last=False)
+        if valid is not None:
+            strings = iter(strings)
+            strings = [next(strings) if v else '' for v in valid]
+        return strings
@@ -1,7 +1,11 @@
+import contextlib
+
 import pyqtgraph as pg
+import pyqtgraph.functions as fn
 from pyqtgraph import QtGui, QtWidgets
 
-from . import AlignedPlot, ColorBarItem, adjust_widget, IPythonPNGRepr
+from . import ColorBarItem, adjust_widget, IPythonPNGRepr
+from .AlignedPlot import AlignedPlot
 
 
 class GraphicsLayout(pg.GraphicsLayout):
@@ -14,11 +18,73 @@ class GraphicsLayout(pg.GraphicsLayout):
     def __init__(self, parent=None, border=None):
         pg.GraphicsLayout.__init__(self, parent, border)
         self.setSpacing(0)
+        self.batch_depth = 0
 
     def addItem(self, item, row=None, col=None, rowspan=1, colspan=1, rel_row=0):
         if row is None:
             row = self.currentRow
-        pg.GraphicsLayout.addItem(self, item, row + rel_row, col, rowspan, colspan)
+        row += rel_row
+        if self.batch_depth == 0:
+            pg.GraphicsLayout.addItem(self, item, row, col, rowspan, colspan)
+            return
+        # As pyqtgraph.GraphicsLayout.addItem, but without activating the layout,
+        # which batch does on exit.
+        if col is None:
+            col = self.currentCol
+        self.items[item] = []
+        for i in range(rowspan):
+            for j in range(colspan):
+                self.rows.setdefault(row + i, {})[col + j] = item
+                self.items[item].append((row + i, col + j))
+        borderRect = QtWidgets.QGraphicsRectItem()
+        borderRect.setParentItem(self)
+        borderRect.setZValue(1e3)
+        borderRect.setPen(fn.mkPen(self.border))
+        self.itemBorders[item] = borderRect
+        item.geometryChanged.connect(self._updateItemBorder)
+        self.layout.addItem(item, row, col, rowspan, colspan)
+        self.nextColumn()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Context manager for adding many items, with the layout activated once on exit.
+
+        pyqtgraph.GraphicsLayout.addItem activates the layout after every item,
+        which resizes every item already added - quadratic in the number of items.
+        """
+        self.batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.batch_depth -= 1
+            if self.batch_depth == 0:
+                self.layout.activate()
+
+    def addAlignedPlotGrid(self, rows, cols, row=None, col=None, **kwargs):
+        """Create a rows x cols grid of AlignedPlots starting at the given (or current) cell.
+
+        The layout is activated once, after all plots are added (see batch). Keyword
+        arguments are passed to each AlignedPlot. Afterwards, the current cell is the
+        start of the row after the grid.
+
+        Returns:
+            list of rows of plots
+        """
+        if row is None:
+            row = self.currentRow
+        if col is None:
+            col = self.currentCol
+        grid = []
+        with self.batch():
+            for i in range(rows):
+                grid.append([])
+                for j in range(cols):
+                    # An AlignedPlot spans 4 rows (title, top axis, view box, bottom
+                    # axis) and 3 columns (left axis, view box, right axis).
+                    grid[-1].append(self.addAlignedPlot(row + 4 * i, col + 3 * j, **kwargs))
+        self.currentRow = row + 4 * rows
+        self.currentCol = 0
+        return grid
 
     def addAlignedPlot(self, row=None, col=None, plot=None, **kwargs):
         """
@@ -117,6 +183,8 @@ class GraphicsLayoutWidget(pg.GraphicsView, IPythonPNGRepr):
             "removeItem",
             "itemIndex",
             "addAlignedPlot",
+            "addAlignedPlotGrid",
+            "batch",
             "nextRows",
             "nextCols",
             "addColorBar",
@@ -0,0 +1,267 @@
+import math
+
+import numpy as np
+import pyqtgraph as pg
+import pyqtgraph.functions as fn
+from pyqtgraph import QtCore, QtGui
+
+from .ranges import nanrange
+
+
+class MultiCurveItem(pg.GraphicsObject):
+    """Many curves (e.g. overlaid reference traces) drawn by one graphics item.
+
+    One PlotDataItem per curve means one QGraphicsItem per curve, each with its own
+    bounds, autorange bookkeeping and paint call. Here curves with equal pens are
+    grouped, and each group is drawn as one QPainterPath built from the
+    concatenated samples of its curves with a connect array - breaks between
+    curves, at non-finite samples and over hidden curves.
+
+    The concatenated samples and connect array of each group are kept. Changing
+    the data of a curve (with unchanged length) or showing or hiding it only
+    writes that curve's slice, and the group's path is rebuilt when next painted.
+    Per-curve bounds are cached too, so the bounds of the item are a reduction
+    over curves rather than samples.
+
+    Curves are referred to by index, which is stable - there is no removal, but a
+    curve can be emptied with clearCurve.
+
+    There is no setLogMode, so PlotItem.setLogMode leaves the curves in linear
+    coordinates - take the logarithm of the data instead.
+    """
+
+    def __init__(self, y=None, x=None, pens=None):
+        """
+        Args:
+            y, x, pens: passed on to setData.
+        """
+        pg.GraphicsObject.__init__(self)
+        self.xs = []
+        self.ys = []
+        self.pens = []
+        self.visible = []
+        # Rows of (xmin, xmax, ymin, ymax) over the finite samples of each curve.
+        self.curve_bounds = np.empty((0, 4))
+        # List of groups (dicts), or None if the curves need regrouping.
+        self.groups = None
+        # Maps curve index to (group, offset of its samples in the group).
+        self.locations = {}
+        self.bounds = None
+        self.bounding_rect = None
+        if y is not None:
+            self.setData(y, x, pens)
+
+    def __len__(self):
+        return len(self.ys)
+
+    def setData(self, y, x=None, pens=None):
+        """Replace all curves.
+
+        Args:
+            y (2D array or sequence of 1D arrays): y values of each curve, e.g. an
+                (n_curves, n_samples) array. Rows are kept as views, not copied.
+            x (1D or 2D array or sequence of 1D arrays): x values shared by all
+                curves (1D) or of each curve. If None, sample indices are used.
+            pens: list of pens (anything accepted by mkPen), one per curve, or a
+                single pen (not a list) for all. None means the default foreground
+                pen.
+        """
+        num = len(y)
+        if x is None or np.ndim(x[0]) == 0:
+            x = [x] * num
+        if not isinstance(pens, list):
+            pens = [pens] * num
+        assert len(x) == num and len(pens) == num
+        self.xs = []
+        self.ys = []
+        self.pens = []
+        self.visible = [True] * num
+        self.curve_bounds = np.full((num, 4), math.nan)
+        for index, (xi, yi, pen) in enumerate(zip(x, y, pens)):
+            self.xs.append(None)
+            self.ys.append(None)
+            self.pens.append(self.makePen(pen))
+            self.storeCurve(index, yi, xi)
+        self.groups = None
+        self.changed()
+
+    @staticmethod
+    def makePen(pen):
+        return fn.mkPen(pg.getConfigOption('foreground')) if pen is None else fn.mkPen(pen)
+
+    def addCurve(self, y=None, x=None, pen=None):
+        """Add a curve, empty if y is None, and return its index."""
+        index = len(self.ys)
+        self.xs.append(None)
+        self.ys.append(None)
+        self.pens.append(self.makePen(pen))
+        self.visible.append(True)
+        self.curve_bounds = np.append(self.curve_bounds, np.full((1, 4), math.nan), axis=0)
+        self.storeCurve(index, np.zeros(0) if y is None else y, x)
+        self.groups = None
+        self.changed()
+        return index
+
+    def storeCurve(self, index, y, x):
+        y = np.asarray(y)
+        x = np.arange(len(y)) if x is None else np.asarray(x)
+        assert x.shape == y.shape and y.ndim == 1
+        self.xs[index] = x
+        self.ys[index] = y
+        finite = np.isfinite(x) & np.isfinite(y)
+        if not finite.all():
+            x = x[finite]
+            y = y[finite]
+        self.curve_bounds[index] = nanrange(x) + nanrange(y)
+
+    def setCurveData(self, index, y, x=None):
+        """Set samples of one curve. If its length is unchanged, only its slice of its group is rewritten."""
+        length = len(self.ys[index])
+        self.storeCurve(index, y, x)
+        if self.groups is not None:
+            group, offset = self.locations[index]
+            if not group['stale'] and len(self.ys[index]) == length:
+                group['x'][offset:offset + length] = self.xs[index]
+                group['y'][offset:offset + length] = self.ys[index]
+                self.writeConnect(index)
+            else:
+                group['stale'] = True
+            group['path'] = None
+        self.changed()
+
+    def clearCurve(self, index):
+        """Remove all samples of a curve."""
+        self.setCurveData(index, np.zeros(0))
+
+    def getCurveData(self, index):
+        return self.xs[index], self.ys[index]
+
+    def setCurveVisible(self, index, visible):
+        visible = bool(visible)
+        if self.visible[index] == visible:
+            return
+        self.visible[index] = visible
+        if self.groups is not None:
+            group, _ = self.locations[index]
+            if not group['stale']:
+                self.writeConnect(index)
+            group['path'] = None
+        self.changed()
+
+    def isCurveVisible(self, index):
+        return self.visible[index]
+
+    def setCurvePen(self, index, *args, **kwargs):
+        """Set pen of a curve (arguments as for mkPen). Curves are regrouped when next painted."""
+        self.pens[index] = fn.mkPen(*args, **kwargs)
+        self.groups = None
+        self.changed()
+
+    def changed(self):
+        self.bounds = None
+        self.bounding_rect = None
+        self.prepareGeometryChange()
+        self.informViewBoundsChanged()
+        self.update()
+
+    def groupCurves(self):
+        """Group curves by pen and build the concatenated samples and connect array of each group."""
+        groups = []
+        for index, pen in enumerate(self.pens):
+            for group in groups:
+                if group['pen'] == pen:
+                    group['curves'].append(index)
+                    break
+            else:
+                groups.append(dict(pen=pen, curves=[index], stale=True))
+        self.groups = groups
+        for group in groups:
+            self.buildGroup(group)
+
+    def buildGroup(self, group):
+        lengths = [len(self.ys[index]) for index in group['curves']]
+        total = sum(lengths)
+        group['x'] = np.empty(total)
+        group['y'] = np.empty(total)
+        group['connect'] = np.empty(total, dtype=np.int32)
+        offset = 0
+        for index, length in zip(group['curves'], lengths):
+            self.locations[index] = group, offset
+            group['x'][offset:offset + length] = self.xs[index]
+            group['y'][offset:offset + length] = self.ys[index]
+            self.writeConnect(index)
+            offset += length
+        group['stale'] = False
+        group['path'] = None
+
+    def writeConnect(self, index):
+        """Write the connect array slice of a curve - each sample connects to the next unless it is the
+        last, either is non-finite, or the curve is hidden."""
+        group, offset = self.locations[index]
+        x = self.xs[index]
+        y = self.ys[index]
+        connect = group['connect'][offset:offset + len(y)]
+        if not self.visible[index]:
+            connect[:] = 0
+            return
+        finite = np.isfinite(x) & np.isfinite(y)
+        connect[:-1] = finite[:-1] & finite[1:]
+        connect[-1:] = 0
+
+    def groupPath(self, group):
+        if group['stale']:
+            self.buildGroup(group)
+        if group['path'] is None:
+            group['path'] = fn.arrayToQPath(group['x'], group['y'], connect=group['connect'])
+        return group['path']
+
+    def dataBounds(self, ax, frac=1.0, orthoRange=None):
+        """Range of visible curves along axis ax - used by ViewBox for auto-ranging.
+
+        frac and orthoRange are ignored, i.e. the full range is returned.
+        """
+        if self.bounds is None:
+            bounds = self.curve_bounds[np.asarray(self.visible, dtype=bool)]
+            with np.errstate(invalid='ignore'):
+                if len(bounds) == 0 or np.isnan(bounds[:, 0]).all():
+                    self.bounds = None, None
+                else:
+                    self.bounds = (np.nanmin(bounds[:, 0]), np.nanmax(bounds[:, 1])), (np.nanmin(bounds[:, 2]),
+                        np.nanmax(bounds[:, 3]))
+        if self.bounds[0] is None:
+            return None, None
+        return self.bounds[ax]
+
+    def pixelPadding(self):
+        widths = [pen.widthF() for pen in self.pens if pen.isCosmetic() and pen.style() != QtCore.Qt.PenStyle.NoPen]
+        return max(widths, default=0) * 0.7072
+
+    def boundingRect(self):
+        if self.bounding_rect is None:
+            xmin, xmax = self.dataBounds(0)
+            if xmin is None:
+                return QtCore.QRectF()
+            ymin, ymax = self.dataBounds(1)
+            px = py = 0.
+            padding = self.pixelPadding()
+            if padding > 0:
+                px, py = self.pixelVectors()
+                px = 0 if px is None else px.length() * padding
+                py = 0 if py is None else py.length() * padding
+            self.bounding_rect = QtCore.QRectF(xmin - px, ymin - py, xmax - xmin + 2 * px, ymax - ymin + 2 * py)
+        return self.bounding_rect
+
+    def viewTransformChanged(self):
+        self.bounding_rect = None
+        self.prepareGeometryChange()
+
+    def paint(self, painter, *args):
+        if self.groups is None:
+            self.groupCurves()
+        antialias = pg.getConfigOption('antialias')
+        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing, antialias)
+        for group in self.groups:
+            if not any(self.visible[index] for index in group['curves']):
+                continue
+            painter.setPen(group['pen'])
+            painter.drawPath(self.groupPath(group))
@@ -0,0 +1,243 @@
+import collections
+import logging
+import math
+
+import numpy as np
+import pyqtgraph as pg
+import pyqtgraph.functions as fn
+from pyqtgraph import QtCore, QtGui
+
+from .ranges import nanrange, strided_sample
+
+logger = logging.getLogger(__name__)
+
+
+class PyramidImageItem(pg.GraphicsObject):
+    """Image item for very large (e.g. gigapixel) images.
+
+    Whereas ImageItem converts the whole array to a QImage, this item divides
+    the image into tiles at a pyramid of resolutions. Level k is the image
+    sub-sampled by 2**k. When painting, only the tiles which are visible in the
+    view are drawn, at the level matching the zoom. Tiles are built on demand,
+    so a np.memmap is only read where it is viewed, and kept in a LRU cache with
+    a memory budget.
+
+    It has the interface of pgx.ImageItem that ColorBarItem relies on: the
+    levels, lut and image attributes, setLevels, setLookupTable and the
+    sigImageChanged, sigLevelsChanged and sigLookupTableChanged signals. Its
+    image attribute is the coarsest level of the pyramid, so the range found by a
+    linked ColorBarItem is approximate unless a range_hint is given.
+
+    The image data is interpreted according to the imageAxisOrder config option,
+    like ImageItem.
+    """
+    sigImageChanged = QtCore.Signal()
+    sigLevelsChanged = QtCore.Signal()
+    sigLookupTableChanged = QtCore.Signal()
+
+    def __init__(self, image=None, tile_size=256, cache_bytes=2**28, coarsest_size=512, levels=None, lut=None,
+                 rect=None, **kwargs):
+        """
+        Args:
+            image (2D array): the full resolution data, e.g. a np.memmap.
+            tile_size (int): width and height of tiles, in pixels of their level.
+            cache_bytes (int): memory budget for cached tiles (raw and rendered).
+            coarsest_size (int): the coarsest level is the first with both
+                dimensions no greater than this.
+            levels, lut: as for ImageItem.
+            rect: passed on to setRect.
+            kwargs: passed on to setImage.
+        """
+        pg.GraphicsObject.__init__(self)
+        self.tile_size = tile_size
+        self.cache_bytes = cache_bytes
+        self.coarsest_size = coarsest_size
+        self.data = None
+        self.image = None
+        self.levels = None
+        self.lut = lut
+        self.range_hint = None
+        self.axisOrder = pg.getConfigOption('imageAxisOrder')
+        self.num_levels = 0
+        # Maps (level, tile row, tile column) to dict with 'raw' and 'qimage'.
+        self.tiles = collections.OrderedDict()
+        self.tiles_bytes = 0
+        if image is not None:
+            self.setImage(image, levels=levels, **kwargs)
+        elif levels is not None:
+            self.levels = np.asarray(levels)
+        if rect is not None:
+            self.setRect(rect)
+
+    def shape2d(self):
+        """Return (height, width) of full resolution image in display orientation."""
+        if self.data is None:
+            return 0, 0
+        if self.axisOrder == 'col-major':
+            return self.data.shape[1], self.data.shape[0]
+        return self.data.shape[:2]
+
+    def width(self):
+        return None if self.data is None else self.shape2d()[1]
+
+    def height(self):
+        return None if self.data is None else self.shape2d()[0]
+
+    def boundingRect(self):
+        height, width = self.shape2d()
+        return QtCore.QRectF(0, 0, width, height)
+
+    def setImage(self, image=None, autoLevels=True, levels=None, range_hint=None):
+        """Set the full resolution data.
+
+        Args:
+            image (2D array): no copy is made, and no data is read except for the
+                coarsest level and tiles as they are viewed.
+            autoLevels (bool): if True and levels is None, set levels from range_hint
+                or else the range of the coarsest level.
+            levels: as for ImageItem.
+            range_hint (min, max): as for pgx.ImageItem.setImage.
+        """
+        if image is None:
+            return
+        self.prepareGeometryChange()
+        self.data = image
+        self.range_hint = range_hint
+        height, width = self.shape2d()
+        self.num_levels = max(math.ceil(math.log2(max(height, width, 1) / self.coarsest_size)), 0) + 1
+        self.image = self.levelData(self.num_levels - 1)
+        self.clearTiles()
+        if levels is None and autoLevels:
+            if range_hint is None:
+                levels = nanrange(strided_sample(self.image, 2**16))
+            else:
+                levels = range_hint
+        if levels is not None:
+            self.setLevels(levels)
+        self.informViewBoundsChanged()
+        self.update()
+        self.sigImageChanged.emit()
+
+    def levelData(self, level, rows=slice(None), cols=slice(None)):
+        """Return data of pyramid level, in display orientation, for given rows and columns.
+
+        rows and columns are slices in level pixels (with step None). Only the
+        requested part is read.
+        """
+        step = 2**level
+        rows = slice(rows.start * step if rows.start is not None else None,
+                     rows.stop * step if rows.stop is not None else None, step)
+        cols = slice(cols.start * step if cols.start is not None else None,
+                     cols.stop * step if cols.stop is not None else None, step)
+        if self.axisOrder == 'col-major':
+            return np.asarray(self.data[cols, rows]).T
+        return np.asarray(self.data[rows, cols])
+
+    def setRect(self, *args):
+        """Set rectangle (x, y, w, h) the image occupies. Same arguments as ImageItem.setRect."""
+        if isinstance(args[0], (QtCore.QRectF, QtCore.QRect)):
+            rect = QtCore.QRectF(args[0])
+        else:
+            if hasattr(args[0], '__len__'):
+                args = args[0]
+            rect = QtCore.QRectF(*args)
+        height, width = self.shape2d()
+        tr = QtGui.QTransform()
+        tr.translate(rect.left(), rect.top())
+        tr.scale(rect.width() / (width or 1), rect.height() / (height or 1))
+        self.setTransform(tr)
+
+    def setLevels(self, levels, update=True, emit=True):
+        """Set [black, white] levels. Rendered tiles are discarded; raw tiles are kept."""
+        levels = np.asarray(levels)
+        emit = emit and (self.levels is None or not np.allclose(self.levels, levels))
+        self.levels = levels
+        if update:
+            self.updateImage()
+        if emit:
+            self.sigLevelsChanged.emit()
+
+    def setLookupTable(self, lut, update=True, emit=True):
+        self.lut = lut
+        if update:
+            self.updateImage()
+        if emit:
+            self.sigLookupTableChanged.emit()
+
+    def updateImage(self):
+        """Discard rendered tiles and repaint."""
+        for tile in self.tiles.values():
+            if tile['qimage'] is not None:
+                self.tiles_bytes -= tile['qimage'].sizeInBytes()
+                tile['qimage'] = None
+        self.update()
+
+    def clearTiles(self):
+        self.tiles.clear()
+        self.tiles_bytes = 0
+
+    def chooseLevel(self, transform):
+        """Return pyramid level for painting with given item-to-device transform."""
+        scale = min(math.hypot(transform.m11(), transform.m12()), math.hypot(transform.m21(), transform.m22()))
+        if scale <= 0:
+            return self.num_levels - 1
+        level = math.floor(math.log2(1 / scale))
+        return min(max(level, 0), self.num_levels - 1)
+
+    def getTile(self, level, row, col):
+        """Return (rendered QImage, (height, width) of tile in level pixels), using the cache."""
+        key = level, row, col
+        tile = self.tiles.get(key)
+        if tile is None:
+            ts = self.tile_size
+            raw = self.levelData(level, slice(row * ts, (row + 1) * ts), slice(col * ts, (col + 1) * ts))
+            tile = {'raw': raw, 'qimage': None}
+            self.tiles[key] = tile
+            self.tiles_bytes += raw.nbytes
+        else:
+            self.tiles.move_to_end(key)
+        if tile['qimage'] is None:
+            argb, alpha = fn.makeARGB(tile['raw'], lut=self.lut, levels=self.levels)
+            tile['qimage'] = fn.makeQImage(argb, alpha=alpha, copy=False, transpose=False)
+            self.tiles_bytes += tile['qimage'].sizeInBytes()
+        self.evictTiles(keep=key)
+        return tile['qimage'], tile['raw'].shape[:2]
+
+    def evictTiles(self, keep=None):
+        """Drop least recently used tiles until within memory budget."""
+        while self.tiles_bytes > self.cache_bytes and len(self.tiles) > 1:
+            key, tile = next(iter(self.tiles.items()))
+            if key == keep:
+                break
+            del self.tiles[key]
+            self.tiles_bytes -= tile['raw'].nbytes
+            if tile['qimage'] is not None:
+                self.tiles_bytes -= tile['qimage'].sizeInBytes()
+
+    def visibleTiles(self, level, rect):
+        """Return list of (row, col) of tiles at level intersecting rect (local coordinates)."""
+        height, width = self.shape2d()
+        rect = rect.intersected(self.boundingRect())
+        if rect.isEmpty():
+            return []
+        span = self.tile_size * 2**level
+        rows = range(max(int(rect.top() // span), 0), min(math.ceil(rect.bottom() / span), math.ceil(height / span)))
+        cols = range(max(int(rect.left() // span), 0), min(math.ceil(rect.right() / span), math.ceil(width / span)))
+        return [(row, col) for row in rows for col in cols]
+
+    def paint(self, painter, *args):
+        if self.data is None or self.levels is None:
+            return
+        level = self.chooseLevel(painter.transform())
+        view_rect = self.viewRect()
+        if view_rect is None:
+            view_rect = self.boundingRect()
+        span = self.tile_size * 2**level
+        for row, col in self.visibleTiles(level, view_rect):
+            qimage, (rows, cols) = self.getTile(level, row, col)
+            step = 2**level
+            # Last row/column of level pixels may cover less than step full resolution pixels.
+            height, width = self.shape2d()
+            target = QtCore.QRectF(col * span, row * span, min(cols * step, width - col * span),
+                                   min(rows * step, height - row * span))
+            painter.drawImage(target, qimage, QtCore.QRectF(0, 0, cols, rows))
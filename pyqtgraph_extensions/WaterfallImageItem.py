@@ -0,0 +1,223 @@
+import logging
+
+import numpy as np
+import pyqtgraph as pg
+import pyqtgraph.functions as fn
+from pyqtgraph import QtCore, QtGui
+
+from .ranges import RangeIndex, nanrange
+
+logger = logging.getLogger(__name__)
+
+
+class WaterfallImageItem(pg.GraphicsObject):
+    """Scrolling image of a history of rows (e.g. a spectrum or projection logged over time).
+
+    Rows are held in a preallocated circular buffer of fixed capacity, along with
+    a persistent ARGB buffer of the rendered rows. Appending a row writes and
+    renders only that row, and moves the time axis rectangle, so the cost per
+    row doesn't depend on the length of the history. The buffer is painted in
+    two parts starting from the oldest row, rather than being rolled.
+
+    Time is assumed to be uniformly sampled, as for axes_to_rect.
+
+    With orientation 'horizontal', rows run along the x axis and time increases
+    along the y axis. With 'vertical', time runs along the x axis and rows along y.
+    """
+
+    def __init__(self, capacity=1000, orientation='horizontal', lut=None, levels=None, autolevel_tolerance=0.05):
+        """
+        Args:
+            capacity (int): number of rows kept.
+            orientation (str): 'horizontal' or 'vertical'.
+            lut: lookup table, as for ImageItem.
+            levels: [black, white] levels. If None, levels follow the range of the
+                rows in the buffer.
+            autolevel_tolerance (float): with automatic levels, the buffer is only
+                re-rendered when the range changes by more than this fraction of
+                its span.
+        """
+        pg.GraphicsObject.__init__(self)
+        assert orientation in ('horizontal', 'vertical')
+        self.capacity = capacity
+        self.orientation = orientation
+        self.lut = lut
+        self.levels = None if levels is None else np.asarray(levels, dtype=float)
+        self.auto_levels = levels is None
+        self.autolevel_tolerance = autolevel_tolerance
+        self.row_ranges = RangeIndex()
+        self.axis = None
+        self.data = None
+        self.argb = None
+        self.qimage = None
+        self.times = np.zeros(capacity)
+        # Slot to write next, and number of rows held.
+        self.head = 0
+        self.count = 0
+
+    def allocate(self, width):
+        self.data = np.full((self.capacity, width), np.nan)
+        self.argb = np.zeros((self.capacity, width, 4), np.ubyte)
+        self.times = np.zeros(self.capacity)
+        self.head = 0
+        self.count = 0
+        self.row_ranges.clear()
+        self.prepareGeometryChange()
+
+    def setCapacity(self, capacity):
+        """Change capacity, discarding the history."""
+        self.capacity = capacity
+        width = None if self.data is None else self.data.shape[1]
+        if width is not None:
+            self.allocate(width)
+        self.update()
+
+    def setAxis(self, axis):
+        """Set positions of row elements (uniformly sampled), e.g. the x axis of a projection."""
+        self.axis = np.asarray(axis).squeeze()
+        self.updateTransform()
+
+    def setLookupTable(self, lut):
+        self.lut = lut
+        self.renderAll()
+
+    def setLevels(self, levels):
+        """Set [black, white] levels, or None for automatic levels."""
+        self.auto_levels = levels is None
+        self.levels = None if levels is None else np.asarray(levels, dtype=float)
+        self.updateLevels()
+        self.renderAll()
+
+    def clear(self):
+        if self.data is not None:
+            self.allocate(self.data.shape[1])
+        self.update()
+
+    def append(self, row, time):
+        """Append a row measured at time. O(row length)."""
+        row = np.asarray(row, dtype=float).ravel()
+        if self.data is None or self.data.shape[1] != len(row):
+            self.allocate(len(row))
+        slot = self.head
+        self.data[slot] = row
+        self.times[slot] = time
+        self.row_ranges.set(slot, *nanrange(row))
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        if not self.updateLevels():
+            self.renderRows(slice(slot, slot + 1))
+        self.updateTransform()
+
+    def setData(self, times, rows):
+        """Replace history with rows (sequence of rows, oldest first) at times.
+
+        Only the last capacity rows are kept - call setCapacity first to keep more.
+        """
+        rows = np.asarray(rows, dtype=float)
+        times = np.asarray(times).ravel()
+        assert rows.ndim == 2 and len(times) == len(rows)
+        rows = rows[-self.capacity:]
+        times = times[-self.capacity:]
+        self.allocate(rows.shape[1])
+        num = len(rows)
+        self.data[:num] = rows
+        self.times[:num] = times
+        for slot in range(num):
+            self.row_ranges.set(slot, *nanrange(rows[slot]))
+        self.head = num % self.capacity
+        self.count = num
+        self.updateLevels()
+        self.renderAll()
+        self.updateTransform()
+
+    def orderedSlots(self):
+        """Return slot indices from oldest to newest."""
+        start = self.head if self.count == self.capacity else 0
+        return (start + np.arange(self.count)) % self.capacity
+
+    def orderedData(self):
+        """Return (times, rows) from oldest to newest."""
+        slots = self.orderedSlots()
+        return self.times[slots], self.data[slots]
+
+    def updateLevels(self):
+        """Update automatic levels, re-rendering if they change. Returns True if re-rendered."""
+        if not self.auto_levels or len(self.row_ranges) == 0:
+            return False
+        mn, mx = self.row_ranges.min(), self.row_ranges.max()
+        if mn == mx:
+            mn, mx = mn - 0.5, mx + 0.5
+        if self.levels is not None:
+            span = self.levels[1] - self.levels[0]
+            if abs(mn - self.levels[0]) <= self.autolevel_tolerance * span and abs(
+                    mx - self.levels[1]) <= self.autolevel_tolerance * span:
+                return False
+        self.levels = np.array([mn, mx])
+        self.renderAll()
+        return True
+
+    def renderRows(self, slots):
+        if self.levels is None:
+            return
+        argb, alpha = fn.makeARGB(self.data[slots], lut=self.lut, levels=self.levels, useRGBA=False)
+        if not alpha:
+            argb[..., 3] = 255
+        self.argb[slots] = argb
+        # Cheap - wraps the same buffer. A fresh QImage ensures painters don't use a
+        # cached copy of the old contents.
+        self.qimage = fn.makeQImage(self.argb, alpha=True, copy=False, transpose=False)
+        self.update()
+
+    def renderAll(self):
+        if self.data is None:
+            return
+        self.renderRows(slice(None))
+
+    def updateTransform(self):
+        """Map (row element, row number from oldest) to (x, time) or (time, y)."""
+        if self.data is None or self.count == 0:
+            return
+        # Oldest and newest slots, rather than ordering the whole buffer.
+        t0 = self.times[self.head if self.count == self.capacity else 0]
+        t1 = self.times[(self.head - 1) % self.capacity]
+        dt = (t1 - t0) / (self.count - 1) if self.count > 1 else 1
+        if dt == 0:
+            dt = 1
+        if self.axis is not None and len(self.axis) > 1:
+            a0 = self.axis[0]
+            da = self.axis[1] - self.axis[0]
+        else:
+            a0 = 0
+            da = 1
+        tr = QtGui.QTransform()
+        if self.orientation == 'horizontal':
+            tr.translate(a0 - da / 2, t0 - dt / 2)
+            tr.scale(da, dt)
+        else:
+            tr.translate(t0 - dt / 2, a0 - da / 2)
+            tr.scale(dt, da)
+        self.setTransform(tr)
+
+    def boundingRect(self):
+        if self.data is None:
+            return QtCore.QRectF()
+        width = self.data.shape[1]
+        if self.orientation == 'horizontal':
+            return QtCore.QRectF(0, 0, width, self.count)
+        return QtCore.QRectF(0, 0, self.count, width)
+
+    def paint(self, painter, *args):
+        if self.qimage is None or self.count == 0:
+            return
+        width = self.data.shape[1]
+        if self.orientation == 'vertical':
+            painter.setTransform(QtGui.QTransform(0, 1, 1, 0, 0, 0), True)
+        if self.count < self.capacity:
+            parts = [(0, self.count, 0)]
+        else:
+            # Oldest rows are from head onwards.
+            parts = [(self.head, self.capacity, 0), (0, self.head, self.capacity - self.head)]
+        for start, stop, position in parts:
+            if stop > start:
+                painter.drawImage(QtCore.QRectF(0, position, width, stop - start), self.qimage,
+                                  QtCore.QRectF(0, start, width, stop - start))
@@ -1,19 +1,84 @@
 """Extensions and improvements to pyqtgraph.
 """
+import importlib
+import importlib.util
 import os,sys
+import types
 import pyqtgraph as pg
 from pyqtgraph import QtGui,QtCore,QtWidgets
-import pyqtgraph.exporters as pgex
-from scipy.interpolate import interp1d
 from pyqtgraph.graphicsItems.GradientEditorItem import Gradients
 import numpy as np
-import subprocess
 
 from .AxisItem import *
 from .misc import *
-from .AlignedPlot import *
-# Backwards compatibility.
-AlignedPlotItem=AlignedPlot
+from .colormaps import *
+from .ranges import *
+from .WaterfallImageItem import *
+from .MultiCurveItem import *
+from .shared_frames import *
+from .streams import *
+from .range_sync import *
+
+# Names whose modules are imported on first access (see __getattr__), to speed up
+# import. Maps name to (module, attribute of module or None for the module itself).
+_lazy_imports = {
+    'AlignedPlot': ('.AlignedPlot', 'AlignedPlot'),
+    # Backwards compatibility.
+    'AlignedPlotItem': ('.AlignedPlot', 'AlignedPlot'),
+    'PyramidImageItem': ('.PyramidImageItem', 'PyramidImageItem'),
+    'GraphicsLayout': ('.GraphicsLayout', 'GraphicsLayout'),
+    'GraphicsLayoutWidget': ('.GraphicsLayout', 'GraphicsLayoutWidget'),
+    'axes_to_rect': ('.functions', 'axes_to_rect'),
+    'calc_image_rect': ('.functions', 'calc_image_rect'),
+    'export': ('.exporting', 'export'),
+    'export_item': ('.exporting', 'export_item'),
+    'export_batch': ('.exporting', 'export_batch'),
+    'export_bytes': ('.exporting', 'export_bytes'),
+    'export_to': ('.exporting', 'export_to'),
+    'ExportCache': ('.export_cache', 'ExportCache'),
+    'scene_fingerprint': ('.export_cache', 'scene_fingerprint'),
+    'UncacheableError': ('.export_cache', 'UncacheableError'),
+    'ExportSpec': ('.exporting', 'ExportSpec'),
+    'NativeExporter': ('.exporting', 'NativeExporter'),
+    'TiledImageExporter': ('.tiled_export', 'TiledImageExporter'),
+    'export_tiled': ('.tiled_export', 'export_tiled'),
+    'image_axes': ('.functions', 'image_axes'),
+    'image_axes_cbar': ('.functions', 'image_axes_cbar'),
+    'pgex': ('pyqtgraph.exporters', None),
+}
+
+def __getattr__(name):
+    try:
+        module_name, attribute = _lazy_imports[name]
+    except KeyError:
+        raise AttributeError('module %r has no attribute %r'%(__name__,name)) from None
+    module=importlib.import_module(module_name,__name__)
+    # Bind every lazy name whose module is now loaded.
+    for key,(key_module_name,key_attribute) in _lazy_imports.items():
+        key_module=sys.modules.get(importlib.util.resolve_name(key_module_name,__name__))
+        # Modules part way through their own import don't define their attributes yet.
+        if key_module is not None and (key_attribute is None or hasattr(key_module,key_attribute)):
+            globals()[key]=key_module if key_attribute is None else getattr(key_module,key_attribute)
+    return module if attribute is None else getattr(module,attribute)
+
+class _Package(types.ModuleType):
+    """Class of this package, which keeps lazy names bound to their classes.
+
+    Importing a submodule (e.g. pyqtgraph_extensions.AlignedPlot) binds it as an
+    attribute of the package, which would hide the class of the same name from
+    __getattr__. The class is bound instead.
+    """
+    def __setattr__(self,name,value):
+        lazy=_lazy_imports.get(name)
+        if (lazy is not None and lazy[1] is not None and isinstance(value,types.ModuleType)
+                and value.__name__==importlib.util.resolve_name(lazy[0],__name__) and hasattr(value,lazy[1])):
+            value=getattr(value,lazy[1])
+        types.ModuleType.__setattr__(self,name,value)
+
+sys.modules[__name__].__class__=_Package
+
+def __dir__():
+    return sorted(set(globals())|set(_lazy_imports))
 
 # Bring line styles into the namespace for convenience
 for v in ('SolidLine','DashLine','DashDotLine','DashDotDotLine','DotLine'):
@@ -88,21 +153,6 @@ tableau20=[ (31, 119, 180),
             (23, 190, 207),
             (158, 218, 229)] 
             
-def get_colormap_lut(name='flame'):
-    """Get lookup table from one of pyqtgraph's gradient editor's presets.
-    
-    Result is suitable for ImageItem.setLookupTable. Gradient names listed in
-    Gradients.keys(). Not sure how 'hsv' mode works.
-    """
-    gradient=Gradients[name]
-    ticks=gradient['ticks']
-    v=np.array([tick[0] for tick in ticks])
-    c=np.array([tick[1] for tick in ticks])
-    #print v.shape,c.shape
-    n=256.
-    vu=np.arange(n)/n
-    return interp1d(v,c,axis=0)(vu)
-    
 def add_right_axis(plti,pen=None,label=None,enableMenu=False):
     """Add right-hand axis to pg.PlotItem.
     Following examples/MultiplePlotAxes. Returns a pyqtgraph_ex.ViewBox which is
@@ -174,93 +224,6 @@ def addLegend(plot,**kwargs):
     plot.legend.setParentItem(plot.vb)
     return plot.legend
 
-# todo: option to remove margins of GraphicsLayouts:
-# Necessary for bitmap output (PDF is cropped somehow)
-# See http://stackoverflow.com/questions/27092164/margins-in-pyqtgraphs-graphicslayout
-# and
-# http://comments.gmane.org/gmane.comp.python.pyqtgraph/234
-def export(o,filename,fmt='png',mkdir=False,fmt_opts={},exporter_params={}):
-    """Export widget/item as file.
-    
-    The purposes of this function are to (i) make exporting a one liner, 
-    (ii) automatically handle some of the finicky bug-like limitations of Pyqtgraph's
-    exporters, (iii) provide post-conversion using external tools.
-    
-    PDF export is accomplished by SVG export followed by conversion using Inkscape.
-    The coordinates used in the SVG file seem to be pixels. Inkscape's export
-    to PDF seems to use 90 pixels/inch (the export-dpi option only applies to PNG).
-    So use this to choose the size in pixels to achieve a desired PDF size in 
-    physical units.
-    
-    Known limitations:
-        SVG export (and all derived formats such as PDF) have wonky text alignment
-        unless the font size if 6 points
-        Lines with infinite or NaN values, which display fine on the screen, do
-        not appear in SVG output.
-    
-    Args:
-        fmt (str): 'png','tif','pdf','svg','svg-png','svg-pdf-png'
-    """
-    fmt=fmt.lower()
-    dir=os.path.dirname(filename)
-    if len(dir)>0:
-        if not os.path.isdir(dir):
-            if mkdir:
-                os_ex.mkdir(dir)
-            else:
-                raise ValueError('Path %s doesn''t exist'%dir)
-   
-    if isinstance(o,pg.GraphicsLayoutWidget) or isinstance(o,GraphicsLayoutWidget):
-        # Ensures resizing is done (and maybe other things - but without this
-        # it can be wrong if run in a script
-        o.show()
-        pg.QtWidgets.QApplication.processEvents()
-        o.repaint() # this is crucial - something about executing code rather than
-        # waiting for the user means this doesn't get called and the layout can
-        # be wrong
-        pg.QtWidgets.QApplication.processEvents()
-        # Passing the QGraphicsScene to the exporter ensures that all items in the
-        # scene being exported
-        item=o.scene()
-    elif isinstance(o,pg.PlotWidget):
-        item=o.getPlotItem()
-    elif isinstance(o,pg.GraphicsItem):
-        item=o
-    else:
-        raise ValueError('Don''t know how to export it')
-    if fmt in ('png','tif'):
-        exporter=pgex.ImageExporter(item)
-        for key,value in exporter_params.items():
-            exporter.parameters()[key]=value
-        exporter.export(filename+'.'+fmt)
-    elif fmt=='svg':
-        pgex.SVGExporter(item).export(filename+'.'+fmt)
-    elif fmt in ('svg','pdf','eps','svg-png','svg-pdf-png'):
-        # generate svg
-        exporter=pgex.SVGExporter(item)
-        exporter.export(filename+'.'+'svg') 
-        # Convert from svg to required
-        def convert(final_fmt):
-            subprocess.call(['inkscape','--export-'+final_fmt+'='+filename+'.'+final_fmt,
-                '--export-area-drawing',filename+'.svg','--export-dpi=300'])
-            if final_fmt=='pdf':
-                if not fmt_opts.get('interpolate',False):
-                    # Stop ugly interpolation of bitmaps
-                    with open(filename+'.'+final_fmt,"rb") as f:
-                        data = f.read()
-                    data=data.replace(b'Interpolate true',b'Interpolate false')
-                    with open(filename+'.'+final_fmt,"wb") as f:
-                        f.write(data)
-        if fmt in ('pdf','eps'):
-            convert(fmt)
-        elif fmt=='svg-png':
-            convert('png')
-        elif fmt=='svg-pdf-png':
-            convert('png')
-            convert('pdf')
-    else:
-        raise ValueError('Unknown format %s'%fmt)
-            
 def copy_to_clipboard(o,exporters=[]):
     """Copy figure/item to clipboard.
     
@@ -276,6 +239,8 @@ def copy_to_clipboard(o,exporters=[]):
     inside ImageExporter doesn't actually make a copy - just keeps a reference. So
     this function keeps a list of exporters to prevent them being collected.
     """
+    import pyqtgraph.exporters as pgex
+    from .GraphicsLayout import GraphicsLayoutWidget
     if isinstance(o,pg.GraphicsLayoutWidget) or isinstance(o,GraphicsLayoutWidget):
         item=o.scene()
     else:
@@ -336,6 +301,7 @@ def cornertext(text,parent,corner=(0,0),**kwargs):
     # Convert parent to a pg.ViewBox
     if isinstance(parent,pg.PlotWidget):
         parent=parent.getPlotItem()
+    from .AlignedPlot import AlignedPlot
     if isinstance(parent,pg.PlotItem) or isinstance(parent,AlignedPlot):
         parent=parent.getViewBox()
     # Use the GraphicsWidgetAnchor base class of
@@ -369,9 +335,6 @@ class Qtbot:
     def addWidget(self,widget):
         self.widgets.append(widget)
 
-from .GraphicsLayout import *
-from .functions import *
-
 def get_pyinstaller_hook_dirs():
     return os.path.dirname(os.path.abspath(__file__))
 
@@ -405,3 +368,7 @@ def get_pyinstaller_hook_dirs():
 #         self.setRect(rect)
 #     def sizeHint(self,which,constraint):
 #         return QtCore.QSizeF(0,0)
+
+# Star imports get the lazy names too (importing their modules), as they did when
+# they were imported eagerly.
+__all__=sorted(set(name for name in globals() if not name.startswith('_'))|set(_lazy_imports))
@@ -0,0 +1,94 @@
+"""Registry of named colormaps and the lookup tables built from them.
+
+A colormap is registered either as control points (positions in [0, 1] and
+colors), like pyqtgraph's gradient editor presets which are registered here
+under their own names, or with a loader returning a table of uniformly spaced
+colors, which is only called the first time the colormap is used. Lookup tables
+are built once per (name, number of entries) with np.interp and memoised.
+get_colormap_lut returns a copy of the table, which is cheap; callers which only
+read it (e.g. for every image in a figure) can share the memoised table with
+get_colormap_lut_shared.
+"""
+import numpy as np
+from pyqtgraph.graphicsItems.GradientEditorItem import Gradients
+
+_colormaps = {}
+_luts = {}
+
+
+def register_colormap(name, colors=None, positions=None, loader=None):
+    """Register a colormap.
+
+    Args:
+        name (str): name for get_colormap_lut. Replaces any existing colormap of
+            that name.
+        colors (sequence of RGB or RGBA tuples): control point colors, 0-255.
+        positions (sequence of float): positions of the control points in [0, 1].
+            If None, the colors are uniformly spaced from 0 to 1.
+        loader (callable): alternative to colors - called with no arguments on
+            first use, returns colors.
+    """
+    assert (colors is None) != (loader is None)
+    _colormaps[name] = dict(colors=colors, positions=positions, loader=loader)
+    for key in [key for key in _luts if key[0] == name]:
+        del _luts[key]
+
+
+def colormap_names():
+    return list(_colormaps)
+
+
+def get_colormap_lut(name='flame', num=256):
+    """Get lookup table for a registered colormap.
+
+    Result is suitable for ImageItem.setLookupTable. Colormaps include pyqtgraph's
+    gradient editor presets (listed in Gradients.keys(); 'hsv' mode is interpolated
+    as rgb) and those registered with register_colormap.
+
+    Args:
+        name (str): colormap name.
+        num (int): number of entries e.g. 256, or 4096 or 65536 for integer images.
+
+    Returns:
+        num x 3 or num x 4 float array with values 0-255, which the caller may modify.
+    """
+    return get_colormap_lut_shared(name, num).copy()
+
+
+def get_colormap_lut_shared(name='flame', num=256):
+    """As get_colormap_lut, but return the memoised table without copying it.
+
+    The table is shared between callers, so is read-only.
+    """
+    key = name, num
+    try:
+        return _luts[key]
+    except KeyError:
+        pass
+    colormap = _colormaps[name]
+    colors = colormap['colors']
+    if colors is None:
+        colors = colormap['colors'] = colormap['loader']()
+    colors = np.asarray(colors, dtype=float)
+    positions = colormap['positions']
+    if positions is None:
+        positions = np.linspace(0, 1, len(colors))
+        x = np.linspace(0, 1, num)
+    else:
+        # As pyqtgraph's gradient presets always have, sample at i/num so that the
+        # 256 entry tables are unchanged from earlier versions.
+        x = np.arange(num) / num
+    positions = np.asarray(positions, dtype=float)
+    order = np.argsort(positions, kind='stable')
+    positions = positions[order]
+    colors = colors[order]
+    lut = np.empty((num, colors.shape[1]))
+    for channel in range(colors.shape[1]):
+        lut[:, channel] = np.interp(x, positions, colors[:, channel])
+    lut.flags.writeable = False
+    _luts[key] = lut
+    return lut
+
+
+for _name, _gradient in Gradients.items():
+    register_colormap(_name, [tick[1] for tick in _gradient['ticks']], [tick[0] for tick in _gradient['ticks']])
@@ -0,0 +1,154 @@
+"""Downsampling of long curves for display.
+
+Used by PlotDataItem. pyqtgraph's 'peak' downsampling reduces every visible
+sample on every redraw, which dominates panning and zooming of curves with many
+millions of points. Here each curve gets a DecimationPyramid - the minimum and
+maximum of blocks of samples at power of two block sizes - built once per data
+set, so the cost of a redraw is proportional to the number of pixels rather
+than samples.
+
+Also provides largest triangle three buckets (LTTB) downsampling, which picks
+actual samples that preserve the visual shape of the curve.
+"""
+import math
+
+import numpy as np
+
+DOWNSAMPLE_MODES = ('subsample', 'mean', 'peak', 'lttb')
+
+
+class DecimationPyramid:
+    """Minimum and maximum of y over aligned blocks of 2**k samples, for k >= min_level.
+
+    Level k has N // 2**k blocks (a trailing partial block is reduced on the
+    fly). The pyramid takes about 2 * N / 2**min_level values of memory and O(N)
+    time to build. NaNs are ignored.
+    """
+
+    def __init__(self, y, min_level=3):
+        self.y = y
+        self.min_level = min_level
+        self.levels = {}
+        num = len(y) >> min_level
+        if num == 0:
+            return
+        blocks = y[:num << min_level].reshape(num, 1 << min_level)
+        mins = np.fmin.reduce(blocks, axis=1)
+        maxs = np.fmax.reduce(blocks, axis=1)
+        level = min_level
+        while True:
+            self.levels[level] = mins, maxs
+            num = len(mins) // 2
+            if num == 0:
+                break
+            mins = np.fmin(mins[:2 * num:2], mins[1:2 * num:2])
+            maxs = np.fmax(maxs[:2 * num:2], maxs[1:2 * num:2])
+            level += 1
+
+    @property
+    def nbytes(self):
+        return sum(mins.nbytes + maxs.nbytes for mins, maxs in self.levels.values())
+
+    def minmax(self, start, stop, level):
+        """Return (block starts, mins, maxs) of blocks of 2**level samples covering y[start:stop].
+
+        start and stop are extended to block boundaries.
+        """
+        size = 1 << level
+        num = len(self.y)
+        first = start >> level
+        last = min(-(-stop // size), -(-num // size))
+        if level < self.min_level or level not in self.levels:
+            # Finer than pyramid (only done for few samples), or coarser than the coarsest level.
+            y = self.y[first * size:last * size]
+            full = len(y) // size
+            mins = np.fmin.reduce(y[:full * size].reshape(full, size), axis=1)
+            maxs = np.fmax.reduce(y[:full * size].reshape(full, size), axis=1)
+        else:
+            mins, maxs = self.levels[level]
+            full = min(last, len(mins)) - first
+            mins = mins[first:first + full]
+            maxs = maxs[first:first + full]
+        if first + full < last:
+            # Trailing partial block.
+            tail = self.y[(first + full) * size:last * size]
+            mins = np.append(mins, np.fmin.reduce(tail))
+            maxs = np.append(maxs, np.fmax.reduce(tail))
+        return np.arange(first, first + len(mins)) * size, mins, maxs
+
+    def peak(self, x, start, stop, ds):
+        """Return (x, y) of saw wave following max and min of y[start:stop] over about ds samples.
+
+        As for pyqtgraph's 'peak' downsampling, each block contributes its max then
+        its min, at the x of the block centre.
+        """
+        level = max(int(math.log2(ds)), 0)
+        if self.levels:
+            level = min(level, max(self.levels))
+        starts, mins, maxs = self.minmax(start, stop, level)
+        centres = np.minimum(starts + (1 << level) // 2, len(x) - 1)
+        xd = np.repeat(x[centres], 2)
+        yd = np.empty(2 * len(mins), dtype=np.result_type(mins, float))
+        yd[0::2] = maxs
+        yd[1::2] = mins
+        return xd, yd
+
+    def lttb(self, x, start, stop, ds):
+        """Return (x, y) from LTTB downsampling of x[start:stop], y[start:stop] by factor ds.
+
+        To bound the cost, LTTB is applied to the saw wave of a pyramid level with
+        blocks about ds / 8 long rather than to every sample.
+        """
+        num_out = max((stop - start) // ds, 3)
+        if ds >= 16:
+            xs, ys = self.peak(x, start, stop, ds / 8)
+        else:
+            xs = x[start:stop]
+            ys = self.y[start:stop]
+        indices = lttb(xs, ys, num_out)
+        return xs[indices], ys[indices]
+
+
+def lttb(x, y, num_out):
+    """Return indices of num_out points chosen by largest triangle three buckets.
+
+    The first and last points are always kept. The rest are divided into num_out - 2
+    buckets, and from each the point making the largest triangle with the point
+    chosen from the previous bucket and the mean of the next bucket is chosen.
+    Points with non-finite coordinates are never chosen.
+
+    Reference: S. Steinarsson, "Downsampling Time Series for Visual Representation",
+    MSc thesis, University of Iceland (2013).
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    finite = np.isfinite(x) & np.isfinite(y)
+    if not finite.all():
+        kept = np.flatnonzero(finite)
+        return kept[lttb(x[kept], y[kept], num_out)]
+    num = len(x)
+    if num_out >= num or num_out < 3:
+        return np.arange(num)
+    edges = np.linspace(1, num - 1, num_out - 1).astype(int)
+    counts = np.diff(edges)
+    # Mean of each bucket, plus the last point as the final 'next bucket'.
+    mean_x = np.append(np.add.reduceat(x[:-1], edges[:-1]) / counts, x[-1])
+    mean_y = np.append(np.add.reduceat(y[:-1], edges[:-1]) / counts, y[-1])
+    # Buckets as rows of a matrix of points (x, y, 1), short buckets padded by
+    # repeating their last point. Twice the triangle area is then
+    # |points @ (ay - my, mx - ax, ax*my - mx*ay)| for previous point a and next
+    # bucket mean m, so each step of the (inherently sequential) loop is one
+    # small matrix product.
+    rows = np.minimum(edges[:-1, None] + np.arange(counts.max()), edges[1:, None] - 1)
+    points = np.stack((x[rows], y[rows], np.ones(rows.shape)), axis=-1)
+    indices = np.empty(num_out, dtype=np.intp)
+    indices[0] = 0
+    indices[-1] = num - 1
+    ax, ay = x[0], y[0]
+    for bucket in range(num_out - 2):
+        mx, my = mean_x[bucket + 1], mean_y[bucket + 1]
+        area = np.abs(points[bucket] @ (ay - my, mx - ax, ax * my - mx * ay))
+        column = area.argmax()
+        indices[bucket + 1] = rows[bucket, column]
+        ax, ay = points[bucket, column, :2]
+    return indices
@@ -0,0 +1,230 @@
+"""Cache of exported files, keyed by a fingerprint of the figure.
+
+Used by export and export_bytes when given a cache. The fingerprint is a hash of
+what determines the rendered output - for every item in the scene (or under the
+exported item) its type, visibility, transform and bounds, its data (e.g. curve
+samples, image arrays, levels and lookup tables), style (pens, brushes, opts
+dicts) and text, plus the application font and the export format and options.
+If a file with the same fingerprint has been exported before, it is copied from
+the cache instead of being rendered.
+
+Values of types the fingerprint doesn't know how to hash can't be fingerprinted
+safely (a change to them would be missed), so they raise UncacheableError, and
+export and export_bytes render such figures without the cache.
+
+Artefacts are files in a cache directory, named by fingerprint. The directory is
+kept under a size limit by deleting the least recently used files, where use is
+recorded in the modification time.
+"""
+import enum
+import hashlib
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pyqtgraph as pg
+from pyqtgraph import QtCore, QtGui, QtWidgets
+
+# Attributes of items which hold their data, style or text. Callables (e.g. the
+# data method of QGraphicsItem) are skipped.
+FINGERPRINT_ATTRIBUTES = ('xData', 'yData', 'image', 'levels', 'lut', 'data', 'xs', 'ys', 'pens', 'visible', 'opts',
+                          'state', 'text', 'labelText', 'labelUnits', 'labelUnitPrefix', 'labelStyle', 'style', 'range',
+                          'orientation', 'tz', 'epoch_offset', 'paintMode')
+# Keys of opts dicts which don't affect rendering (e.g. the tooltip formatter of
+# ScatterPlotItem).
+IGNORED_OPTS = ('tip',)
+
+
+class UncacheableError(ValueError):
+    """Raised when a figure holds a value the fingerprint can't hash."""
+
+
+def hash_path(hash, path):
+    elements = [path.elementAt(n) for n in range(path.elementCount())]
+    hash_value(hash, ('QPainterPath', path.fillRule(), [(element.type, element.x, element.y) for element in elements]))
+
+
+def hash_value(hash, value):
+    """Update hash with a value, recursing into containers and arrays.
+
+    Objects of other types raise UncacheableError - their repr may contain memory
+    addresses which would differ between runs, and their type alone would miss
+    changes to them.
+    """
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        hash.update(b'%s:%r;' % (type(value).__name__.encode(), value))
+    elif isinstance(value, np.ndarray):
+        hash.update(b'array:%s:%r;' % (value.dtype.str.encode(), value.shape))
+        if value.dtype.hasobject:
+            for element in value.ravel().tolist():
+                hash_value(hash, element)
+        else:
+            hash.update(np.ascontiguousarray(value).view(np.uint8).ravel())
+    elif isinstance(value, enum.Enum):
+        # Including Qt's enums e.g. QPainter.CompositionMode.
+        hash_value(hash, ('enum', type(value).__qualname__, value.value))
+    elif isinstance(value, np.generic):
+        hash_value(hash, value.item())
+    elif isinstance(value, dict):
+        hash.update(b'dict:%d;' % len(value))
+        for key in sorted(value, key=str):
+            hash_value(hash, key)
+            hash_value(hash, value[key])
+    elif isinstance(value, (list, tuple)):
+        hash.update(b'list:%d;' % len(value))
+        for element in value:
+            hash_value(hash, element)
+    elif isinstance(value, QtGui.QPen):
+        hash_value(hash, ('QPen', value.color().rgba(), value.widthF(), str(value.style()), value.isCosmetic(),
+                          str(value.capStyle()), str(value.joinStyle()), value.dashPattern()))
+    elif isinstance(value, QtGui.QBrush):
+        hash_value(hash, ('QBrush', value.color().rgba(), str(value.style())))
+    elif isinstance(value, QtGui.QColor):
+        hash_value(hash, ('QColor', value.rgba()))
+    elif isinstance(value, QtGui.QFont):
+        hash_value(hash, ('QFont', value.toString()))
+    elif isinstance(value, (QtCore.QRectF, QtCore.QRect)):
+        hash_value(hash, ('QRect', value.x(), value.y(), value.width(), value.height()))
+    elif isinstance(value, (QtCore.QPointF, QtCore.QPoint)):
+        hash_value(hash, ('QPoint', value.x(), value.y()))
+    elif isinstance(value, QtGui.QTransform):
+        hash_value(hash, ('QTransform', value.m11(), value.m12(), value.m13(), value.m21(), value.m22(),
+                          value.m23(), value.m31(), value.m32(), value.m33()))
+    elif isinstance(value, QtGui.QPainterPath):
+        hash_path(hash, value)
+    elif isinstance(value, pg.ColorMap):
+        hash_value(hash, ('ColorMap', value.pos, value.color, value.mapping_mode))
+    else:
+        raise UncacheableError('Can\'t fingerprint %s' % type(value).__qualname__)
+
+
+def item_state(item):
+    """Return what determines the rendering of a graphics item (not its children), for hashing."""
+    state = [type(item).__module__, type(item).__qualname__, item.isVisible(), item.zValue(), item.opacity(),
+             item.sceneTransform(), item.boundingRect()]
+    for name in FINGERPRINT_ATTRIBUTES:
+        value = getattr(item, name, None)
+        if value is not None and not callable(value):
+            if name == 'opts' and isinstance(value, dict):
+                value = {key: option for key, option in value.items() if key not in IGNORED_OPTS}
+            state.append((name, value))
+    if isinstance(item, QtWidgets.QGraphicsTextItem):
+        state.append(item.toHtml())
+    if isinstance(item, QtWidgets.QAbstractGraphicsShapeItem):
+        state += [item.pen(), item.brush()]
+    if isinstance(item, QtWidgets.QGraphicsPathItem):
+        state.append(item.path())
+    return state
+
+
+def scene_fingerprint(item, source_rect, *options):
+    """Return hex digest fingerprinting the rendering of an item or scene, and options (e.g. format).
+
+    Args:
+        item: scene or graphics item, as for pyqtgraph's exporters.
+        source_rect (QRectF): the exported rectangle of the scene.
+        options: anything else determining the output e.g. format and its options.
+
+    Raises UncacheableError if they hold a value which can't be fingerprinted.
+    """
+    # Items may defer work until painted (e.g. ViewBox auto-ranging), as done when rendering.
+    scene = item if isinstance(item, QtWidgets.QGraphicsScene) else item.scene()
+    if hasattr(scene, 'prepareForPaint'):
+        scene.prepareForPaint()
+    hash = hashlib.blake2b(digest_size=20)
+    hash_value(hash, (source_rect, QtWidgets.QApplication.font(), options))
+    if isinstance(item, QtWidgets.QGraphicsScene):
+        hash_value(hash, (item.backgroundBrush(), [view.backgroundBrush() for view in item.views()]))
+        items = item.items(QtCore.Qt.SortOrder.AscendingOrder)
+    else:
+        items = [item]
+        for child in items:
+            items.extend(child.childItems())
+    for child in items:
+        hash_value(hash, item_state(child))
+    return hash.hexdigest()
+
+
+class ExportCache:
+    """Directory of exported files named by fingerprint, with LRU eviction.
+
+    Files are written atomically (to a temporary file which is then renamed), so a
+    cache directory can be shared, e.g. by the workers of export_batch.
+    """
+
+    def __init__(self, directory, max_bytes=2 ** 30):
+        """
+        Args:
+            directory (str): created if it doesn't exist.
+            max_bytes (int): total size of files above which the least recently
+                used are deleted.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key, ext):
+        return os.path.join(self.directory, key + '.' + ext)
+
+    def get(self, key, ext):
+        """Return path of cached file, or None if there isn't one. Marks the file as used."""
+        path = self.path(key, ext)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, ext, source=None, data=None):
+        """Store a copy of file source, or bytes data, and evict if over the size limit."""
+        fd, temp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                if data is None:
+                    with open(source, 'rb') as source_file:
+                        shutil.copyfileobj(source_file, file)
+                else:
+                    file.write(data)
+            os.replace(temp, self.path(key, ext))
+        except BaseException:
+            os.remove(temp)
+            raise
+        self.evict()
+
+    def entries(self):
+        """Return list of (modification time, size, path) of cached files."""
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Delete least recently used files until the total size is at most max_bytes."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
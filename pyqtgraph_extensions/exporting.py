@@ -0,0 +1,566 @@
+"""Exporting figures to files.
+
+PDF, SVG and bitmaps via SVG ('svg-png') used to be made by converting
+pyqtgraph's SVG export with Inkscape, in a subprocess per output format. They are
+now rendered in process by NativeExporter, which paints the scene with QPainter
+directly onto a QPdfWriter, QSvgGenerator or QImage. Inkscape is only used for
+EPS, which Qt can't write, or if asked for with fmt_opts={'backend': 'inkscape'}.
+
+export_bytes and export_to render to memory, for e.g. serving plots on request.
+Both export and export_bytes can skip rendering figures which are unchanged
+since they were last exported, with an ExportCache (see export_cache).
+export_batch builds and exports many figures in a pool of worker processes.
+"""
+import collections
+import concurrent.futures
+import concurrent.futures.process
+import multiprocessing
+import os
+import shutil
+import subprocess
+import time
+import traceback
+
+import pyqtgraph as pg
+from pyqtgraph import QtCore, QtGui
+from pyqtgraph.exporters import Exporter, ImageExporter, SVGExporter
+
+from .export_cache import ExportCache, UncacheableError, scene_fingerprint
+
+
+def export_item(o):
+    """Return the item (or scene) to export for a widget or item.
+
+    Widgets are shown and their layout settled first.
+    """
+    from .GraphicsLayout import GraphicsLayoutWidget
+    if isinstance(o, (pg.GraphicsLayoutWidget, GraphicsLayoutWidget)):
+        # Ensures resizing is done (and maybe other things - but without this
+        # it can be wrong if run in a script
+        o.show()
+        pg.QtWidgets.QApplication.processEvents()
+        o.repaint()  # this is crucial - something about executing code rather than
+        # waiting for the user means this doesn't get called and the layout can
+        # be wrong
+        pg.QtWidgets.QApplication.processEvents()
+        # Passing the QGraphicsScene to the exporter ensures that all items in the
+        # scene being exported
+        return o.scene()
+    elif isinstance(o, pg.PlotWidget):
+        return o.getPlotItem()
+    elif isinstance(o, pg.GraphicsItem):
+        return o
+    else:
+        raise ValueError('Don''t know how to export it')
+
+
+class NativeExporter(Exporter):
+    """Renders an item or scene with QPainter onto a PDF, SVG or image.
+
+    The physical size is that of the source (the scene's view, or the item's
+    bounding rectangle) at px_per_inch screen pixels per inch, unless width is
+    given. Vector output has resolution px_per_inch, so e.g. cosmetic pens are one
+    screen pixel wide, as they were via Inkscape. PDF page sizes are rounded to
+    whole points (1/72 inch) by Qt. Images are rendered at dpi and record it, so
+    their physical size is exact too.
+
+    Bitmaps (e.g. ImageItems) in vector output are stored losslessly, and smoothed
+    by viewers only if interpolate is True.
+    """
+
+    def __init__(self, item, px_per_inch=90, width=None, dpi=300, antialias=True, interpolate=False,
+                 background=None):
+        """
+        Args:
+            item: scene or graphics item.
+            px_per_inch (float): screen pixels per inch, for the physical size.
+            width (float): physical width in inches, overriding px_per_inch. The
+                height follows from the aspect ratio.
+            dpi (float): resolution of image output.
+            antialias (bool): antialias lines and text.
+            interpolate (bool): whether bitmaps are smoothed when scaled.
+            background: color for mkColor. If None, vector output has no
+                background and images have that of the view, as for
+                pyqtgraph's ImageExporter.
+        """
+        Exporter.__init__(self, item)
+        self.image = None
+        self.buffer = None
+        self.setOptions(px_per_inch, width, dpi, antialias, interpolate, background)
+
+    def setOptions(self, px_per_inch=90, width=None, dpi=300, antialias=True, interpolate=False, background=None):
+        """Set the options given to __init__."""
+        self.px_per_inch = px_per_inch
+        self.width = width
+        self.dpi = dpi
+        self.antialias = antialias
+        self.interpolate = interpolate
+        self.background = None if background is None else pg.mkColor(background)
+
+    def parameters(self):
+        return None
+
+    def physicalSize(self):
+        """Return (width, height) in inches."""
+        source = self.getSourceRect()
+        width = source.width() / self.px_per_inch if self.width is None else self.width
+        return width, width * source.height() / source.width()
+
+    def viewBackground(self):
+        scene = self.getScene()
+        brush = scene.views()[0].backgroundBrush()
+        color = brush.color()
+        if brush.style() == QtCore.Qt.BrushStyle.NoBrush:
+            color.setAlpha(0)
+        return color
+
+    def paint(self, device, rect, background=None):
+        """Paint the source onto rect of device."""
+        painter = QtGui.QPainter(device)
+        try:
+            hint = QtGui.QPainter.RenderHint
+            painter.setRenderHint(hint.Antialiasing, self.antialias)
+            painter.setRenderHint(hint.TextAntialiasing, self.antialias)
+            painter.setRenderHint(hint.SmoothPixmapTransform, self.interpolate)
+            # Otherwise QPdfWriter may store bitmaps as JPEG.
+            painter.setRenderHint(hint.LosslessImageRendering)
+            if background is not None:
+                painter.fillRect(rect, background)
+            self.setExportMode(True, {'antialias': self.antialias, 'background': background, 'painter': painter,
+                                      'resolutionScale': rect.width() / self.getTargetRect().width()})
+            try:
+                self.render(painter, rect, self.getSourceRect())
+            finally:
+                self.setExportMode(False)
+        finally:
+            painter.end()
+
+    def writePdf(self, device):
+        """Write PDF to QIODevice."""
+        width, height = self.physicalSize()
+        writer = QtGui.QPdfWriter(device)
+        writer.setResolution(round(self.px_per_inch))
+        writer.setPageSize(QtGui.QPageSize(QtCore.QSizeF(width, height), QtGui.QPageSize.Unit.Inch, '',
+                                           QtGui.QPageSize.SizeMatchPolicy.ExactMatch))
+        writer.setPageMargins(QtCore.QMarginsF(0, 0, 0, 0))
+        # Qt rounds page sizes to whole points, so fill the page as rounded.
+        page = QtCore.QRectF(writer.pageLayout().fullRectPoints())
+        scale = writer.resolution() / 72
+        self.paint(writer, QtCore.QRectF(0, 0, page.width() * scale, page.height() * scale), self.background)
+
+    def emptyBuffer(self):
+        """Return the exporter's QBuffer, emptied and open for writing."""
+        if self.buffer is None:
+            self.buffer = QtCore.QBuffer()
+        self.buffer.close()
+        self.buffer.setData(b'')
+        self.buffer.open(QtCore.QIODevice.OpenModeFlag.WriteOnly)
+        return self.buffer
+
+    def pdfBytes(self):
+        buffer = self.emptyBuffer()
+        self.writePdf(buffer)
+        data = bytes(buffer.data())
+        if self.interpolate:
+            # Qt never sets /Interpolate (so viewers don't smooth). Put it in place of
+            # the optional /Type of image dictionaries - the same length, so the byte
+            # offsets of the cross-reference table stay valid.
+            data = data.replace(b'/Type /XObject\n/Subtype /Image\n', b'/Subtype/Image/Interpolate true')
+        return data
+
+    def writeSvg(self, device):
+        """Write SVG to QIODevice."""
+        from pyqtgraph.Qt import QtSvg
+        width, height = self.physicalSize()
+        size = QtCore.QSize(round(width * self.px_per_inch), round(height * self.px_per_inch))
+        generator = QtSvg.QSvgGenerator()
+        generator.setOutputDevice(device)
+        generator.setSize(size)
+        generator.setViewBox(QtCore.QRectF(0, 0, size.width(), size.height()))
+        generator.setResolution(round(self.px_per_inch))
+        self.paint(generator, QtCore.QRectF(0, 0, size.width(), size.height()), self.background)
+
+    def svgBytes(self):
+        buffer = self.emptyBuffer()
+        self.writeSvg(buffer)
+        return bytes(buffer.data())
+
+    def imageBytes(self, fmt='png'):
+        """Render image at dpi and encode it in fmt, any format QImageWriter supports."""
+        buffer = self.emptyBuffer()
+        if not self.toImage(reuse=True).save(buffer, fmt.upper()):
+            raise ValueError('Could not encode image as %s' % fmt)
+        return bytes(buffer.data())
+
+    def toImage(self, reuse=False):
+        """Render ARGB32 QImage at dpi.
+
+        If reuse is True, the image from the previous call with reuse is painted
+        over if it is the right size, rather than allocating another - so it
+        changes with the next call.
+        """
+        width, height = self.physicalSize()
+        size = QtCore.QSize(round(width * self.dpi), round(height * self.dpi))
+        if reuse and self.image is not None and self.image.size() == size:
+            image = self.image
+        else:
+            image = QtGui.QImage(size, QtGui.QImage.Format.Format_ARGB32)
+            if reuse:
+                self.image = image
+        image.fill(QtCore.Qt.GlobalColor.transparent)
+        background = self.viewBackground() if self.background is None else self.background
+        # Painted at the default resolution - fonts (e.g. of text recorded in the
+        # QPictures of axes) are scaled by the device resolution, and the scene is
+        # already scaled to dpi.
+        image.setDotsPerMeterX(QtGui.QImage(1, 1, QtGui.QImage.Format.Format_ARGB32).dotsPerMeterX())
+        image.setDotsPerMeterY(image.dotsPerMeterX())
+        self.paint(image, QtCore.QRectF(0, 0, image.width(), image.height()), background)
+        image.setDotsPerMeterX(round(self.dpi / 0.0254))
+        image.setDotsPerMeterY(round(self.dpi / 0.0254))
+        return image
+
+    def export(self, fileName=None, toBytes=False, copy=False):
+        """Write to fileName, in the format given by its extension - pdf, svg or any image format Qt supports."""
+        fmt = os.path.splitext(fileName)[1][1:].lower()
+        if fmt == 'pdf':
+            data = self.pdfBytes()
+        elif fmt == 'svg':
+            data = self.svgBytes()
+        else:
+            if not self.toImage().save(fileName):
+                raise IOError('Could not write %s' % fileName)
+            return
+        with open(fileName, 'wb') as file:
+            file.write(data)
+
+
+def export_bytes(o, fmt='png', cache=None, **opts):
+    """Export widget/item to bytes, without using the filesystem.
+
+    The NativeExporter, its buffer and (for image formats) its image are kept
+    with the item and reused by later calls.
+
+    Args:
+        o: anything export accepts.
+        fmt (str): 'pdf', 'svg' or an image format e.g. 'png', 'jpg'.
+        cache (ExportCache or str): as for export.
+        opts: options for NativeExporter.setOptions. For image formats dpi defaults
+            to px_per_inch i.e. one pixel per screen pixel, like export's 'png'.
+
+    Returns:
+        bytes: the file contents.
+    """
+    fmt = fmt.lower()
+    item = export_item(o)
+    if fmt not in ('pdf', 'svg'):
+        opts.setdefault('dpi', opts.get('px_per_inch', 90))
+    exporter = getattr(item, '_native_exporter', None)
+    if exporter is None:
+        exporter = item._native_exporter = NativeExporter(item)
+    exporter.setOptions(**opts)
+    if cache is not None:
+        cache = ExportCache(cache) if isinstance(cache, str) else cache
+        try:
+            key = scene_fingerprint(item, exporter.getSourceRect(), fmt, opts)
+        except UncacheableError:
+            cache = None
+    if cache is not None:
+        path = cache.get(key, fmt)
+        if path is not None:
+            with open(path, 'rb') as file:
+                return file.read()
+    if fmt == 'pdf':
+        data = exporter.pdfBytes()
+    elif fmt == 'svg':
+        data = exporter.svgBytes()
+    else:
+        data = exporter.imageBytes(fmt)
+    if cache is not None:
+        cache.put(key, fmt, data=data)
+    return data
+
+
+def export_to(o, fileobj, fmt='png', **opts):
+    """Export widget/item to an open binary file object (e.g. io.BytesIO) or QIODevice.
+
+    Arguments are as for export_bytes.
+    """
+    data = export_bytes(o, fmt, **opts)
+    if isinstance(fileobj, QtCore.QIODevice):
+        if fileobj.write(data) != len(data):
+            raise IOError(fileobj.errorString())
+    else:
+        fileobj.write(data)
+
+
+def inkscape_convert(filename, final_fmt, interpolate=False):
+    """Convert filename.svg to filename.final_fmt with Inkscape."""
+    subprocess.call(['inkscape', '--export-' + final_fmt + '=' + filename + '.' + final_fmt, '--export-area-drawing',
+                     filename + '.svg', '--export-dpi=300'])
+    if final_fmt == 'pdf' and not interpolate:
+        # Stop ugly interpolation of bitmaps
+        with open(filename + '.' + final_fmt, "rb") as f:
+            data = f.read()
+        data = data.replace(b'Interpolate true', b'Interpolate false')
+        with open(filename + '.' + final_fmt, "wb") as f:
+            f.write(data)
+
+
+# todo: option to remove margins of GraphicsLayouts:
+# Necessary for bitmap output (PDF is cropped somehow)
+# See http://stackoverflow.com/questions/27092164/margins-in-pyqtgraphs-graphicslayout
+# and
+# http://comments.gmane.org/gmane.comp.python.pyqtgraph/234
+def export(o, filename, fmt='png', mkdir=False, fmt_opts={}, exporter_params={}, cache=None):
+    """Export widget/item as file.
+
+    The purposes of this function are to (i) make exporting a one liner,
+    (ii) automatically handle some of the finicky bug-like limitations of Pyqtgraph's
+    exporters, (iii) provide output formats pyqtgraph lacks.
+
+    'png' and 'tif' use pyqtgraph's ImageExporter, configured by exporter_params,
+    unless fmt_opts has 'tile_size', in which case they are rendered tile by tile
+    by TiledImageExporter (see tiled_export) to bound memory.
+    'svg' uses pyqtgraph's SVGExporter, as it always has, unless fmt_opts['backend']
+    is 'native'. The rest are rendered by NativeExporter. In 'svg-png' and
+    'svg-pdf-png', the SVG is written too and the PNG is rendered directly at
+    fmt_opts['dpi'] (300 by default, as the Inkscape conversion used). EPS is
+    converted from the SVG by Inkscape.
+
+    Physical size defaults to 90 screen pixels per inch, which is what Inkscape
+    used for PDF, so choose the size in pixels to achieve a desired physical size,
+    or set fmt_opts['width'].
+
+    Args:
+        fmt (str): 'png','tif','pdf','eps','svg','svg-png','svg-pdf-png'
+        fmt_opts (dict): 'backend' - 'native' (default except for 'svg') or
+            'inkscape' for the previous conversion of pyqtgraph's SVG export by
+            Inkscape. Other keys (px_per_inch, width, dpi, antialias, interpolate,
+            background) are passed on to NativeExporter; only interpolate applies
+            to the Inkscape backend.
+            'tile_size' - see above.
+        cache (ExportCache or str): if given (a str is a cache directory), the
+            files are copied from the cache if the figure has been exported
+            before with the same fingerprint, and stored in it otherwise.
+            Figures which can't be fingerprinted (see export_cache) are
+            rendered without it.
+    """
+    fmt = fmt.lower()
+    dir = os.path.dirname(filename)
+    if len(dir) > 0:
+        if not os.path.isdir(dir):
+            if mkdir:
+                os.makedirs(dir)
+            else:
+                raise ValueError('Path %s doesn''t exist' % dir)
+
+    item = export_item(o)
+    fmt_opts = dict(fmt_opts)
+    backend = fmt_opts.pop('backend', 'pyqtgraph' if fmt == 'svg' else 'native')
+    if fmt in ('png', 'tif'):
+        exts = [fmt]
+    else:
+        exts = {'svg': ['svg'], 'pdf': ['pdf'], 'eps': ['svg', 'eps'], 'svg-png': ['svg', 'png'],
+                'svg-pdf-png': ['svg', 'png', 'pdf']}.get(fmt, [])
+        if backend == 'inkscape' and 'svg' not in exts:
+            exts = ['svg'] + exts
+    if cache is not None:
+        cache = ExportCache(cache) if isinstance(cache, str) else cache
+        try:
+            key = scene_fingerprint(item, Exporter(item).getSourceRect(), fmt, backend, fmt_opts, exporter_params)
+        except UncacheableError:
+            cache = None
+    if cache is not None:
+        paths = [cache.get(key, ext) for ext in exts]
+        if exts and None not in paths:
+            for ext, path in zip(exts, paths):
+                shutil.copyfile(path, filename + '.' + ext)
+            return
+    if fmt in ('png', 'tif') and 'tile_size' in fmt_opts:
+        from .tiled_export import TiledImageExporter
+        # Like ImageExporter, one pixel per screen pixel by default.
+        fmt_opts.setdefault('dpi', fmt_opts.get('px_per_inch', 90))
+        TiledImageExporter(item, **fmt_opts).export(filename + '.' + fmt)
+    elif fmt in ('png', 'tif'):
+        exporter = ImageExporter(item)
+        for key, value in exporter_params.items():
+            exporter.parameters()[key] = value
+        exporter.export(filename + '.' + fmt)
+    elif fmt not in ('svg', 'pdf', 'eps', 'svg-png', 'svg-pdf-png'):
+        raise ValueError('Unknown format %s' % fmt)
+    elif fmt == 'svg' and backend != 'native':
+        SVGExporter(item).export(filename + '.svg')
+    elif backend == 'inkscape':
+        SVGExporter(item).export(filename + '.svg')
+        interpolate = fmt_opts.get('interpolate', False)
+        if fmt in ('pdf', 'eps'):
+            inkscape_convert(filename, fmt, interpolate)
+        elif fmt == 'svg-png':
+            inkscape_convert(filename, 'png', interpolate)
+        elif fmt == 'svg-pdf-png':
+            inkscape_convert(filename, 'png', interpolate)
+            inkscape_convert(filename, 'pdf', interpolate)
+    else:
+        exporter = NativeExporter(item, **fmt_opts)
+        if fmt in ('svg', 'eps', 'svg-png', 'svg-pdf-png'):
+            exporter.export(filename + '.svg')
+        if fmt == 'eps':
+            inkscape_convert(filename, 'eps')
+        if fmt in ('pdf', 'svg-pdf-png'):
+            exporter.export(filename + '.pdf')
+        if fmt in ('svg-png', 'svg-pdf-png'):
+            exporter.export(filename + '.png')
+    if cache is not None:
+        for ext in exts:
+            cache.put(key, ext, filename + '.' + ext)
+
+
+class ExportSpec(collections.namedtuple('ExportSpec', ('build', 'filename', 'fmt', 'args', 'kwargs', 'fmt_opts'),
+                                        defaults=('png', (), {}, {}))):
+    """Figure for export_batch - export(build(*args, **kwargs), filename, fmt, fmt_opts=fmt_opts).
+
+    build is called in a worker process, so must be picklable e.g. a module level
+    function (in a script, under an if __name__ == '__main__' guard), as must its
+    arguments. It returns anything export accepts.
+    """
+
+
+class ExportResult(collections.namedtuple('ExportResult', ('index', 'filename', 'seconds', 'error'))):
+    """Outcome of an ExportSpec.
+
+    index is that of the spec, seconds the time taken to build and export it,
+    and error the formatted traceback if it failed, else None.
+    """
+
+
+# In worker processes, queue to which the index of each spec is put when its export starts.
+_started_specs = None
+
+
+def init_export_worker(started_specs=None):
+    global _started_specs
+    _started_specs = started_specs
+    # The platform is chosen when the QApplication is created, which is after this.
+    os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+    pg.mkQApp()
+
+
+def run_export_spec(index, spec, mkdir=False):
+    """Build and export a figure, returning an ExportResult. Used by export_batch."""
+    spec = ExportSpec(*spec)
+    start = time.perf_counter()
+    error = None
+    o = None
+    try:
+        o = spec.build(*spec.args, **spec.kwargs)
+        export(o, spec.filename, spec.fmt, mkdir, spec.fmt_opts)
+    except Exception:
+        error = traceback.format_exc()
+    finally:
+        # Workers export many figures, so don't accumulate them.
+        if isinstance(o, pg.QtWidgets.QWidget):
+            o.close()
+            o.deleteLater()
+            pg.QtWidgets.QApplication.processEvents()
+    return ExportResult(index, spec.filename, time.perf_counter() - start, error)
+
+
+def run_export_spec_in_worker(index, spec, mkdir=False):
+    """As run_export_spec, first recording that the spec has started (see init_export_worker)."""
+    if _started_specs is not None:
+        _started_specs.put(index)
+    return run_export_spec(index, spec, mkdir)
+
+
+def export_in_pool(indexed_specs, workers, mkdir, completed):
+    """Export (index, spec) pairs in a pool of worker processes, passing each ExportResult to completed.
+
+    If a worker process dies (e.g. a crash in Qt), the pool breaks and the rest
+    of its specs are not exported.
+
+    Returns:
+        (started, unstarted): lists of the (index, spec) pairs not exported - those
+            which had started in a worker, one of which caused the breakage,
+            and the rest.
+    """
+    context = multiprocessing.get_context('spawn')
+    started_specs = context.SimpleQueue()
+    finished = set()
+    with concurrent.futures.ProcessPoolExecutor(workers, mp_context=context, initializer=init_export_worker,
+                                                initargs=(started_specs,)) as pool:
+        futures = {pool.submit(run_export_spec_in_worker, index, spec, mkdir): (index, spec)
+                   for index, spec in indexed_specs}
+        for future in concurrent.futures.as_completed(futures):
+            index, spec = futures[future]
+            try:
+                result = future.result()
+            except concurrent.futures.process.BrokenProcessPool:
+                continue
+            except Exception:
+                # E.g. the spec couldn't be pickled.
+                result = ExportResult(index, spec.filename, 0, traceback.format_exc())
+            finished.add(index)
+            completed(result)
+    started = set()
+    while not started_specs.empty():
+        started.add(started_specs.get())
+    unfinished = [(index, spec) for index, spec in indexed_specs if index not in finished]
+    return [s for s in unfinished if s[0] in started], [s for s in unfinished if s[0] not in started]
+
+
+def export_batch(specs, workers=None, mkdir=False, callback=None):
+    """Build and export many figures in parallel worker processes.
+
+    Each worker is a fresh (spawned) process with its own QApplication on the
+    offscreen platform, and exports one figure at a time, writing it straight
+    to disk. Figures are independent, so throughput scales with the number of
+    workers up to the number of cores.
+
+    Failures don't stop the batch - they are reported in the results. This
+    includes a worker process dying (e.g. a crash in Qt): the figures it may
+    have been exporting are retried one at a time to find which one caused
+    it, and the rest continue in a new pool.
+
+    Args:
+        specs: sequence of ExportSpec (or tuples of its fields).
+        workers (int): number of processes. None means os.cpu_count(). 0 means
+            export in this process, one after another.
+        mkdir (bool): passed on to export.
+        callback: called with each ExportResult as it completes, e.g. to report
+            progress.
+
+    Returns:
+        list of ExportResult, in the order of specs.
+    """
+    specs = [ExportSpec(*spec) for spec in specs]
+    results = [None] * len(specs)
+
+    def completed(result):
+        results[result.index] = result
+        if callback is not None:
+            callback(result)
+
+    def died(index, spec):
+        completed(ExportResult(index, spec.filename, 0, 'Worker process died while exporting'))
+
+    if workers == 0:
+        for index, spec in enumerate(specs):
+            completed(run_export_spec(index, spec, mkdir))
+        return results
+    pending = list(enumerate(specs))
+    while pending:
+        num_pending = len(pending)
+        started, pending = export_in_pool(pending, workers, mkdir, completed)
+        if len(started) == 1:
+            died(*started[0])
+        else:
+            # Any of them could have caused it.
+            for index, spec in started:
+                if export_in_pool([(index, spec)], 1, mkdir, completed) != ([], []):
+                    died(index, spec)
+        if not started and len(pending) == num_pending:
+            # The pool broke before starting anything.
+            for index, spec in pending:
+                died(index, spec)
+            break
+    return results
@@ -2,7 +2,7 @@ import numpy as np
 import pyqtgraph as pg
 from pyqtgraph import QtCore
 
-from . import GraphicsLayoutWidget
+from .GraphicsLayout import GraphicsLayoutWidget
 
 
 def axes_to_rect(x, y, scale=1):
@@ -1,24 +1,123 @@
+import contextlib
 import logging
 import math
+import os
+import warnings
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import pyqtgraph as pg
 import pyqtgraph.functions as fn
 from pyqtgraph import QtCore, QtGui, QtWidgets
+try:
+    from pyqtgraph.graphicsItems.PlotDataItem import PlotDataset
+except ImportError:
+    # pyqtgraph < 0.13 - PlotDataItem doesn't call _getDisplayDataset, so the pyramid isn't used.
+    PlotDataset = None
 
 
-from . import AxisItem
+from .AxisItem import AxisItem
+from .downsampling import DOWNSAMPLE_MODES, DecimationPyramid
+from .ranges import RangeEstimator, RangeIndex
 
 logger = logging.getLogger(__name__)
 
-# this briges version 0.13 and the future 0.14
-# qt6 requies a paint method
-if pg.__version__.startswith("0.13"):
-    class PlotDataItem(pg.PlotDataItem):
-        def paint(self,*args):
+
+class PlotDataItem(pg.PlotDataItem):
+    """Adds faster 'peak' downsampling and a 'lttb' downsampling method.
+
+    With method 'peak' or 'lttb' and downsampling active, the displayed data are
+    taken from a DecimationPyramid of the curve, built on first use after setData,
+    so redraws (e.g. when panning with clipToView) cost in proportion to the
+    visible pixels rather than samples. This applies when no data transformations
+    (log, fft, derivative etc.), stepMode or connect array are in use - otherwise
+    pyqtgraph's own downsampling is used, with 'lttb' treated as 'peak' (with a
+    warning).
+    """
+
+    # this briges version 0.13 and the future 0.14
+    # qt6 requies a paint method
+    if pg.__version__.startswith("0.13"):
+        def paint(self, *args):
             ...
-else:
-    from pyqtgraph import PlotDataItem
+
+    def setDownsampling(self, ds=None, auto=None, method=None):
+        """As pyqtgraph.PlotDataItem.setDownsampling, with additional method 'lttb' (see
+        downsampling.lttb)."""
+        if method is not None and method not in DOWNSAMPLE_MODES:
+            raise ValueError('Unknown downsampling method %s' % method)
+        pg.PlotDataItem.setDownsampling(self, ds, auto, method)
+
+    def decimationPyramid(self):
+        """Return DecimationPyramid of current y data, building it if needed."""
+        dataset = self._dataset
+        if getattr(self, 'pyramid_dataset', None) is not dataset:
+            self.pyramid = DecimationPyramid(dataset.y)
+            self.pyramid_dataset = dataset
+        return self.pyramid
+
+    def usePyramid(self):
+        opts = self.opts
+        return (self._dataset is not None and opts['downsampleMethod'] in ('peak', 'lttb') and
+                (opts['autoDownsample'] or (isinstance(opts['downsample'], int) and opts['downsample'] > 1)) and
+                not any(opts['logMode']) and not opts['fftMode'] and not opts['derivativeMode'] and
+                not opts['phasemapMode'] and not opts['subtractMeanMode'] and not opts['stepMode'] and
+                not isinstance(opts['connect'], np.ndarray) and self._dataset.y.dtype != bool)
+
+    def _getDisplayDataset(self):
+        if not self.usePyramid():
+            if self.opts['downsampleMethod'] != 'lttb':
+                return pg.PlotDataItem._getDisplayDataset(self)
+            warnings.warn("lttb downsampling isn't supported with data transformations, stepMode or connect "
+                          "arrays - using peak")
+            self.opts['downsampleMethod'] = 'peak'
+            try:
+                return pg.PlotDataItem._getDisplayDataset(self)
+            finally:
+                self.opts['downsampleMethod'] = 'lttb'
+        if (self._datasetDisplay is not None and not self.property('xViewRangeWasChanged') and
+                not (self.property('yViewRangeWasChanged') and self.opts['dynamicRangeLimit'] is not None)):
+            return self._datasetDisplay
+        x = self._dataset.x
+        start, stop = 0, len(x)
+        view = self.getViewBox()
+        view_range = None if view is None else view.viewRect()
+        ds = self.opts['downsample'] if isinstance(self.opts['downsample'], int) else 1
+        if self.opts['autoDownsample'] and view_range is not None and len(x) > 1:
+            # As pyqtgraph, presumes uniformly spaced x.
+            dx = float(x[-1] - x[0]) / (len(x) - 1)
+            if dx != 0 and view.width() != 0:
+                ds_float = abs(view_range.width() / dx / (view.width() * self.opts['autoDownsampleFactor']))
+                if math.isfinite(ds_float):
+                    ds = max(int(ds_float), 1)
+            # As pyqtgraph, keep the last value if the new one is close, so the
+            # pyramid level doesn't flip back and forth.
+            if math.isclose(ds, self._adsLastValue, rel_tol=0.01):
+                ds = self._adsLastValue
+            self._adsLastValue = ds
+        if self.opts['clipToView'] and view_range is not None and not view.autoRangeEnabled()[0]:
+            start = max(int(np.searchsorted(x, view_range.left())) - ds, 0)
+            stop = min(int(np.searchsorted(x, view_range.right())) + ds, len(x))
+        if ds > 1:
+            pyramid = self.decimationPyramid()
+            if self.opts['downsampleMethod'] == 'peak':
+                x, y = pyramid.peak(x, start, stop, ds)
+            else:
+                x, y = pyramid.lttb(x, start, stop, ds)
+        else:
+            x, y = x[start:stop], self._dataset.y[start:stop]
+        # Let pyqtgraph finish off (dynamic range limiting, caching) with the reduced data.
+        mapped = self._datasetMapped
+        opts = self.opts
+        saved = opts['downsample'], opts['autoDownsample'], opts['clipToView']
+        opts['downsample'], opts['autoDownsample'], opts['clipToView'] = 1, False, False
+        self._datasetMapped = PlotDataset(x, y)
+        self._datasetDisplay = None
+        try:
+            return pg.PlotDataItem._getDisplayDataset(self)
+        finally:
+            opts['downsample'], opts['autoDownsample'], opts['clipToView'] = saved
+            self._datasetMapped = mapped
 
 class IPythonPNGRepr:
     """Class which can represent itself as a PNG in an IPython notebook.
@@ -44,14 +143,238 @@ class IPythonPNGRepr:
         return bytes(byte_array)
 
 
+_render_executor = None
+
+
+def get_render_executor():
+    """Return thread pool shared by ImageItems in threaded render mode."""
+    global _render_executor
+    if _render_executor is None:
+        _render_executor = ThreadPoolExecutor(os.cpu_count() or 1, thread_name_prefix='ImageItemRender')
+    return _render_executor
+
+
 class ImageItem(pg.ImageItem):
     sigLevelsChanged = QtCore.Signal()
     sigLookupTableChanged = QtCore.Signal()
+    # Emitted from worker thread with (generation, QImage or None).
+    sigRenderFinished = QtCore.Signal(object, object)
 
-    def __init__(self, image=None, **kargs):
+    def __init__(self, image=None, integer_lut=False, threaded_render=False, **kargs):
+        """
+        Args:
+            integer_lut (bool): see setIntegerLut.
+            threaded_render (bool): see setThreadedRender.
+        """
+        # Set before base class __init__, which calls setImage if image is given.
+        self.range_hint = None
+        self.threaded_render = threaded_render
+        self.render_generation = 0
+        self.render_in_flight = False
+        self.integer_lut = integer_lut
+        self.composite_lut = None
+        self.composite_lut_key = None
+        self.composite_buffer = None
+        self.qimage_transposed = False
+        self.release = None
+        self.pending_releases = []
         pg.ImageItem.__init__(self, image, **kargs)
+        self.sigRenderFinished.connect(self.threadedRenderFinished)
+
+    def setIntegerLut(self, enabled=True):
+        """Enable or disable the composite lookup table mode for integer images.
+
+        In this mode, for single-channel uint8 and uint16 images with [black, white]
+        levels, the levels are folded into a composite lookup table with an entry
+        for every possible pixel value (256 or 65536 entries). Changing the levels
+        or lookup table then only rebuilds this table, and rendering is a single
+        indexing operation rather than rescaling the whole image. Other images
+        are rendered as usual.
+        """
+        self.integer_lut = enabled
+        self.composite_lut = None
+        self.composite_lut_key = None
+        self.updateImage()
+
+    def getCompositeLut(self):
+        """Return composite lookup table combining levels and lookup table.
+
+        Returns None if the composite lookup table mode doesn't apply to the current
+        image. Otherwise returns (indices, colors). indices has an entry for every
+        possible pixel value, giving its row in colors, which is a BGRA (QImage
+        ARGB32 byte order) table. The mapping of pixel values is the same as makeARGB.
+        """
+        image = self.image
+        if not self.integer_lut or image is None or image.ndim != 2 or image.dtype not in (np.uint8, np.uint16):
+            return None
+        levels = self.levels
+        if levels is None or np.ndim(levels) != 1 or callable(self.lut) or self.autoDownsample:
+            return None
+        lut = self.lut
+        # The key holds the lookup table itself, compared by identity - the id of a
+        # freed table could be reused by a new one.
+        key = image.dtype, lut, float(levels[0]), float(levels[1])
+        old_key = self.composite_lut_key
+        if old_key is not None and old_key[1] is lut and old_key[0] == key[0] and old_key[2:] == key[2:]:
+            return self.composite_lut
+        if lut is None:
+            # Grey, as in makeARGB.
+            lut = np.repeat(np.arange(256, dtype=np.ubyte)[:, None], 3, 1)
+            scale = 255
+        else:
+            lut = np.clip(lut, 0, 255).astype(np.ubyte)
+            scale = lut.shape[0]
+        values = np.arange(np.iinfo(image.dtype).max + 1, dtype=float)
+        black, white = key[2:]
+        # As in makeARGB, don't divide by zero.
+        scaled = (values - black) * (scale / ((white - black) or 1))
+        indices = np.clip(scaled, 0, lut.shape[0] - 1).astype(np.uint8 if lut.shape[0] <= 256 else np.intp)
+        colors = np.empty((lut.shape[0], 4), np.ubyte)
+        colors[:, :3] = lut[:, 2::-1]
+        colors[:, 3] = lut[:, 3] if lut.shape[1] == 4 else 255
+        self.composite_lut = indices, colors
+        self.composite_lut_key = key
+        return self.composite_lut
+
+    def setThreadedRender(self, enabled=True):
+        """Enable or disable rendering in a worker thread.
+
+        In this mode, applying the levels and lookup table and constructing the
+        QImage are done in a thread pool (NumPy releases the GIL), so large images
+        don't block the GUI. Until a render is finished, the previous one is
+        painted. At most one render per item is in progress - images set
+        meanwhile are coalesced, so intermediate frames are dropped.
 
-    def setLevels(self, levels, update=True):
+        Images with autoDownsample, a callable lookup table, no levels, or in
+        composite lookup table mode (see setIntegerLut) are rendered in the GUI
+        thread as usual.
+        """
+        self.threaded_render = enabled
+        self.updateImage()
+
+    def render(self):
+        composite = self.getCompositeLut()
+        if composite is None:
+            if self.qimage_transposed:
+                # A transposed composite render, which the base class can't paint.
+                self.qimage = None
+            self.qimage_transposed = False
+            self.composite_buffer = None
+            if (self.threaded_render and self.image is not None and self.image.size > 0 and
+                    self.levels is not None and not callable(self.lut) and not self.autoDownsample):
+                self.requestThreadedRender()
+                return
+            return pg.ImageItem.render(self)
+        indices, colors = composite
+        image = self.image
+        # Rather than transposing column-major images, which costs more than the
+        # lookup, the transpose is applied when painting.
+        self.qimage_transposed = self.axisOrder == 'col-major'
+        # The base class's buffers for makeARGB would be stale after this, so make
+        # it allocate new ones next time it renders.
+        self._processingBuffer = None
+        self._displayBuffer = None
+        if not image.flags.c_contiguous:
+            image = np.ascontiguousarray(image)
+        # One 32 bit ARGB value per row.
+        colors = colors.view(np.uint32)[:, 0]
+        if image.dtype == np.uint8:
+            # Qt applies the color table when drawing, so no per-pixel work.
+            self.composite_buffer = image
+            color_table = colors[indices]
+        elif indices.dtype == np.uint8:
+            # Measured faster than looking up indices for uint16, and gives the same
+            # result.
+            black, white = self.composite_lut_key[2:]
+            scale = len(colors) / ((white - black) or 1)
+            self.composite_buffer = fn.rescaleData(image, scale, black, dtype=np.ubyte, clip=(0, len(colors) - 1))
+            color_table = colors
+        else:
+            color_table = None
+            self.composite_buffer = np.take(colors[indices], image).view(np.ubyte).reshape(image.shape + (4,))
+        # The QImage doesn't own its data, so composite_buffer keeps it alive.
+        if color_table is None:
+            self.qimage = fn.makeQImage(self.composite_buffer, alpha=True, copy=False, transpose=False)
+        else:
+            self.qimage = QtGui.QImage(self.composite_buffer.data, image.shape[1], image.shape[0],
+                                       self.composite_buffer.strides[0], QtGui.QImage.Format.Format_Indexed8)
+            self.qimage.setColorTable(color_table.tolist())
+        self._renderRequired = False
+        self._unrenderable = False
+
+    def renderMatchesImage(self, qimage):
+        """Whether qimage has the size the current image is painted at."""
+        shape = self.image.shape[:2] if self.axisOrder == 'col-major' else self.image.shape[1::-1]
+        return (qimage.width(), qimage.height()) == tuple(shape)
+
+    def requestThreadedRender(self):
+        self._renderRequired = False
+        if self.qimage is not None and not self.renderMatchesImage(self.qimage):
+            # The previous render would be painted stretched to the new shape.
+            self.qimage = None
+        # Until a render of this shape has finished there is nothing to paint.
+        self._unrenderable = self.qimage is None
+        self.render_generation += 1
+        if not self.render_in_flight:
+            self.submitThreadedRender()
+
+    def submitThreadedRender(self):
+        self.render_in_flight = True
+        levels = None if self.levels is None else np.array(self.levels)
+        get_render_executor().submit(self.threadedRender, self.render_generation, self.image, self.lut, levels,
+                                     self.axisOrder)
+
+    def threadedRender(self, generation, image, lut, levels, axis_order):
+        """Called in worker thread."""
+        try:
+            if image.ndim == 3 and image.shape[-1] == 1:
+                image = image[..., 0]
+            if axis_order == 'col-major':
+                image = image.swapaxes(0, 1)
+            argb, alpha = fn.makeARGB(image, lut=lut, levels=levels)
+            qimage = fn.makeQImage(argb, alpha=alpha, copy=False, transpose=False)
+        except Exception:
+            logger.exception('threaded render failed')
+            qimage = None
+        try:
+            self.sigRenderFinished.emit(generation, qimage)
+        except RuntimeError:
+            pass  # item has been deleted
+
+    def threadedRenderFinished(self, generation, qimage):
+        """Swap in finished render (in GUI thread), and start another if image has changed meanwhile."""
+        self.render_in_flight = False
+        # Images replaced while the worker was reading them can now be released.
+        self.flushReleases()
+        if not self.threaded_render:
+            return
+        if qimage is not None and self.image is not None and self.renderMatchesImage(qimage):
+            self.qimage = qimage
+            self._unrenderable = False
+            self.update()
+        if generation != self.render_generation:
+            self.submitThreadedRender()
+
+    def paint(self, painter, *args):
+        if self.image is not None and self.qimage is None and not getattr(self, '_renderRequired', False):
+            # A threaded render is in progress.
+            return
+        if self.image is None or self.getCompositeLut() is None:
+            return pg.ImageItem.paint(self, painter, *args)
+        if self.qimage is None or getattr(self, '_renderRequired', False):
+            self.render()
+        if self.paintMode is not None:
+            painter.setCompositionMode(self.paintMode)
+        painter.save()
+        if self.qimage_transposed:
+            painter.setTransform(QtGui.QTransform(0, 1, 1, 0, 0, 0), True)
+        painter.drawImage(QtCore.QRectF(0, 0, self.qimage.width(), self.qimage.height()), self.qimage)
+        painter.restore()
+        if self.border is not None:
+            painter.setPen(self.border)
+            painter.drawRect(self.boundingRect())
+
+    def setLevels(self, levels, update=True, emit=True):
         """
         Set image scaling levels. Can be one of:
         
@@ -61,7 +384,7 @@ class ImageItem(pg.ImageItem):
         Only the first format is compatible with lookup tables. See :func:`makeARGB <pyqtgraph.makeARGB>`
         for more details on how levels are applied.
         """
-        emit = self.levels is None or not np.allclose(self.levels, levels)
+        emit = emit and (self.levels is None or not np.allclose(self.levels, levels))
         pg.ImageItem.setLevels(self, levels, update)
         if emit:
             self.sigLevelsChanged.emit()
@@ -80,9 +403,34 @@ class ImageItem(pg.ImageItem):
         if emit:
             self.sigLookupTableChanged.emit()
 
-    def setImage(self, image=None, autoLevels=True, levels=None, **kwargs):
+    def setImage(self, image=None, autoLevels=True, levels=None, range_hint=None, release=None, **kwargs):
         """Add behaviour that if autoLevels is False and levels is None, levels
-        is set to current (if that is not None). (In original, this causes an error.)"""
+        is set to current (if that is not None). (In original, this causes an error.)
+
+        The image is not copied - the item keeps a view of it, and data is only
+        copied when mapped to colours. So np.memmap views and frames in shared
+        memory (see SharedFrameRing) can be given directly, provided the producer
+        doesn't overwrite them while in use.
+
+        Args:
+            range_hint (min, max): range of image known to the producer (e.g. from
+                the acquisition hardware). Linked ColorBarItems use it instead of
+                scanning the data, as does autoLevels. Applies only to the given
+                image - it is cleared when a new image is set without a hint.
+            release (callable): called with no arguments once the item no longer
+                reads image i.e. when it is replaced, the item is cleared, or
+                releaseImage is called. Lets the producer reuse the buffer.
+        """
+        if image is not None:
+            self.range_hint = range_hint
+            previous_release = self.release
+            self.release = release
+        if levels is not None:
+            # As in pyqtgraph, explicit levels take precedence over autoLevels.
+            autoLevels = False
+        if autoLevels and levels is None and self.range_hint is not None:
+            levels = self.range_hint
+            autoLevels = False
         if levels is None and not autoLevels:
             if self.levels is not None:
                 logger.debug('setImage retaining levels')
@@ -90,6 +438,37 @@ class ImageItem(pg.ImageItem):
             else:
                 autoLevels = True
         pg.ImageItem.setImage(self, image=image, autoLevels=autoLevels, levels=levels, **kwargs)
+        if image is not None and previous_release is not None:
+            self.queueRelease(previous_release)
+
+    def clear(self):
+        pg.ImageItem.clear(self)
+        self.releaseImage()
+
+    def releaseImage(self):
+        """Call the release callback of the current image, if any.
+
+        The item keeps its view of the image, so if the producer overwrites the
+        buffer, the new contents appear on the next render (e.g. after a change
+        of levels).
+        """
+        release = self.release
+        self.release = None
+        if release is not None:
+            self.queueRelease(release)
+
+    def queueRelease(self, release):
+        """Call release, or if a threaded render (which may be reading the image) is
+        in progress, once it has finished."""
+        self.pending_releases.append(release)
+        if not self.render_in_flight:
+            self.flushReleases()
+
+    def flushReleases(self):
+        releases = self.pending_releases
+        self.pending_releases = []
+        for release in releases:
+            release()
 
 
 class LegendItem(pg.LegendItem):
@@ -97,10 +476,15 @@ class LegendItem(pg.LegendItem):
     Customisation subclass of pyqtgraph.LegendItem for:
         * control over background and border color - defaults to pyqtgraph's default
         * control over spacing of items
+        * fast building of legends with many entries - the size of each entry
+          is recorded when it is added, so adding or removing an entry updates
+          the legend size in O(log n) rather than measuring every entry, and
+          addItems (or batch) adds many entries with one update
+        * optionally, showing only a page of entries at a time (see page_size)
     """
 
     def __init__(self, size=None, offset=None, background_color=None, border_color=None, margins=None,
-                 vertical_spacing=None):
+                 vertical_spacing=None, page_size=None):
         """
         Args:
             margins (left,top,right,bottom): if not None, set layout margins. 
@@ -108,7 +492,26 @@ class LegendItem(pg.LegendItem):
                 defaults
             vertical_spacing (int): if not None, set vertical spacing between items.
                 0 is a good choice. If None, use pyqtgraph default.
+            page_size (int): if not None, only this many entries are shown (and
+                have samples and labels created) at a time, with a footer showing
+                which. The mouse wheel over the legend, or setPage, changes page.
         """
+        # Set before base class __init__, which may call updateSize.
+        self.batch_depth = 0
+        self.size_pending = False
+        # Width and height of each shown entry, keyed by id of sample (so the
+        # index's superseded entries don't keep samples alive).
+        self.entry_widths = RangeIndex()
+        self.entry_heights = {}
+        self.total_height = 0
+        self.text_style = None
+        self.page_size = page_size
+        self.page = 0
+        # All (item, name) entries, when paged.
+        self.entries = []
+        self.shown_entries = []
+        self.page_pending = False
+        self.footer = None
         pg.LegendItem.__init__(self, size, offset)
         if background_color is None:
             background_color = pg.CONFIG_OPTIONS['background']
@@ -129,41 +532,197 @@ class LegendItem(pg.LegendItem):
         p.setBrush(fn.mkBrush(self.background_color))
         p.drawRect(self.boundingRect())
 
-    def setTextStyle(self, *args, **kwargs):
-        """Arguments passed on to setText of every LabelItem."""
+    @contextlib.contextmanager
+    def batch(self):
+        """Context manager within which entries can be added and removed with one update on exit."""
+        self.batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.batch_depth -= 1
+            self.applyPending()
+
+    def applyPending(self):
+        if self.batch_depth > 0:
+            return
+        if self.page_pending:
+            self.showPage(self.page)
+        if self.size_pending:
+            self.updateSize()
+
+    def addItem(self, item, name):
+        if self.page_size is not None:
+            self.entries.append((item, name))
+            self.page_pending = True
+            self.applyPending()
+            return
+        with self.batch():
+            self.addShown(item, name)
+
+    def addShown(self, item, name):
+        """Create sample and label for entry."""
+        pg.LegendItem.addItem(self, item, name)
+        sample, label = self.items[-1]
+        if self.text_style is not None:
+            label.setText(label.text, **self.text_style)
+        self.recordEntry(sample, label)
+
+    def addItems(self, items):
+        """Add entries from sequence of (item, name) with one update of the legend size."""
+        with self.batch():
+            for item, name in items:
+                self.addItem(item, name)
+
+    def removeItem(self, item):
+        """Remove first entry for item (or with name item)."""
+        if self.page_size is not None:
+            for index, (entry_item, name) in enumerate(self.entries):
+                if entry_item is item or name == item:
+                    del self.entries[index]
+                    self.page_pending = True
+                    self.applyPending()
+                    return
+            return
         for sample, label in self.items:
-            label.setText(label.text, *args, **kwargs)
-
-    # def updateSize(self):
-    #     if self.size is not None:
-    #         return
-    #         
-    #     height = 0
-    #     width = 0
-    #     #print("-------")
-    #     for sample, label in self.items:
-    #         height += max(sample.height(), label.height()) + 3
-    #         width = max(width, (sample.sizeHint(QtCore.Qt.SizeHint.MinimumSize, sample.size()).width() +
-    #                             label.sizeHint(QtCore.Qt.SizeHint.MinimumSize, label.size()).width()))
-    #         #print(width, height)
-    #     #print width, height
-    #     self.setGeometry(0, 0, width+25, height)
+            if sample.item is item or label.text == item:
+                with self.batch():
+                    self.discardEntry(id(sample))
+                    pg.LegendItem.removeItem(self, item)
+                return
+
+    def clear(self):
+        with self.batch():
+            self.entries = []
+            self.page = 0
+            self.page_pending = self.page_size is not None
+            self.clearShown()
+
+    def clearShown(self):
+        """Remove samples and labels (but not paged entries)."""
+        if self.footer is not None and self.footer.isVisibleTo(self):
+            self.layout.removeItem(self.footer)
+            self.footer.hide()
+        pg.LegendItem.clear(self)
+        self.shown_entries = []
+        self.entry_widths.clear()
+        self.entry_heights = {}
+        self.total_height = 0
+
+    def recordEntry(self, sample, label):
+        """Record size of an entry for updateSize.
+
+        Uses minimumWidth() rather than width() on items (likewise for height), to
+        prevent runaway growth of the legend with repeated calling of updateSize.
+        """
+        if sample is None:
+            width = label.sizeHint(QtCore.Qt.SizeHint.MinimumSize, label.size()).width()
+            height = label.height()
+        else:
+            width = (sample.sizeHint(QtCore.Qt.SizeHint.MinimumSize, sample.size()).width() +
+                     label.sizeHint(QtCore.Qt.SizeHint.MinimumSize, label.size()).width())
+            height = max(sample.height(), label.height())
+        key = id(label if sample is None else sample)
+        self.discardEntry(key)
+        self.entry_widths.set(key, width, width)
+        self.entry_heights[key] = height
+        self.total_height += height
+        self.updateSize()
+
+    def discardEntry(self, key):
+        self.entry_widths.discard(key)
+        self.total_height -= self.entry_heights.pop(key, 0)
+        self.updateSize()
+
+    def setTextStyle(self, *args, **kwargs):
+        """Arguments passed on to setText of every LabelItem, including those added later.
+
+        Does nothing if the style is unchanged.
+        """
+        if args:
+            # Positional arguments of LabelItem.setText after text are not supported
+            # by later entries, so always apply.
+            self.text_style = None
+        elif kwargs == self.text_style:
+            return
+        else:
+            self.text_style = kwargs
+        with self.batch():
+            for sample, label in self.items:
+                label.setText(label.text, *args, **kwargs)
+                self.recordEntry(sample, label)
 
     def updateSize(self):
         # Modified from pyqtgraph's original to use minimumWidth() rather than
         # width() on items (likewise for height), to prevent runaway growth of 
         # legend with repeated calling of updateSize. Then original pyqtgraph fixed the bug. But
         # still want margin and verticalSpacing feature.
+        if self.batch_depth > 0:
+            self.size_pending = True
+            return
+        self.size_pending = False
         if self.size is not None:
             return
         margins = self.margins  # layout.getContentsMargins()
-        height = margins[1]
-        width = margins[0]
-        for sample, label in self.items:
-            height += max(sample.height(), label.height()) + self.layout.verticalSpacing()
-            width = max(width, (sample.sizeHint(QtCore.Qt.SizeHint.MinimumSize, sample.size()).width() +
-                                label.sizeHint(QtCore.Qt.SizeHint.MinimumSize, label.size()).width()))
-        self.setGeometry(0, 0, width + margins[2], height + margins[3])  # D
+        height = margins[1] + self.total_height + len(self.entry_heights) * self.layout.verticalSpacing()
+        width = max(margins[0], self.entry_widths.max() or 0)
+        self.setGeometry(0, 0, width + margins[2], height + margins[3])
+
+    def pageCount(self):
+        if self.page_size is None:
+            return 1
+        return max(-(-len(self.entries) // self.page_size), 1)
+
+    def setPage(self, page):
+        """Show page of entries (paged legends only)."""
+        page = min(max(page, 0), self.pageCount() - 1)
+        if page != self.page:
+            self.page = page
+            self.page_pending = True
+            self.applyPending()
+
+    def showPage(self, page):
+        """Create samples and labels for the entries of page, replacing those shown.
+
+        If the entries are those already shown, only the footer is updated.
+        """
+        self.page_pending = False
+        self.page = page = min(page, self.pageCount() - 1)
+        start = page * self.page_size
+        shown = self.entries[start:start + self.page_size]
+        with self.batch():
+            if not (len(shown) == len(self.shown_entries) and all(
+                    a[0] is b[0] and a[1] == b[1] for a, b in zip(shown, self.shown_entries))):
+                self.rebuildShown(shown)
+            if len(self.entries) > self.page_size:
+                text = '%d-%d of %d' % (start + 1, start + len(shown), len(self.entries))
+                if self.footer is None:
+                    self.footer = pg.LabelItem(text, justify='left', size=self.opts['labelTextSize'],
+                                               color=self.opts['labelTextColor'])
+                    self.footer.setParentItem(self)
+                    self.footer.hide()
+                elif text != self.footer.text:
+                    self.footer.setText(text)
+                if not self.footer.isVisibleTo(self):
+                    self.layout.addItem(self.footer, self.layout.rowCount(), 0, 1, 2)
+                    self.footer.show()
+                self.recordEntry(None, self.footer)
+            elif self.footer is not None and self.footer.isVisibleTo(self):
+                self.layout.removeItem(self.footer)
+                self.footer.hide()
+                self.discardEntry(id(self.footer))
+
+    def rebuildShown(self, shown):
+        self.clearShown()
+        for item, name in shown:
+            self.addShown(item, name)
+        self.shown_entries = shown
+
+    def wheelEvent(self, ev):
+        if self.page_size is None:
+            ev.ignore()
+            return
+        self.setPage(self.page + (1 if ev.delta() < 0 else -1))
+        ev.accept()
 
 
 class ViewBox(pg.ViewBox):
@@ -212,13 +771,22 @@ class ColorBarItem(pg.GraphicsWidget):
     put to use. It's probably not optimally efficient.
     """
 
-    def __init__(self, parent=None, image=None, label=None, images=()):
+    def __init__(self, parent=None, image=None, label=None, images=(), range_mode='exact', range_options=None):
+        """
+        Args:
+            range_mode (str): how the range of linked images is found - see
+                RangeEstimator.
+            range_options (dict): passed on to RangeEstimator.__init__.
+        """
         pg.GraphicsWidget.__init__(self, parent)
         """Previous version used manual layout. This worked for initial setup but
         I couldn't figure out how to make it update automatically if e.g. the
         axis width changed. So switched to layout management. This requires
         the ImageItem to be in a QGraphicsLayoutItem, since it is not one itself.
         Putting it in a ViewBox seemed the simplest option."""
+        if range_options is None:
+            range_options = {}
+        self.range_estimator = RangeEstimator(range_mode, **range_options)
         # Backwards compatilbility: retain image argument
         if image is not None:
             assert images == ()
@@ -249,8 +817,13 @@ class ColorBarItem(pg.GraphicsWidget):
 
         self.setLayout(self.layout)
         self.images = ()
-        self.images_min = {}
-        self.images_max = {}
+        # Ranges of linked images, updated once per event loop iteration.
+        self.range_index = RangeIndex()
+        self.pending_range_images = set()
+        self.range_timer = QtCore.QTimer(self)
+        self.range_timer.setSingleShot(True)
+        self.range_timer.setInterval(0)
+        self.range_timer.timeout.connect(self.flushImageRanges)
         self.manual_lut = None
         self.manual_levels = None
         self.setImages(images)
@@ -266,11 +839,16 @@ class ColorBarItem(pg.GraphicsWidget):
             image.sigLevelsChanged.disconnect()
             image.sigImageChanged.disconnect()
             image.sigLookupTableChanged.disconnect()
+        images = tuple(images)
+        for image in set(self.images).difference(images):
+            self.range_index.discard(image)
+            self.pending_range_images.discard(image)
         self.images = images
         if self.images != ():
             self.update()  # what does this do?
             self.lookupTableChanged(images[0])
             self.imageRangeChanged(images)
+            self.flushImageRanges()
             for image in self.images:
                 image.sigLevelsChanged.connect(lambda image=image: self.imageLevelsChanged(image))
                 image.sigImageChanged.connect(lambda image=image: self.imageRangeChanged([image]))
@@ -288,6 +866,36 @@ class ColorBarItem(pg.GraphicsWidget):
     def setImage(self, image):
         self.setImages((image,))
 
+    def setRangeMode(self, mode, **kwargs):
+        """Change how the range of the linked images is found.
+
+        Args:
+            mode (str): see RangeEstimator.
+            kwargs: passed on to RangeEstimator.__init__.
+        """
+        self.range_estimator.close()
+        self.range_estimator = RangeEstimator(mode, **kwargs)
+        if self.images != ():
+            self.imageRangeChanged(self.images)
+            self.flushImageRanges()
+
+    def setColormap(self, lut=None, levels=None):
+        """Set lookup table and/or levels of all linked images.
+
+        pyqtgraph's ImageItem only marks itself for rendering when its lookup table
+        or levels change, and renders when next painted, so each image is rendered
+        once however many changes are made.
+        """
+        if self.images == ():
+            return
+        if lut is not None:
+            # Propagated to the other images by lookupTableChanged.
+            self.images[0].setLookupTable(lut)
+        if levels is not None:
+            for image in self.images[1:]:
+                image.setLevels(levels, emit=False)
+            self.images[0].setLevels(levels)
+
     def lookupTableChanged(self, image):
         """Sets the lookup table based on zeroth image."""
         self.bar.setLookupTable(image.lut)
@@ -298,15 +906,31 @@ class ColorBarItem(pg.GraphicsWidget):
             im.setLookupTable(image.lut, emit=False)
 
     def imageRangeChanged(self, images):
-        """Respond to change in the range of the images."""
+        """Respond to change in the range of the images.
+
+        The update is deferred to the next event loop iteration, so that changes to
+        many images (e.g. tiles of a mosaic) result in one update of the bar.
+        """
+        self.pending_range_images.update(images)
+        if not self.range_timer.isActive():
+            self.range_timer.start()
+
+    def flushImageRanges(self):
+        """Apply pending changes in the range of the images to the bar."""
+        self.range_timer.stop()
+        images = self.pending_range_images
+        self.pending_range_images = set()
         for image in images:
             image_data = image.image
             if image_data is None:
-                return
-            self.images_min[image] = np.nanmin(image_data)
-            self.images_max[image] = np.nanmax(image_data)
-        self.image_min = min(self.images_min.values())
-        self.image_max = max(self.images_max.values())
+                self.range_index.discard(image)
+                continue
+            hint = getattr(image, 'range_hint', None)
+            self.range_index.set(image, *self.range_estimator(image_data, hint))
+        if len(self.range_index) == 0:
+            return
+        self.image_min = self.range_index.min()
+        self.image_max = self.range_index.max()
         # Set spatial extent of bar to range of image
         logger.debug('setting bar extent to %g,%g', self.image_min, self.image_max)
         self.bar.setRect(QtCore.QRectF(0, self.image_min, 1, self.image_max - self.image_min))
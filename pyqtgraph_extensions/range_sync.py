@@ -0,0 +1,121 @@
+"""Sharing a view range between many plots.
+
+pyqtgraph links views in pairs (setXLink etc.). Linking many plots forms chains,
+along which each range change cascades synchronously - every view sets its range
+and emits its signals, each in turn causing the next view to update. Links are
+also limited to like axes, so e.g. the time axis of a vertical and a horizontal
+history plot can't be linked directly.
+
+A RangeSyncGroup instead owns one range, shared by all its members. A change in
+any member is applied to all the others once, in the next event loop iteration,
+however many changes occur before then.
+"""
+import functools
+
+from pyqtgraph import QtCore
+from pyqtgraph.Qt import isQObjectAlive
+
+
+class RangeSyncGroup(QtCore.QObject):
+    """Range shared by an axis of each of several views.
+
+    Each member is a view box (or a plot with getViewBox, e.g. AlignedPlot) and an
+    axis - 'x' or 'y' - whose range follows the group range through a linear
+    transform. Members can use different axes, e.g. the time axis of a vertical
+    log (x) and a horizontal log (y).
+
+    Changes made while applying the group range are ignored, so there is no
+    re-entrancy and no need for recursion guards.
+    """
+    # Emitted with the new (min, max) group range after it has been applied.
+    sigRangeChanged = QtCore.Signal(object)
+
+    def __init__(self, members=()):
+        """
+        Args:
+            members: sequence of arguments (tuples) for add.
+        """
+        QtCore.QObject.__init__(self)
+        # List of (view box, axis, scale, offset, slot) tuples.
+        self.members = []
+        self.range = None
+        self.source = None
+        self.applying = False
+        self.update_scheduled = False
+        for member in members:
+            self.add(*member)
+
+    def add(self, plot, axis='x', scale=1, offset=0):
+        """Add axis of plot to the group.
+
+        The member's range is scale * (group range) + offset. If the group has a
+        range, it is applied to the member, otherwise the member's range becomes
+        the group range.
+
+        Args:
+            plot: ViewBox or object with getViewBox method.
+            axis (str): 'x' or 'y'.
+            scale (float): nonzero.
+            offset (float):
+        """
+        view = plot.getViewBox() if hasattr(plot, 'getViewBox') else plot
+        index = {'x': 0, 'y': 1}[axis]
+        slot = functools.partial(self.memberRangeChanged, view, index, scale, offset)
+        (view.sigXRangeChanged if index == 0 else view.sigYRangeChanged).connect(slot)
+        self.members.append((view, index, scale, offset, slot))
+        if self.range is None:
+            self.range = self.toGroup(view.viewRange()[index], scale, offset)
+        else:
+            self.applyRange(self.range)
+
+    def remove(self, plot):
+        """Remove all axes of plot from the group."""
+        view = plot.getViewBox() if hasattr(plot, 'getViewBox') else plot
+        for member in [m for m in self.members if m[0] is view]:
+            _, index, _, _, slot = member
+            (view.sigXRangeChanged if index == 0 else view.sigYRangeChanged).disconnect(slot)
+            self.members.remove(member)
+
+    @staticmethod
+    def toGroup(view_range, scale, offset):
+        return tuple(sorted(((view_range[0] - offset) / scale, (view_range[1] - offset) / scale)))
+
+    def setRange(self, min, max):
+        """Set group range and apply it to all members now."""
+        self.source = None
+        self.applyRange((min, max))
+
+    def memberRangeChanged(self, view, index, scale, offset, _, view_range):
+        if self.applying:
+            return
+        self.range = self.toGroup(view_range, scale, offset)
+        self.source = view, index
+        if not self.update_scheduled:
+            self.update_scheduled = True
+            QtCore.QTimer.singleShot(0, self.applyPendingRange)
+
+    def applyPendingRange(self):
+        self.update_scheduled = False
+        # Members may have been deleted (e.g. their window closed) since the change.
+        self.members = [member for member in self.members if isQObjectAlive(member[0])]
+        self.applyRange(self.range)
+
+    def applyRange(self, group_range):
+        """Set the range of members that differ from group_range (except the one the change came from)."""
+        self.range = tuple(group_range)
+        self.applying = True
+        try:
+            for view, index, scale, offset, _ in self.members:
+                if self.source is not None and view is self.source[0] and index == self.source[1]:
+                    continue
+                target = sorted((self.range[0] * scale + offset, self.range[1] * scale + offset))
+                if view.viewRange()[index] == target:
+                    continue
+                if index == 0:
+                    view.setXRange(*target, padding=0)
+                else:
+                    view.setYRange(*target, padding=0)
+        finally:
+            self.applying = False
+        self.source = None
+        self.sigRangeChanged.emit(self.range)
@@ -0,0 +1,187 @@
+"""Estimation of the range (minimum and maximum) of image data.
+
+Used by ColorBarItem to set the extent of the bar. Scanning the whole of a large
+float image with np.nanmin and np.nanmax on every frame is expensive, so several
+modes are offered trading accuracy for speed.
+"""
+import heapq
+import itertools
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+RANGE_MODES = ('exact', 'strided', 'threaded')
+
+
+class RangeEstimator:
+    """Callable which estimates the (min, max) of an array, ignoring NaNs.
+
+    Modes:
+        'exact': minimum and maximum over the whole array.
+        'strided': as for exact, but on a regularly sub-sampled view of the array
+            with at most max_samples elements. Fast but may miss isolated extreme
+            pixels.
+        'threaded': exact result from a reduction over chunks of rows, spread
+            across a thread pool. NumPy releases the GIL during the reduction so
+            this scales with cores for large arrays.
+
+    In every mode, a producer-supplied hint (see ImageItem.setImage) takes
+    precedence over scanning the data.
+    """
+
+    def __init__(self, mode='exact', max_samples=2**18, chunk_size=2**20, workers=None):
+        """
+        Args:
+            mode (str): one of RANGE_MODES.
+            max_samples (int): target number of samples for 'strided' mode.
+            chunk_size (int): approximate number of elements per chunk for 'threaded'
+                mode. Arrays smaller than this are reduced in the calling thread.
+            workers (int): number of threads for 'threaded' mode. Defaults to
+                os.cpu_count().
+        """
+        if mode not in RANGE_MODES:
+            raise ValueError('Unknown range mode %s' % mode)
+        self.mode = mode
+        self.max_samples = max_samples
+        self.chunk_size = chunk_size
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.workers = workers
+        self._executor = None
+
+    def __call__(self, data, hint=None):
+        """Return (min, max) of data, or hint if it is not None."""
+        if hint is not None:
+            mn, mx = hint
+            return mn, mx
+        if self.mode == 'strided':
+            return nanrange(strided_sample(data, self.max_samples))
+        elif self.mode == 'threaded':
+            return self.threaded_nanrange(data)
+        else:
+            return nanrange(data)
+
+    def threaded_nanrange(self, data):
+        data = np.asarray(data)
+        if data.ndim == 0 or data.size <= self.chunk_size or self.workers < 2:
+            return nanrange(data)
+        num_chunks = min(math.ceil(data.size / self.chunk_size), data.shape[0])
+        bounds = np.linspace(0, data.shape[0], num_chunks + 1).astype(int)
+        chunks = [data[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='RangeEstimator')
+        ranges = np.array(list(self._executor.map(nanrange, chunks)), dtype=float)
+        return nanrange(ranges[:, 0])[0], nanrange(ranges[:, 1])[1]
+
+    def close(self):
+        """Shut down the thread pool, if one was started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def nanrange(data):
+    """Return (nanmin, nanmax) of data, or (nan, nan) if it is all NaN or empty."""
+    data = np.asarray(data)
+    if data.size == 0:
+        return math.nan, math.nan
+    if data.dtype.kind != 'f':
+        # Integer data can't contain NaNs and min/max are faster.
+        return data.min(), data.max()
+    # fmin/fmax ignore NaNs without the temporary copies made by np.nanmin/nanmax
+    # and give NaN only if all elements are NaN.
+    return np.fmin.reduce(data, axis=None), np.fmax.reduce(data, axis=None)
+
+
+def strided_sample(data, max_samples):
+    """Return a regularly strided view of data with at most max_samples elements.
+
+    The same stride is applied to the first two axes (or the only axis for 1D).
+    """
+    data = np.asarray(data)
+    if data.size <= max_samples or data.ndim == 0:
+        return data
+    num_axes = min(data.ndim, 2)
+    stride = max(math.ceil((data.size / max_samples) ** (1 / num_axes)), 1)
+    sample = data[(slice(None, None, stride),) * num_axes]
+    while sample.size > max_samples:
+        stride += 1
+        sample = data[(slice(None, None, stride),) * num_axes]
+    return sample
+
+
+class RangeIndex:
+    """Global (min, max) over a collection of keyed ranges.
+
+    Used by ColorBarItem to combine the ranges of many linked images. Setting or
+    discarding a key is O(log n) and so is querying the global range (amortized).
+    Implemented as a pair of heaps with lazy deletion - superseded entries are
+    dropped when they reach the top. NaN ranges (e.g. from all-NaN images) are
+    ignored.
+    """
+
+    def __init__(self):
+        self._ranges = {}
+        self._versions = {}
+        self._min_heap = []
+        self._max_heap = []
+        self._count = itertools.count()
+
+    def __len__(self):
+        return len(self._ranges)
+
+    def __contains__(self, key):
+        return key in self._ranges
+
+    def set(self, key, mn, mx):
+        version = next(self._count)
+        self._versions[key] = version
+        if np.isnan(mn) or np.isnan(mx):
+            self._ranges.pop(key, None)
+            return
+        self._ranges[key] = mn, mx
+        # The version breaks ties so keys are never compared.
+        heapq.heappush(self._min_heap, (mn, version, key))
+        heapq.heappush(self._max_heap, (-mx, version, key))
+        if len(self._min_heap) > 2 * len(self._ranges) + 16:
+            self._rebuild()
+
+    def discard(self, key):
+        self._ranges.pop(key, None)
+        self._versions.pop(key, None)
+
+    def clear(self):
+        self.__init__()
+
+    def get(self, key):
+        """Return (min, max) for key, or None if it is absent."""
+        return self._ranges.get(key)
+
+    def min(self):
+        """Return global minimum, or None if empty."""
+        return self._top(self._min_heap)
+
+    def max(self):
+        """Return global maximum, or None if empty."""
+        top = self._top(self._max_heap)
+        return None if top is None else -top
+
+    def _top(self, heap):
+        while heap:
+            value, version, key = heap[0]
+            if key in self._ranges and self._versions[key] == version:
+                return value
+            heapq.heappop(heap)
+        return None
+
+    def _rebuild(self):
+        self._min_heap = []
+        self._max_heap = []
+        for key, (mn, mx) in self._ranges.items():
+            version = self._versions[key]
+            self._min_heap.append((mn, version, key))
+            self._max_heap.append((-mx, version, key))
+        heapq.heapify(self._min_heap)
+        heapq.heapify(self._max_heap)
@@ -0,0 +1,92 @@
+"""Passing image frames between processes without copying.
+
+A SharedFrameRing is a ring of frame slots in a multiprocessing.shared_memory
+block. The producer (e.g. an acquisition process) fills a free slot in place and
+publishes its index; the consumer (the GUI) views the slot as an array and gives
+it directly to ImageItem.setImage, with a release callback that frees the slot
+once the item no longer needs it. Only the slot index crosses the process
+boundary.
+"""
+import functools
+from multiprocessing import shared_memory
+
+import numpy as np
+
+class SharedFrameRing:
+    """Ring of frames of fixed shape and dtype in shared memory.
+
+    Each slot has a state byte in the shared block. The producer only moves slots
+    from FREE to WRITING to READY, and the consumer only from READY to FREE, so no
+    lock is needed with one producer and one consumer. Ready slot indices are
+    passed to the consumer by any means (e.g. a multiprocessing.Queue).
+
+    Create in one process, then attach in another using spec:
+        ring = SharedFrameRing((2048, 2048), np.uint16, 4)
+        ... pass ring.spec to the other process ...
+        ring = SharedFrameRing.attach(spec)
+    """
+    # Slot states.
+    FREE = 0
+    WRITING = 1
+    READY = 2
+
+    def __init__(self, shape, dtype, num_slots=4, name=None, create=True):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.num_slots = num_slots
+        # Keep frames aligned after the state bytes.
+        self.header_bytes = -(-num_slots // 64) * 64
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        size = self.header_bytes + num_slots * frame_bytes
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        self.states = np.ndarray((num_slots,), np.uint8, buffer=self.shm.buf)
+        self.frames = np.ndarray((num_slots,) + self.shape, self.dtype, buffer=self.shm.buf, offset=self.header_bytes)
+        if create:
+            self.states[:] = self.FREE
+        self.next_slot = 0
+
+    @property
+    def spec(self):
+        """Picklable description for attach."""
+        return self.shm.name, self.shape, self.dtype.str, self.num_slots
+
+    @classmethod
+    def attach(cls, spec):
+        name, shape, dtype, num_slots = spec
+        return cls(shape, dtype, num_slots, name=name, create=False)
+
+    def acquire(self):
+        """Producer: return index of a free slot, now reserved for writing, or None if all are in use."""
+        for n in range(self.num_slots):
+            slot = (self.next_slot + n) % self.num_slots
+            if self.states[slot] == self.FREE:
+                self.states[slot] = self.WRITING
+                self.next_slot = (slot + 1) % self.num_slots
+                return slot
+        return None
+
+    def frame(self, slot):
+        """Return the array of a slot. It is a view - no data is copied."""
+        return self.frames[slot]
+
+    def publish(self, slot):
+        """Producer: mark slot as ready for the consumer."""
+        self.states[slot] = self.READY
+
+    def release(self, slot):
+        """Consumer: return slot to the producer."""
+        self.states[slot] = self.FREE
+
+    def release_callback(self, slot):
+        """Return callback releasing slot, e.g. for ImageItem.setImage."""
+        return functools.partial(self.release, slot)
+
+    def close(self):
+        # Drop our views so the shared memory can be closed.
+        self.states = None
+        self.frames = None
+        self.shm.close()
+
+    def unlink(self):
+        """Destroy the shared memory block (call from the creating process once finished)."""
+        self.shm.unlink()
@@ -0,0 +1,97 @@
+"""Appending to curves of live data with fixed memory.
+
+Calling setData with ever growing arrays copies the whole history for every new
+sample. A CurveStream instead keeps the latest samples in a preallocated
+circular buffer, and gives the curve a view of it. Appends are cheap and only
+write the new samples; the curve is updated at most once per event loop
+iteration however many appends are made.
+"""
+import numpy as np
+from pyqtgraph import QtCore
+
+
+class CurveStream:
+    """Circular buffer of the latest (x, y) samples of a curve.
+
+    The buffer is mirrored - each sample is written at slot and slot + capacity -
+    so the samples from oldest to newest are always a contiguous slice, and the
+    curve is given a view rather than a rolled copy. Memory is 4 * capacity floats
+    regardless of how many samples are appended.
+
+    Usually created by AlignedPlot.stream.
+    """
+
+    def __init__(self, item, capacity=1000, follow=None):
+        """
+        Args:
+            item: curve with setData e.g. PlotDataItem.
+            capacity (int): number of samples kept.
+            follow (float): if not None, after each update the x range of the
+                item's view is set to the latest follow x units i.e. the view
+                scrolls with the data.
+        """
+        self.item = item
+        self.capacity = capacity
+        self.follow = follow
+        self.x = np.zeros(2 * capacity)
+        self.y = np.zeros(2 * capacity)
+        # Slot to write next, and number of samples held.
+        self.head = 0
+        self.count = 0
+        self.update_scheduled = False
+
+    def __len__(self):
+        return self.count
+
+    def append(self, x, y):
+        """Append a sample, or arrays of samples, oldest first.
+
+        The curve is updated in the next event loop iteration.
+        """
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=float).ravel(), np.asarray(y, dtype=float).ravel())
+        x = x[-self.capacity:]
+        y = y[-self.capacity:]
+        slots = (self.head + np.arange(len(x))) % self.capacity
+        for buffer, values in ((self.x, x), (self.y, y)):
+            buffer[slots] = values
+            buffer[slots + self.capacity] = values
+        self.head = (self.head + len(x)) % self.capacity
+        self.count = min(self.count + len(x), self.capacity)
+        self.scheduleUpdate()
+
+    def data(self):
+        """Return (x, y) from oldest to newest. They are views of the buffer."""
+        start = self.head if self.count == self.capacity else 0
+        return self.x[start:start + self.count], self.y[start:start + self.count]
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+        self.scheduleUpdate()
+
+    def setCapacity(self, capacity):
+        """Change capacity, keeping the latest samples."""
+        x, y = self.data()
+        x = x[-capacity:].copy()
+        y = y[-capacity:].copy()
+        self.capacity = capacity
+        self.x = np.zeros(2 * capacity)
+        self.y = np.zeros(2 * capacity)
+        self.head = 0
+        self.count = 0
+        self.append(x, y)
+
+    def scheduleUpdate(self):
+        """Update the curve in the next event loop iteration (if not already scheduled)."""
+        if not self.update_scheduled:
+            self.update_scheduled = True
+            QtCore.QTimer.singleShot(0, self.update)
+
+    def update(self):
+        """Give the curve the current samples, and scroll its view if following."""
+        self.update_scheduled = False
+        x, y = self.data()
+        self.item.setData(x, y)
+        view = self.item.getViewBox()
+        if self.follow is not None and view is not None and self.count > 0:
+            view.setXRange(x[-1] - self.follow, x[-1], padding=0)
@@ -0,0 +1,45 @@
+import sys
+import time
+
+import numpy as np
+import pyqtgraph_extensions as pgx
+
+
+def test_lazy_buttons(qtbot):
+    plt = pgx.AlignedPlot()
+    axis = plt.getAxis('left')
+    assert axis.set_lmt_btns == [] and axis.enable_auto_range_btn is None
+    axis.mouseHovering = True
+    axis.updateButtons()
+    assert len(axis.set_lmt_btns) == 2 and axis.enable_auto_range_btn.isVisible()
+    # Pixmaps are shared between axes.
+    other = pgx.AlignedPlot().getAxis('left')
+    other.mouseHovering = True
+    other.updateButtons()
+    assert other.set_lmt_btns[0].pixmap is axis.set_lmt_btns[0].pixmap
+    # Panning doesn't swap the pixmap; toggling autorange does.
+    plt.getViewBox().setYRange(0, 1)
+    assert axis.auto_range_enabled is False
+    pixmap = axis.enable_auto_range_btn.pixmap
+    plt.getViewBox().setYRange(1, 2)
+    assert axis.enable_auto_range_btn.pixmap is pixmap
+    plt.getViewBox().enableAutoRange()
+    assert axis.enable_auto_range_btn.pixmap is pgx.get_icon_pixmap('autorange_toggle_on')
+
+
+def test_TimeAxisItem(qtbot):
+    axis = pgx.TimeAxisItem('bottom')
+    values = [1.5e9 + n * 3600 for n in range(5)]
+    assert axis.tickStrings(values, 1, 3600) == [time.strftime('%H:%M:%S', time.localtime(v)) for v in values]
+    values = [1.5e9 + n * 86400 * 40 for n in range(5)]
+    assert axis.tickStrings(values, 1, 86400 * 40) == [time.strftime('%b', time.localtime(v)) for v in values]
+    assert axis.tickStrings([], 1, 1) == []
+    # Repeated ticks come from the cache.
+    assert (1500000000 * 10 ** 9, '%b', 'local') in sys.modules['pyqtgraph_extensions.AxisItem']._tick_strings
+    # Nanosecond timestamps relative to an offset, in a named timezone.
+    offset = 1500000000123456789
+    axis = pgx.TimeAxisItem('bottom', tz='Europe/London', epoch_offset=offset)
+    values = axis.toAxisValues(offset + np.array([0, 100, 200]))
+    assert list(values) == [0, 1e-7, 2e-7]
+    assert axis.tickStrings(values, 1, 1e-7) == ['03:40:00.1234567', '03:40:00.1234568', '03:40:00.1234569']
+    assert axis.tickStrings([1e10], 1, 1) == ['']
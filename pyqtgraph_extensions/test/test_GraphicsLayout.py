@@ -0,0 +1,48 @@
+import pyqtgraph_extensions as pgx
+
+
+def test_addAlignedPlotGrid(qtbot):
+    glw = pgx.GraphicsLayoutWidget(size=(600, 600))
+    qtbot.addWidget(glw)
+    grid = glw.addAlignedPlotGrid(2, 3)
+    assert len(grid) == 2 and len(grid[0]) == 3
+    reference = pgx.GraphicsLayoutWidget(size=(600, 600))
+    qtbot.addWidget(reference)
+    for row in range(2):
+        for col in range(3):
+            plot = reference.addAlignedPlot()
+        reference.nextRows()
+    glw.show()
+    reference.show()
+    qtbot.waitExposed(glw)
+    # Same arrangement as adding one by one.
+    assert grid[1][2].vb.geometry() == plot.vb.geometry()
+    # Next plot goes below the grid.
+    assert glw.addAlignedPlot().vb.geometry().top() > grid[1][0].vb.geometry().bottom()
+
+
+def test_batch(qtbot):
+    glw = pgx.GraphicsLayoutWidget()
+    qtbot.addWidget(glw)
+    with glw.batch():
+        with glw.batch():
+            glw.addAlignedPlot()
+        assert glw.ci.batch_depth == 1
+        glw.addAlignedPlot()
+    assert glw.ci.batch_depth == 0
+
+
+def test_batch_exception(qtbot):
+    glw = pgx.GraphicsLayoutWidget(size=(600, 600))
+    qtbot.addWidget(glw)
+    try:
+        with glw.batch():
+            plot = glw.addAlignedPlot()
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert glw.ci.batch_depth == 0
+    # Laid out on exit, and later items are laid out as added.
+    assert plot.vb.geometry().width() > 0
+    glw.nextRows()
+    assert glw.addAlignedPlot().vb.geometry().top() > plot.vb.geometry().bottom()
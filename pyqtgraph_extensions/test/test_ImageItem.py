@@ -36,3 +36,133 @@ def test_nans(qtbot):
 # im.setRect(pg.axes_to_rect(x,y))
 # #im.setLookupTable(pg.get_colormap_lut())
 # plt.addItem(im)
+
+
+def test_set_colormap(qtbot):
+    images = [pge.ImageItem(np.random.random((20, 30))) for _ in range(3)]
+    cb = pge.ColorBarItem(images=images)
+    lut = pge.get_colormap_lut('bipolar')
+    cb.setColormap(lut=lut, levels=(0.2, 0.8))
+    for image in images:
+        assert image.lut is lut
+        assert np.allclose(image.levels, (0.2, 0.8))
+        # Rendered when next painted.
+        assert image._renderRequired
+        paint_to_array(image)
+        assert not image._renderRequired
+
+
+def paint_to_array(item):
+    """Paint item into an ARGB32 array of its display size."""
+    rect = item.boundingRect()
+    qimage = pg.QtGui.QImage(int(rect.width()), int(rect.height()), pg.QtGui.QImage.Format.Format_ARGB32)
+    qimage.fill(0)
+    painter = pg.QtGui.QPainter(qimage)
+    item.paint(painter)
+    painter.end()
+    ptr = qimage.constBits()
+    ptr.setsize(qimage.sizeInBytes())
+    return np.frombuffer(ptr, np.ubyte).reshape(qimage.height(), qimage.width(), 4).copy()
+
+
+def test_integer_lut(qtbot):
+    lut = np.array(pge.get_colormap_lut(), dtype=np.ubyte)
+    for dtype, lut in ((np.uint8, None), (np.uint16, lut), (np.uint16, np.repeat(lut, 2, 0))):
+        data = np.random.randint(0, np.iinfo(dtype).max + 1, (40, 30)).astype(dtype)
+        painted = []
+        for integer_lut in (False, True):
+            im = pge.ImageItem(data, integer_lut=integer_lut, lut=lut, levels=(10, 200))
+            painted.append(paint_to_array(im))
+            assert (im.composite_lut is not None) == integer_lut
+        assert np.array_equal(*painted)
+    # Changing levels rebuilds the composite table.
+    im.setLevels((0, 100))
+    paint_to_array(im)
+    assert im.composite_lut_key[2:] == (0, 100)
+
+
+def test_threaded_render(qtbot):
+    data = np.random.random((60, 50))
+    data[3, 4] = np.nan
+    lut = np.array(pge.get_colormap_lut(), dtype=np.ubyte)
+    reference = paint_to_array(pge.ImageItem(data, lut=lut, levels=(0.2, 0.8)))
+    im = pge.ImageItem(data, lut=lut, levels=(0.2, 0.8), threaded_render=True)
+    assert not paint_to_array(im).any()  # nothing rendered yet
+    qtbot.waitUntil(lambda: not im.render_in_flight)
+    assert np.array_equal(paint_to_array(im), reference)
+    # Retains levels like synchronous mode.
+    im.setImage(data * 2, autoLevels=False)
+    assert np.allclose(im.levels, (0.2, 0.8))
+    # Images set while rendering are coalesced.
+    for n in range(5):
+        im.setImage(data + n, autoLevels=False)
+        im.render()
+    qtbot.waitUntil(lambda: not im.render_in_flight)
+    assert np.array_equal(paint_to_array(im), paint_to_array(pge.ImageItem(data + 4, lut=lut, levels=(0.2, 0.8))))
+
+
+def test_threaded_render_shape_change(qtbot):
+    lut = np.array(pge.get_colormap_lut(), dtype=np.ubyte)
+    im = pge.ImageItem(np.random.random((60, 50)), lut=lut, levels=(0, 1), threaded_render=True)
+    im.render()
+    qtbot.waitUntil(lambda: not im.render_in_flight)
+    data = np.random.random((30, 80))
+    im.setImage(data, autoLevels=False)
+    # The previous render, of another shape, isn't painted stretched to the new one.
+    assert not paint_to_array(im).any()
+    qtbot.waitUntil(lambda: not im.render_in_flight)
+    assert np.array_equal(paint_to_array(im), paint_to_array(pge.ImageItem(data, lut=lut, levels=(0, 1))))
+
+
+def test_shared_frames(qtbot, tmp_path):
+    ring = pge.SharedFrameRing((40, 30), np.uint16, 3)
+    try:
+        consumer = pge.SharedFrameRing.attach(ring.spec)
+        im = pge.ImageItem(levels=(0, 100))
+        slots = []
+        for n in range(3):
+            slot = ring.acquire()
+            ring.frame(slot)[:] = n
+            ring.publish(slot)
+            frame = consumer.frame(slot)
+            im.setImage(frame, release=consumer.release_callback(slot))
+            assert np.shares_memory(im.image, frame)
+            slots.append(slot)
+        # All but the displayed frame have been returned to the producer.
+        assert [ring.states[slot] for slot in slots] == [ring.FREE, ring.FREE, ring.READY]
+        assert ring.acquire() is not None and ring.acquire() is not None and ring.acquire() is None
+        im.clear()
+        assert ring.states[slots[-1]] == ring.FREE
+        consumer.close()
+    finally:
+        ring.close()
+        ring.unlink()
+    # Memory maps are viewed, not copied.
+    mm = np.memmap(tmp_path / 'image.dat', np.float32, 'w+', shape=(40, 30))
+    im.setImage(mm)
+    assert np.shares_memory(im.image, mm)
+
+
+def test_release_after_threaded_render(qtbot):
+    released = []
+    im = pge.ImageItem(np.zeros((50, 50)), levels=(0, 1), threaded_render=True, release=lambda: released.append(0))
+    im.render()
+    assert im.render_in_flight
+    im.setImage(np.ones((50, 50)), release=lambda: released.append(1))
+    # Worker may still be reading the first image.
+    assert released == []
+    qtbot.waitUntil(lambda: not im.render_in_flight)
+    assert released == [0]
+
+
+def test_integer_lut_switching(qtbot):
+    # Alternating between composite and makeARGB (for RGBA images) rendering of
+    # images of the same size, with a new lookup table each time.
+    rgba = np.random.random((40, 30, 4))
+    integers = np.random.randint(0, 256, (40, 30)).astype(np.uint8)
+    im = pge.ImageItem(integer_lut=True)
+    for data, levels in ((rgba, (0, 1)), (integers, (10, 200)), (rgba, (0, 1))):
+        lut = None if data is rgba else np.array(pge.get_colormap_lut(), dtype=np.ubyte)
+        im.setImage(data, autoLevels=False, lut=lut, levels=levels)
+        reference = pge.ImageItem(data, lut=lut, levels=levels)
+        assert np.array_equal(paint_to_array(im), paint_to_array(reference))
@@ -0,0 +1,42 @@
+import pyqtgraph as pg
+import pyqtgraph_extensions as pgx
+
+
+def test_incremental_size(qtbot):
+    glw = pgx.GraphicsLayoutWidget()
+    qtbot.addWidget(glw)
+    plt = glw.addAlignedPlot()
+    legends = [plt.addLegend() for _ in range(2)]
+    entries = [(pg.PlotDataItem([0, 1], [n, n]), 'channel %d' % n) for n in range(20)]
+    for entry in entries:
+        legends[0].addItem(*entry)
+    legends[1].addItems(entries)
+    assert legends[0].geometry() == legends[1].geometry()
+    legend = legends[1]
+    width, height = legend.width(), legend.height()
+    legend.addItem(pg.PlotDataItem(), 'a much longer channel name')
+    assert legend.width() > width and legend.height() > height
+    legend.removeItem('a much longer channel name')
+    assert len(legend.items) == 20 and (legend.width(), legend.height()) == (width, height)
+    legend.setTextStyle(size='6pt')
+    assert legend.items[0][1].opts['size'] == '6pt' and legend.height() < height
+    legend.addItem(pg.PlotDataItem(), 'new')
+    assert legend.items[-1][1].opts['size'] == '6pt'
+    legend.clear()
+    assert legend.items == [] and legend.total_height == 0 and len(legend.entry_widths) == 0
+
+
+def test_paged(qtbot):
+    glw = pgx.GraphicsLayoutWidget()
+    qtbot.addWidget(glw)
+    plt = glw.addAlignedPlot()
+    legend = plt.addLegend(page_size=10)
+    curves = [plt.plot([0, 1], [n, n], name='channel %d' % n) for n in range(25)]
+    assert [label.text for _, label in legend.items] == ['channel %d' % n for n in range(10)]
+    assert legend.footer.text == '1-10 of 25' and legend.pageCount() == 3
+    legend.setPage(2)
+    assert [label.text for _, label in legend.items] == ['channel %d' % n for n in range(20, 25)]
+    assert legend.footer.text == '21-25 of 25'
+    for curve in curves[5:]:
+        plt.removeItem(curve)
+    assert legend.page == 0 and len(legend.items) == 5 and not legend.footer.isVisible()
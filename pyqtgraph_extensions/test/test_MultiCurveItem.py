@@ -0,0 +1,55 @@
+import numpy as np
+import pyqtgraph as pg
+import pyqtgraph_extensions as pgx
+
+
+def test_MultiCurveItem(qtbot):
+    glw = pgx.GraphicsLayoutWidget()
+    qtbot.addWidget(glw)
+    plt = glw.addAlignedPlot()
+    x = np.arange(50)
+    y = np.sin(x / 5 + np.arange(20)[:, None])
+    pens = [pg.mkPen(color) for color in 'rgb'] * 6 + ['k', 'k']
+    item = pgx.MultiCurveItem(y, x, pens)
+    plt.addItem(item)
+    assert len(item) == 20
+    glw.grab()
+    # Curves are grouped by pen.
+    assert [group['curves'][:2] for group in item.groups] == [[0, 3], [1, 4], [2, 5], [18, 19]]
+    paths = [group['path'] for group in item.groups]
+    assert item.dataBounds(0) == (0, 49)
+
+    # Changing a curve rewrites its slice of its group in place, leaving other groups' paths.
+    red = item.groups[0]
+    buffer = red['y']
+    item.setCurveData(3, np.full(50, 5.))
+    assert red['y'] is buffer and np.array_equal(buffer[50:100], np.full(50, 5.))
+    assert red['path'] is None and item.groups[1]['path'] is paths[1]
+    assert item.dataBounds(1)[1] == 5
+
+    # Hidden curves are excluded from bounds and unconnected in the path.
+    item.setCurveVisible(3, False)
+    assert not item.isCurveVisible(3)
+    assert item.dataBounds(1)[1] <= 1
+    assert not red['connect'][50:100].any()
+    item.setCurveVisible(3, True)
+    assert red['connect'][50:99].all() and not red['connect'][99]
+
+    # Non-finite samples break the curve.
+    yn = y[0].copy()
+    yn[10] = np.nan
+    item.setCurveData(0, yn)
+    assert not red['connect'][9:11].any() and red['connect'][11]
+    glw.grab()
+
+    # Changing length or pen rebuilds when next painted.
+    item.setCurveData(0, np.ones(10), np.arange(10))
+    assert red['stale']
+    item.setCurvePen(19, 'r')
+    assert item.groups is None
+    glw.grab()
+    assert 19 in item.groups[0]['curves'] and len(item.groups[0]['x']) == 10 + 6 * 50
+    item.clearCurve(1)
+    index = item.addCurve(pen='m')
+    assert index == 20 and len(item.getCurveData(index)[1]) == 0
+    glw.grab()
@@ -0,0 +1,34 @@
+import numpy as np
+import pyqtgraph_extensions as pgx
+
+
+def test_PyramidImageItem(qtbot, tmp_path):
+    shape = (3000, 2000)
+    data = np.memmap(tmp_path / 'mosaic.dat', np.float32, 'w+', shape=shape)
+    data[:] = np.arange(shape[1])[None, :] + np.arange(shape[0])[:, None]
+    glw = pgx.GraphicsLayoutWidget()
+    plt = glw.addAlignedPlot()
+    image = plt.image(data, pyramid=True, tile_size=128, cache_bytes=2**21)
+    cbar = glw.addColorBar(image=image, rel_row=2)
+    glw.resize(400, 400)
+    glw.show()
+    qtbot.addWidget(glw)
+    assert max(image.image.shape) <= image.coarsest_size
+    # Whole image in view - coarse level.
+    glw.grab()
+    assert {key[0] for key in image.tiles} == {image.num_levels - 1}
+    # Zoom in to a corner - only a few full resolution tiles drawn.
+    image.clearTiles()
+    plt.setRange(xRange=(0, 100), yRange=(0, 100), padding=0)
+    glw.grab()
+    assert 0 < len(image.tiles) <= 4
+    assert {key[0] for key in image.tiles} == {0}
+    # Levels and lookup table propagate from colour bar.
+    cbar.setColormap(lut=pgx.get_colormap_lut('bipolar'), levels=(10, 20))
+    assert np.allclose(image.levels, (10, 20))
+    assert all(tile['qimage'] is None for tile in image.tiles.values())
+    # Cache stays within budget.
+    for x in range(0, 2000, 200):
+        plt.setRange(xRange=(x, x + 100), yRange=(x, x + 100), padding=0)
+        glw.grab()
+        assert image.tiles_bytes <= image.cache_bytes
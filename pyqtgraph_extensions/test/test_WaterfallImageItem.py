@@ -0,0 +1,13 @@
+import numpy as np
+import pyqtgraph_extensions as pgx
+
+
+def test_transform_after_wrap(qtbot):
+    item = pgx.WaterfallImageItem(capacity=10, levels=(0, 1))
+    for index in range(25):
+        item.append(np.random.random(8), 2 * index)
+    times, _ = item.orderedData()
+    assert np.array_equal(times, 2 * np.arange(15, 25))
+    transform = item.transform()
+    # Rows are centred on their times, 2 apart.
+    assert transform.m22() == 2 and transform.dy() == times[0] - 1
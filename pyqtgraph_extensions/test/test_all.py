@@ -268,17 +268,16 @@ def test_LegendItem(qtbot):
 #     pgx.export(ret_vals[-4],os.path.join(os.path.expanduser('~'),'test'),'png')
 #     pgx.close_all()
 
-def test_export(qtbot):
+def test_export(qtbot, tmp_path):
     ##
     glw = pgx.GraphicsLayoutWidget()
     plt = glw.addAlignedPlot(labels={'left': 'y'})
     plt.plot([1, 2], [3, 4])
     glw.show()
-    try:
-        pgx.export(glw, 'test', 'svg-pdf-png')
-    except FileNotFoundError:
-        # If Inkscape not found, test should pass.
-        pass
+    filename = str(tmp_path / 'test')
+    pgx.export(glw, filename, 'svg-pdf-png')
+    for ext in ('svg', 'pdf', 'png'):
+        assert os.path.getsize(filename + '.' + ext) > 0
     qtbot.addWidget(glw)
 
 
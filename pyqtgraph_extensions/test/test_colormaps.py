@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+import pyqtgraph_extensions as pgx
+
+
+def test_get_colormap_lut():
+    lut = pgx.get_colormap_lut('grey')
+    assert lut.shape == (256, 4)
+    assert np.allclose(lut[:, 0], np.arange(256) / 256 * 255)
+    # A fresh writable copy of the memoised table.
+    lut[1] = 0
+    assert np.allclose(pgx.get_colormap_lut('grey')[1, :3], 255 / 256)
+    assert pgx.get_colormap_lut('grey') is not pgx.get_colormap_lut('grey')
+    shared = pgx.get_colormap_lut_shared('grey')
+    assert pgx.get_colormap_lut_shared('grey') is shared
+    with pytest.raises(ValueError):
+        shared[0] = 0
+    assert pgx.get_colormap_lut('flame', 65536).shape == (65536, 4)
+
+
+def test_register_colormap():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return [(0, 0, 0), (255, 0, 0)]
+
+    pgx.register_colormap('test_red', loader=loader)
+    assert calls == []
+    lut = pgx.get_colormap_lut('test_red', 4096)
+    assert np.allclose(lut[[0, -1]], [(0, 0, 0), (255, 0, 0)])
+    pgx.get_colormap_lut('test_red', 256)
+    assert calls == [1]
+    pgx.register_colormap('test_red', [(0, 0, 0), (0, 255, 0)])
+    assert np.allclose(pgx.get_colormap_lut('test_red', 4096)[-1], (0, 255, 0))
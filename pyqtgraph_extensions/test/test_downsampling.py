@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+import pyqtgraph as pg
+import pyqtgraph_extensions as pgx
+from pyqtgraph_extensions.downsampling import DecimationPyramid, lttb
+
+
+def test_pyramid():
+    y = np.random.default_rng(0).standard_normal(10007)
+    y[100] = np.nan
+    pyramid = DecimationPyramid(y)
+    for level in (0, 2, 3, 6, 20):
+        starts, mins, maxs = pyramid.minmax(123, 9000, level)
+        assert starts[0] <= 123 and starts[-1] + 2 ** level >= 9000
+        for start, mn, mx in zip(starts, mins, maxs):
+            block = y[start:start + 2 ** level]
+            assert mn == np.nanmin(block) and mx == np.nanmax(block)
+
+
+def test_lttb():
+    x = np.linspace(0, 1, 1000)
+    y = np.sin(20 * x)
+    y[500] = 5
+    indices = lttb(x, y, 50)
+    assert len(indices) == 50 and indices[0] == 0 and indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+    # Outliers are kept.
+    assert 500 in indices
+    assert np.array_equal(lttb(x, y, 2000), np.arange(1000))
+
+
+@pytest.mark.parametrize('mode', ['peak', 'lttb'])
+def test_AlignedPlot_downsampling(qtbot, mode):
+    glw = pgx.GraphicsLayoutWidget(size=(400, 300))
+    qtbot.addWidget(glw)
+    plt = glw.addAlignedPlot()
+    x = np.arange(10 ** 6, dtype=float)
+    y = np.random.default_rng(0).standard_normal(len(x))
+    y[654321] = 10
+    curve = plt.plot(x, y)
+    plt.setDownsampling(auto=True, mode=mode)
+    plt.setClipToView(True)
+    # Applied to items added later too.
+    assert plt.plot(x, y).opts['downsampleMethod'] == mode
+    glw.show()
+    qtbot.waitUntil(lambda: len(curve.getData()[0]) < 10 ** 5)
+    xd, yd = curve.getData()
+    assert yd.max() == 10
+    plt.setXRange(6e5, 7e5, padding=0)
+    xd, yd = curve.getData()
+    assert xd[0] >= 5e5 and xd[-1] <= 8e5 and yd.max() == 10
+    with pytest.raises(ValueError):
+        plt.setDownsampling(mode='fancy')
+    with pytest.raises(ValueError):
+        plt.setDownsampling(ds=0)
+    # Invalid arguments leave the settings unchanged.
+    assert plt.downsampling == (1, True, mode)
+    assert plt.plot(x, y).opts['downsampleMethod'] == mode
+
+
+def test_downsampling_hysteresis(qtbot, monkeypatch):
+    glw = pgx.GraphicsLayoutWidget(size=(400, 300))
+    qtbot.addWidget(glw)
+    plt = glw.addAlignedPlot()
+    x = np.arange(10 ** 6, dtype=float)
+    curve = plt.plot(x, np.random.default_rng(0).standard_normal(len(x)))
+    plt.setDownsampling(auto=True, mode='peak')
+    glw.show()
+    qtbot.waitUntil(lambda: curve._adsLastValue > 100)
+    qtbot.wait(100)
+    curve._datasetDisplay = None
+    curve.getData()
+    # A nearby factor keeps the previous one, as pyqtgraph does.
+    last = curve._adsLastValue + 5
+    curve._adsLastValue = last
+    curve._datasetDisplay = None
+    factors = []
+    peak = DecimationPyramid.peak
+    monkeypatch.setattr(DecimationPyramid, 'peak', lambda self, x, start, stop, ds: factors.append(ds) or
+                        peak(self, x, start, stop, ds))
+    curve.getData()
+    assert factors == [last] and curve._adsLastValue == last
+
+
+def test_lttb_unsupported(qtbot):
+    glw = pgx.GraphicsLayoutWidget()
+    qtbot.addWidget(glw)
+    plt = glw.addAlignedPlot()
+    plt.setDownsampling(auto=True, mode='lttb')
+    item = pg.PlotDataItem(np.arange(10))
+    with pytest.warns(UserWarning, match='lttb'):
+        plt.addItem(item)
+    assert item.opts['downsampleMethod'] == 'peak'
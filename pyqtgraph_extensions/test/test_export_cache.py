@@ -0,0 +1,115 @@
+import os
+import time
+
+import numpy as np
+import pytest
+import pyqtgraph_extensions as pgx
+from pyqtgraph import QtGui
+
+
+def test_scene_fingerprint(qtbot):
+    glw = pgx.GraphicsLayoutWidget()
+    qtbot.addWidget(glw)
+    plt = glw.addAlignedPlot(labels={'left': 'y'})
+    image = plt.image(np.arange(12.).reshape(3, 4), levels=(0, 12))
+    curve = plt.plot([1, 2], [3, 4], pen='r')
+    scene = pgx.export_item(glw)
+
+    def fingerprint(*options):
+        return pgx.scene_fingerprint(scene, scene.sceneRect(), *options)
+
+    key = fingerprint('pdf')
+    assert fingerprint('pdf') == key
+    changed = [fingerprint('png')]
+    curve.setData([1, 2], [3, 5])
+    changed.append(fingerprint('pdf'))
+    curve.setPen('b')
+    changed.append(fingerprint('pdf'))
+    image.setLevels((0, 10))
+    changed.append(fingerprint('pdf'))
+    plt.setLabel('left', 'z')
+    changed.append(fingerprint('pdf'))
+    assert len(set(changed + [key])) == len(changed) + 1
+
+
+def test_export_cache(qtbot, tmp_path, monkeypatch):
+    glw = pgx.GraphicsLayoutWidget()
+    qtbot.addWidget(glw)
+    plt = glw.addAlignedPlot()
+    curve = plt.plot(np.random.random(100))
+    cache = pgx.ExportCache(str(tmp_path / 'cache'))
+    filename = str(tmp_path / 'figure')
+    pgx.export(glw, filename, 'svg-pdf-png', cache=cache)
+    assert len(cache.entries()) == 3
+    pdf = open(filename + '.pdf', 'rb').read()
+    os.remove(filename + '.pdf')
+
+    # Unchanged figure is copied from the cache without rendering.
+    def fail(*args, **kwargs):
+        raise AssertionError('rendered')
+    monkeypatch.setattr(pgx.NativeExporter, 'paint', fail)
+    pgx.export(glw, filename, 'svg-pdf-png', cache=cache)
+    assert open(filename + '.pdf', 'rb').read() == pdf
+    monkeypatch.undo()
+    data = pgx.export_bytes(glw, 'png', cache=cache)
+    assert len(cache.entries()) == 4
+    monkeypatch.setattr(pgx.NativeExporter, 'paint', fail)
+    assert pgx.export_bytes(glw, 'png', cache=cache) == data
+    monkeypatch.undo()
+
+    # Changed figure is rendered again.
+    curve.setData(np.random.random(100))
+    pgx.export(glw, filename, 'pdf', cache=cache)
+    assert len(cache.entries()) == 5
+
+    # Least recently used are evicted.
+    entries = sorted(cache.entries())
+    old = entries[0][2]
+    os.utime(old, (time.time() - 100, time.time() - 100))
+    cache.max_bytes = cache.size() - 1
+    cache.evict()
+    assert not os.path.exists(old) and len(cache.entries()) == 4
+
+
+def test_scene_fingerprint_styles(qtbot):
+    glw = pgx.GraphicsLayoutWidget()
+    qtbot.addWidget(glw)
+    plt = glw.addAlignedPlot()
+    image = plt.image(np.arange(12.).reshape(3, 4), levels=(0, 12))
+    curve = plt.plot([1, 2], [3, 4], symbol='o')
+    scene = pgx.export_item(glw)
+
+    def fingerprint():
+        return pgx.scene_fingerprint(scene, scene.sceneRect())
+
+    keys = [fingerprint()]
+    image.setCompositionMode(QtGui.QPainter.CompositionMode.CompositionMode_Plus)
+    keys.append(fingerprint())
+    symbol = QtGui.QPainterPath()
+    symbol.addRect(-0.5, -0.5, 1, 1)
+    curve.setSymbol(symbol)
+    keys.append(fingerprint())
+    symbol = QtGui.QPainterPath()
+    symbol.addEllipse(-0.5, -0.5, 1, 1)
+    curve.setSymbol(symbol)
+    keys.append(fingerprint())
+    assert len(set(keys)) == len(keys)
+
+
+def test_uncacheable(qtbot, tmp_path):
+    glw = pgx.GraphicsLayoutWidget()
+    qtbot.addWidget(glw)
+    plt = glw.addAlignedPlot()
+    curve = plt.plot([1, 2], [3, 4])
+    curve.opts['unknown'] = object()
+    scene = pgx.export_item(glw)
+    with pytest.raises(pgx.UncacheableError):
+        pgx.scene_fingerprint(scene, scene.sceneRect())
+
+    # Exported without the cache.
+    cache = pgx.ExportCache(str(tmp_path / 'cache'))
+    filename = str(tmp_path / 'figure')
+    pgx.export(glw, filename, 'pdf', cache=cache)
+    assert os.path.exists(filename + '.pdf')
+    assert pgx.export_bytes(glw, 'png', cache=cache)
+    assert cache.entries() == []
@@ -0,0 +1,147 @@
+import io
+import os
+import re
+
+import numpy as np
+import pyqtgraph as pg
+import pyqtgraph_extensions as pgx
+
+
+def make_figure(qtbot):
+    glw = pgx.GraphicsLayoutWidget()
+    qtbot.addWidget(glw)
+    plt = glw.addAlignedPlot(labels={'left': 'y'})
+    plt.image(np.random.random((8, 8)))
+    plt.plot([1, 2], [3, 4])
+    glw.resize(450, 270)
+    return glw
+
+
+def test_native_pdf(qtbot):
+    glw = make_figure(qtbot)
+    item = pgx.export_item(glw)
+    exporter = pgx.NativeExporter(item)
+    assert np.allclose(exporter.physicalSize(), (5, 3))
+    data = exporter.pdfBytes()
+    assert re.search(rb'/MediaBox \[0 0 360\.0+ 216\.0+\]', data)
+    # Bitmaps are lossless and not interpolated.
+    assert b'/Subtype /Image' in data and b'/DCTDecode' not in data and b'/Interpolate' not in data
+    exporter = pgx.NativeExporter(item, width=2, interpolate=True)
+    data = exporter.pdfBytes()
+    assert re.search(rb'/MediaBox \[0 0 144\.0+ 86\.0+\]', data) and b'/Interpolate true' in data
+    # The cross-reference table is unchanged by the patch.
+    offset = int(re.search(rb'startxref\s+(\d+)', data).group(1))
+    assert data[offset:offset + 4] == b'xref'
+
+
+def test_native_svg_image(qtbot):
+    glw = make_figure(qtbot)
+    exporter = pgx.NativeExporter(pgx.export_item(glw), dpi=180)
+    svg = exporter.svgBytes().decode()
+    assert 'width="127mm"' in svg and 'image-rendering="optimizeSpeed"' in svg
+    image = exporter.toImage()
+    assert (image.width(), image.height()) == (900, 540)
+    assert round(image.dotsPerMeterX() * 0.0254) == 180
+    # Background is that of the view.
+    assert image.pixelColor(0, 0) == pg.mkColor('w')
+
+
+def build_figure(num_points):
+    glw = pgx.GraphicsLayoutWidget()
+    glw.addAlignedPlot().plot(np.arange(num_points) ** 2)
+    glw.resize(200, 150)
+    return glw
+
+
+def test_export_batch(qtbot, tmp_path):
+    specs = [pgx.ExportSpec(build_figure, str(tmp_path / ('figure%d' % n)), 'pdf', (10 * n,)) for n in range(1, 4)]
+    # Failures are reported, not raised.
+    specs.append((build_figure, str(tmp_path / 'bad'), 'pdf', ('ten',)))
+    completed = []
+    results = pgx.export_batch(specs, workers=2, callback=completed.append)
+    assert sorted(completed) == results and [result.index for result in results] == [0, 1, 2, 3]
+    for result in results[:3]:
+        assert result.error is None and result.seconds > 0
+        assert (tmp_path / (os.path.basename(result.filename) + '.pdf')).stat().st_size > 0
+    assert 'TypeError' in results[3].error
+    # In process.
+    results = pgx.export_batch(specs[:1], workers=0)
+    assert results[0].error is None
+
+
+def build_crashing_figure():
+    os._exit(1)
+
+
+def test_export_batch_worker_crash(qtbot, tmp_path):
+    specs = [pgx.ExportSpec(build_figure, str(tmp_path / ('figure%d' % n)), 'pdf', (10 * n,)) for n in range(1, 4)]
+    specs.insert(1, pgx.ExportSpec(build_crashing_figure, str(tmp_path / 'crash'), 'pdf'))
+    results = pgx.export_batch(specs, workers=2)
+    assert [result.index for result in results] == [0, 1, 2, 3]
+    assert 'died' in results[1].error
+    for result in results[0:1] + results[2:]:
+        assert result.error is None
+
+
+def test_export_bytes(qtbot, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    glw = make_figure(qtbot)
+    png = pgx.export_bytes(glw, 'png')
+    assert png.startswith(b'\x89PNG')
+    image = pg.QtGui.QImage.fromData(png)
+    assert (image.width(), image.height()) == (450, 270)
+    # The exporter and its image are reused.
+    exporter = glw.scene()._native_exporter
+    qimage = exporter.image
+    assert pgx.export_bytes(glw, 'png') == png and exporter.image is qimage
+    assert pgx.export_bytes(glw, 'svg').startswith(b'<?xml')
+    assert pgx.export_bytes(glw, 'pdf', width=2).startswith(b'%PDF')
+    assert glw.scene()._native_exporter is exporter
+    fileobj = io.BytesIO()
+    pgx.export_to(glw, fileobj, 'png')
+    assert fileobj.getvalue() == png
+    buffer = pg.QtCore.QBuffer()
+    buffer.open(pg.QtCore.QIODevice.OpenModeFlag.WriteOnly)
+    pgx.export_to(glw, buffer, 'jpg', dpi=45)
+    assert pg.QtGui.QImage.fromData(bytes(buffer.data())).width() == 225
+    assert os.listdir(tmp_path) == []
+
+
+def test_tiled_export(qtbot, tmp_path):
+    glw = make_figure(qtbot)
+    item = pgx.export_item(glw)
+    image = pgx.NativeExporter(item, dpi=45).toImage()
+    expected = pg.imageToArray(image).astype(int)
+    for ext in ('png', 'tif'):
+        filename = str(tmp_path / ('tiled.' + ext))
+        # Tiles don't divide the 225 x 135 image.
+        pgx.export_tiled(glw, filename, tile_size=64, dpi=45)
+        image = pg.QtGui.QImage(filename)
+        assert (image.width(), image.height()) == (225, 135)
+        assert round(image.dotsPerMeterX() * 0.0254) == 45
+        image = image.convertToFormat(pg.QtGui.QImage.Format.Format_ARGB32)
+        # Antialiased edges may differ slightly where tiles meet.
+        difference = abs(pg.imageToArray(image).astype(int) - expected)
+        assert np.mean(difference) < 0.5 and np.percentile(difference, 99) <= 8
+    pgx.export(glw, str(tmp_path / 'fig'), 'png', fmt_opts={'tile_size': 100})
+    assert pg.QtGui.QImage(str(tmp_path / 'fig.png')).width() == 450
+
+
+def test_export_svg_backend(qtbot, tmp_path, monkeypatch):
+    glw = make_figure(qtbot)
+    filename = str(tmp_path / 'figure')
+    exported = []
+
+    class SVGExporter:
+        def __init__(self, item):
+            pass
+
+        def export(self, fileName):
+            exported.append(fileName)
+
+    # Plain SVG comes from pyqtgraph's SVGExporter unless the native backend is asked for.
+    monkeypatch.setattr(pgx.exporting, 'SVGExporter', SVGExporter)
+    pgx.export(glw, filename, 'svg')
+    assert exported == [filename + '.svg']
+    pgx.export(glw, filename, 'svg', fmt_opts={'backend': 'native'})
+    assert len(exported) == 1 and open(filename + '.svg', 'rb').read().startswith(b'<?xml')
@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+
+import pyqtgraph_extensions as pgx
+
+# Budget for the time spent importing pyqtgraph_extensions' own modules, excluding
+# pyqtgraph and other dependencies.
+IMPORT_BUDGET_MS = 100
+
+
+def import_times(module):
+    """Import module in a fresh interpreter and return dict of module name to self import time in ms."""
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(pgx.__file__)))
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module], env=env,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:'):
+            self_us, _, name = line[len('import time:'):].split('|')
+            if self_us.strip().isdigit():
+                times[name.strip()] = int(self_us) / 1e3
+    return times
+
+
+def test_import_time():
+    times = import_times('pyqtgraph_extended')
+    for name in ('pyqtgraph_extensions.AlignedPlot', 'pyqtgraph_extensions.GraphicsLayout', 'pyqtgraph.exporters',
+                 'pyqtgraph.opengl', 'pyqtgraph_recipes'):
+        assert name not in times
+    own = sum(time for name, time in times.items() if name.split('.')[0] in ('pyqtgraph_extensions', 'pyqtgraph_extended'))
+    assert own < IMPORT_BUDGET_MS
+
+
+def test_lazy_names():
+    assert 'AlignedPlotItem' in dir(pgx)
+    assert pgx.AlignedPlotItem is pgx.AlignedPlot
+    assert isinstance(pgx.AlignedPlot, type) and isinstance(pgx.GraphicsLayout, type)
+    assert pgx.axes_to_rect([0, 1], [0, 1]).width() == 2
+
+
+def test_lazy_names_after_submodule_import():
+    # Importing a submodule binds it as a package attribute, which mustn't hide its class.
+    code = ('import pyqtgraph_extensions.AlignedPlot, pyqtgraph_extensions.GraphicsLayout\n'
+            'import pyqtgraph_extensions as pgx\n'
+            'assert isinstance(pgx.AlignedPlot, type) and isinstance(pgx.GraphicsLayout, type)\n'
+            'namespace = {}\n'
+            'exec("from pyqtgraph_extensions import *", namespace)\n'
+            'for name in ("AlignedPlot", "GraphicsLayoutWidget", "axes_to_rect", "ImageItem"):\n'
+            '    assert callable(namespace[name]), name\n')
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(pgx.__file__)))
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    subprocess.run([sys.executable, '-c', code], env=env, check=True)
+
+
+def test_pyqtgraph_extended_star_import():
+    code = ('import pyqtgraph_extensions as pgx\n'
+            'namespace = {}\n'
+            'exec("from pyqtgraph_extended import *", namespace)\n'
+            'for name in ("GraphicsLayoutWidget", "AlignedPlot", "export", "axes_to_rect", "ImageItem"):\n'
+            '    assert namespace[name] is getattr(pgx, name), name\n'
+            'assert "PlotWidget" in namespace and "mkQApp" in namespace\n')
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(pgx.__file__)))
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    subprocess.run([sys.executable, '-c', code], env=env, check=True)
@@ -0,0 +1,74 @@
+"""Memory regression tests - repeatedly creating and removing items and plots must
+not accumulate objects or memory."""
+import gc
+import os
+
+import numpy as np
+import pytest
+import pyqtgraph as pg
+from pyqtgraph import QtWidgets
+import pyqtgraph_extensions as pgx
+
+
+def count(cls):
+    gc.collect()
+    return sum(isinstance(o, cls) for o in gc.get_objects())
+
+
+def rss():
+    """Resident set size in bytes, or None if unknown."""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return None
+
+
+def assert_flat(make, num, max_rss_growth=20e6):
+    """Call make num times in two halves, checking object counts and RSS don't grow in the second."""
+    classes = pg.PlotDataItem, pg.ImageItem, pg.ViewBox, pg.AxisItem, pg.ItemSample, pg.LabelItem
+    for _ in range(num // 2):
+        make()
+    QtWidgets.QApplication.processEvents()
+    counts = [count(cls) for cls in classes]
+    rss0 = rss()
+    for _ in range(num - num // 2):
+        make()
+    QtWidgets.QApplication.processEvents()
+    assert [count(cls) for cls in classes] == counts
+    if rss0 is not None:
+        assert rss() - rss0 < max_rss_growth
+
+
+def test_plot_clear(qtbot):
+    glw = pgx.GraphicsLayoutWidget()
+    qtbot.addWidget(glw)
+    plt = glw.addAlignedPlot()
+    plt.addLegend()
+    x = np.arange(1000)
+
+    def make():
+        plt.plot(x, x ** 2, name='curve', clear=True)
+        plt.plot(x, -x, name='other')
+        plt.image(np.zeros((100, 100)))
+        plt.stream('stream', 100).append(x, x)
+
+    assert_flat(make, 1000)
+    assert len(plt.items) == 4 and len(plt.legend.items) == 3 and len(plt.streams) == 1
+    plt.clear()
+    assert plt.items == [] and plt.legend.items == [] and plt.streams == {}
+
+
+def test_close(qtbot):
+    glw = pgx.GraphicsLayoutWidget()
+    qtbot.addWidget(glw)
+    x = np.arange(100)
+
+    def make():
+        plt = glw.addAlignedPlot(title='title')
+        plt.addLegend()
+        plt.plot(x, x, name='curve')
+        plt.close()
+
+    assert_flat(make, 500)
+    assert glw.ci.items == {}
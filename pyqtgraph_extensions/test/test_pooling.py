@@ -0,0 +1,48 @@
+import numpy as np
+import pyqtgraph_extensions as pgx
+
+
+def test_pooling(qtbot):
+    glw = pgx.GraphicsLayoutWidget()
+    qtbot.addWidget(glw)
+    plt = glw.addAlignedPlot()
+    plt.addLegend()
+    plt.setPooling()
+    x = np.arange(10)
+    curve = plt.plot(x, x, pen='r', name='a', clear=True)
+    other = plt.plot(x, -x, pen='b', name='b')
+    image = plt.image(np.zeros((5, 5)), levels=(0, 1))
+
+    # Same styles - items are reused, in any order.
+    assert plt.plot(x, 2 * x, pen='b', name='b', clear=True) is other
+    assert plt.plot(x, 3 * x, pen='r', name='a') is curve
+    assert np.array_equal(curve.getData()[1], 3 * x)
+    assert plt.image(np.ones((5, 5)), levels=(0, 2)) is image
+    assert np.array_equal(image.image, np.ones((5, 5))) and list(image.getLevels()) == [0, 2]
+    assert plt.items == [other, curve, image] and [label.text for _, label in plt.legend.items] == ['b', 'a']
+
+    # Different style - new item, and unused ones are hidden.
+    new = plt.plot(x, x, pen='g', name='c', clear=True)
+    assert new not in (curve, other)
+    assert plt.items == [new] and [label.text for _, label in plt.legend.items] == ['c']
+    assert not curve.isVisible() and not image.isVisible() and curve in plt.vb.addedItems
+
+    # Items not reused by the next refresh are removed.
+    plt.plot(x, x, pen='g', name='c', clear=True)
+    assert curve not in plt.vb.addedItems and image not in plt.vb.addedItems
+
+    plt.clear()
+    assert plt.pool == {} and plt.vb.addedItems == []
+
+
+def test_pooling_changing_styles(qtbot):
+    glw = pgx.GraphicsLayoutWidget()
+    qtbot.addWidget(glw)
+    plt = glw.addAlignedPlot()
+    plt.setPooling()
+    x = np.arange(10)
+    for index in range(20):
+        plt.plot(x, x, pen=(index, 20), clear=True)
+        # Unhashable styles aren't pooled.
+        plt.plot(x, x, symbolSize=np.full(10, 5))
+    assert len(plt.vb.addedItems) <= 3
@@ -0,0 +1,30 @@
+import pytest
+import pyqtgraph_extensions as pgx
+
+
+def test_RangeSyncGroup(qtbot):
+    glw = pgx.GraphicsLayoutWidget()
+    qtbot.addWidget(glw)
+    a, b, c = [glw.addAlignedPlot() for _ in range(3)]
+    a.setXRange(0, 10, padding=0)
+    # c's y axis is b's x axis in milliseconds.
+    group = pgx.RangeSyncGroup([(a, 'x'), (b, 'x'), (c, 'y', 1000)])
+    assert group.range == (0, 10) and c.viewRange()[1] == [0, 10000]
+    emitted = []
+    group.sigRangeChanged.connect(emitted.append)
+
+    # Many changes in one event loop iteration are applied once.
+    for n in range(10):
+        b.setXRange(n, n + 5, padding=0)
+    assert a.viewRange()[0] == [0, 10]
+    qtbot.waitUntil(lambda: len(emitted) > 0)
+    assert emitted == [(9, 14)]
+    assert a.viewRange()[0] == [9, 14] and c.viewRange()[1] == pytest.approx([9000, 14000])
+
+    c.setYRange(1000, 2000, padding=0)
+    qtbot.waitUntil(lambda: len(emitted) > 1)
+    assert a.viewRange()[0] == b.viewRange()[0] == pytest.approx([1, 2])
+
+    group.remove(c)
+    group.setRange(3, 4)
+    assert b.viewRange()[0] == [3, 4] and c.viewRange()[1] == pytest.approx([1000, 2000])
@@ -0,0 +1,80 @@
+import numpy as np
+import pyqtgraph as pg
+import pyqtgraph_extensions as pgx
+
+
+def make_data(shape=(300, 200)):
+    data = np.random.random(shape)
+    data[5, 7] = -3
+    data[100, 150] = 4
+    data[0, 0] = float('nan')
+    return data
+
+
+def test_exact():
+    assert pgx.RangeEstimator('exact')(make_data()) == (-3, 4)
+
+
+def test_threaded():
+    estimator = pgx.RangeEstimator('threaded', chunk_size=1000, workers=4)
+    assert estimator(make_data()) == (-3, 4)
+    estimator.close()
+
+
+def test_strided():
+    data = make_data((1000, 1000))
+    mn, mx = pgx.RangeEstimator('strided', max_samples=1000)(data)
+    assert 0 <= mn <= mx <= 1
+    assert pgx.strided_sample(data, 1000).size <= 1000
+
+
+def test_all_nan():
+    assert np.isnan(pgx.nanrange(np.full((3, 3), np.nan))).all()
+
+
+def test_hint(qtbot):
+    im = pgx.ImageItem()
+    cb = pgx.ColorBarItem(image=im)
+    im.setImage(make_data(), range_hint=(-10, 10))
+    cb.flushImageRanges()
+    assert (cb.image_min, cb.image_max) == (-10, 10)
+    assert np.allclose(im.levels, (-10, 10))
+    # Hint applies only to the image it came with.
+    im.setImage(make_data())
+    cb.flushImageRanges()
+    assert (cb.image_min, cb.image_max) == (-3, 4)
+    cb.setRangeMode('threaded', chunk_size=1000)
+    assert (cb.image_min, cb.image_max) == (-3, 4)
+
+
+def test_RangeIndex():
+    index = pgx.RangeIndex()
+    assert index.min() is None and index.max() is None
+    for key in range(100):
+        index.set(key, key, key + 10)
+    assert (index.min(), index.max()) == (0, 109)
+    index.discard(0)
+    index.set(99, 50, 60)
+    assert (index.min(), index.max()) == (1, 108)
+    index.set(5, float('nan'), float('nan'))
+    assert 5 not in index and len(index) == 98
+    for key in range(1000):
+        index.set(1, -key, 0)
+    assert index.min() == -999
+    assert len(index._min_heap) < 1000
+
+
+def test_coalesced_updates(qtbot):
+    images = [pgx.ImageItem(make_data()) for _ in range(5)]
+    cb = pgx.ColorBarItem(images=images)
+    calls = []
+    cb.updateBarLevels = lambda: calls.append(None)
+    for n, image in enumerate(images):
+        image.setImage(make_data() + n, autoLevels=False)
+    assert calls == []
+    qtbot.waitUntil(lambda: len(calls) > 0)
+    assert len(calls) == 1
+    assert (cb.image_min, cb.image_max) == (-3, 8)
+    # Unlinking removes images from the index.
+    cb.setImages(images[:2])
+    assert (cb.image_min, cb.image_max) == (-3, 5)
@@ -0,0 +1,24 @@
+import numpy as np
+import pyqtgraph_extensions as pgx
+
+
+def test_stream(qtbot):
+    glw = pgx.GraphicsLayoutWidget()
+    qtbot.addWidget(glw)
+    plt = glw.addAlignedPlot()
+    stream = plt.stream('signal', 100, follow=10)
+    assert plt.stream('signal') is stream
+    buffers = stream.x, stream.y
+    for n in range(250):
+        stream.append(n, n ** 2)
+    stream.append(np.arange(250, 260), np.arange(250, 260) ** 2)
+    x, y = stream.data()
+    assert np.array_equal(x, np.arange(160, 260)) and np.array_equal(y, x ** 2)
+    # No reallocation, and the curve is updated once in the next event loop iteration.
+    assert stream.x is buffers[0] and stream.y is buffers[1]
+    assert stream.item.getData()[0] is None
+    qtbot.waitUntil(lambda: stream.item.getData()[0] is not None)
+    assert np.array_equal(stream.item.getData()[0], x)
+    assert plt.viewRange()[0] == [249, 259]
+    stream.setCapacity(20)
+    assert np.array_equal(stream.data()[0], np.arange(240, 260))
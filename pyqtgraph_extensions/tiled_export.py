@@ -0,0 +1,293 @@
+"""Exporting large images with bounded memory.
+
+NativeExporter.toImage and pyqtgraph's ImageExporter render the whole figure
+into one QImage, which at poster resolution is gigabytes (4 bytes per pixel)
+before the encoder makes another copy. TiledImageExporter instead renders the
+scene one tile at a time - through the painter's viewport, each tile showing its
+part of the source rectangle - and hands the pixels to a streaming encoder.
+
+PNG is written by PngRowWriter, whose rows must be complete, so a strip of tiles
+(the output width by one tile high) is assembled before it is compressed. TIFF
+is written by TiffTileWriter as a tiled TIFF, so each tile is compressed and
+written as soon as it is rendered. Peak memory is therefore a strip of tiles for
+PNG and a few tiles for TIFF, however large the output.
+"""
+import os
+import struct
+import zlib
+
+import numpy as np
+from pyqtgraph import QtCore, QtGui
+
+from .exporting import NativeExporter, export_item
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def rgba_array(image):
+    """Return (height, width, 4) uint8 array view of an RGBA8888 QImage."""
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    array = np.frombuffer(bits, np.uint8).reshape(image.height(), image.bytesPerLine())
+    return array[:, :image.width() * 4].reshape(image.height(), image.width(), 4)
+
+
+class PngRowWriter:
+    """Writes an RGBA PNG to a binary file row by row.
+
+    Each block of rows is filtered (with the PNG 'up' filter, which suits flat
+    backgrounds and blocky images), compressed and written as it is given, so
+    only the last row and the compressor's window are kept.
+    """
+
+    def __init__(self, file, width, height, dpi=None, level=6):
+        """
+        Args:
+            file: binary file object.
+            width, height (int): in pixels.
+            dpi (float): recorded in the pHYs chunk if given.
+            level (int): zlib compression level.
+        """
+        self.file = file
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        # The 'up' filter of the first row is relative to zeros.
+        self.previous_row = np.zeros(width * 4, np.uint8)
+        self.compressor = zlib.compressobj(level)
+        file.write(PNG_SIGNATURE)
+        self.writeChunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+        if dpi is not None:
+            pixels_per_meter = round(dpi / 0.0254)
+            self.writeChunk(b'pHYs', struct.pack('>IIB', pixels_per_meter, pixels_per_meter, 1))
+
+    def writeChunk(self, kind, data):
+        self.file.write(struct.pack('>I', len(data)) + kind)
+        self.file.write(data)
+        self.file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
+
+    def writeRows(self, rows):
+        """Write (n, width, 4) uint8 array of non-premultiplied RGBA rows."""
+        rows = rows.reshape(len(rows), self.width * 4)
+        filtered = np.empty((len(rows), self.width * 4 + 1), np.uint8)
+        filtered[:, 0] = 2
+        np.subtract(rows[:1], self.previous_row, out=filtered[:1, 1:])
+        np.subtract(rows[1:], rows[:-1], out=filtered[1:, 1:])
+        self.previous_row = rows[-1].copy()
+        data = self.compressor.compress(filtered)
+        if data:
+            self.writeChunk(b'IDAT', data)
+        self.rows_written += len(rows)
+
+    def close(self):
+        assert self.rows_written == self.height
+        self.writeChunk(b'IDAT', self.compressor.flush())
+        self.writeChunk(b'IEND', b'')
+
+
+class TiffTileWriter:
+    """Writes a tiled, deflate-compressed RGBA TIFF to a seekable binary file tile by tile.
+
+    Tiles are written as given. The directory, which lists where they are, is
+    written at the end, so nothing but the tile offsets is kept. The output is
+    classic (32 bit) TIFF, so limited to 4 GB.
+    """
+    SHORT = 3
+    LONG = 4
+    RATIONAL = 5
+    TYPE_FORMATS = {SHORT: 'H', LONG: 'I', RATIONAL: 'II'}
+
+    def __init__(self, file, width, height, tile_size, dpi=None, level=6):
+        """
+        Args:
+            file: seekable binary file object.
+            width, height (int): in pixels.
+            tile_size (int): width and height of tiles, a multiple of 16.
+            dpi (float): recorded as the resolution if given.
+            level (int): zlib compression level.
+        """
+        if tile_size % 16:
+            raise ValueError('TIFF tile size must be a multiple of 16')
+        self.file = file
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.dpi = dpi
+        self.level = level
+        self.start = file.tell()
+        self.offsets = []
+        self.byte_counts = []
+        self.tiles_across = -(-width // tile_size)
+        self.num_tiles = self.tiles_across * -(-height // tile_size)
+        # Byte order, version and offset of the directory, which is filled in by close.
+        file.write(b'II*\x00\x00\x00\x00\x00')
+
+    def tell(self):
+        position = self.file.tell() - self.start
+        if position >= 2 ** 32:
+            raise ValueError('TIFF output exceeds 4 GB')
+        return position
+
+    def writeTile(self, tile):
+        """Write (rows, columns, 4) uint8 array of non-premultiplied RGBA pixels.
+
+        Tiles are in row-major order. Those at the right and bottom edges may be
+        smaller than tile_size - they are padded.
+        """
+        if tile.shape[:2] != (self.tile_size, self.tile_size):
+            padded = np.zeros((self.tile_size, self.tile_size, 4), np.uint8)
+            padded[:tile.shape[0], :tile.shape[1]] = tile
+            tile = padded
+        data = zlib.compress(np.ascontiguousarray(tile), self.level)
+        self.offsets.append(self.tell())
+        self.byte_counts.append(len(data))
+        self.file.write(data)
+
+    def close(self):
+        assert len(self.offsets) == self.num_tiles
+        resolution = (1, 1) if self.dpi is None else (round(self.dpi * 1000), 1000)
+        entries = [(256, self.LONG, [self.width]), (257, self.LONG, [self.height]),
+                   (258, self.SHORT, [8, 8, 8, 8]), (259, self.SHORT, [8]),  # Adobe deflate
+                   (262, self.SHORT, [2]),  # RGB
+                   (277, self.SHORT, [4]), (282, self.RATIONAL, [resolution]), (283, self.RATIONAL, [resolution]),
+                   (284, self.SHORT, [1]),  # contiguous samples
+                   (296, self.SHORT, [2 if self.dpi is not None else 1]),  # inches or none
+                   (322, self.LONG, [self.tile_size]), (323, self.LONG, [self.tile_size]),
+                   (324, self.LONG, self.offsets), (325, self.LONG, self.byte_counts),
+                   (338, self.SHORT, [2])]  # unassociated alpha
+        if self.tell() % 2:
+            self.file.write(b'\x00')
+        directory = self.tell()
+        # Values which don't fit in an entry go after the directory.
+        extra_offset = directory + 2 + 12 * len(entries) + 4
+        packed_entries = []
+        extra = []
+        for tag, kind, values in entries:
+            fmt = self.TYPE_FORMATS[kind]
+            data = struct.pack('<' + fmt * len(values), *np.ravel(values).tolist())
+            if len(data) <= 4:
+                value = data.ljust(4, b'\x00')
+            else:
+                value = struct.pack('<I', extra_offset)
+                extra.append(data)
+                extra_offset += len(data)
+            packed_entries.append(struct.pack('<HHI', tag, kind, len(values)) + value)
+        self.file.write(struct.pack('<H', len(entries)) + b''.join(packed_entries) + b'\x00' * 4)
+        self.file.write(b''.join(extra))
+        if extra_offset >= 2 ** 32:
+            raise ValueError('TIFF output exceeds 4 GB')
+        end = self.file.tell()
+        self.file.seek(self.start + 4)
+        self.file.write(struct.pack('<I', directory))
+        self.file.seek(end)
+
+
+class TiledImageExporter(NativeExporter):
+    """Renders an item or scene to a PNG or TIFF tile by tile, with memory bounded by tile_size.
+
+    Options and sizes are as for NativeExporter.toImage - the output is the same
+    image, to within rounding at tile edges.
+    """
+
+    def __init__(self, item, tile_size=1024, **options):
+        """
+        Args:
+            item: scene or graphics item.
+            tile_size (int): width and height of tiles in pixels. For TIFF it is
+                rounded up to a multiple of 16.
+            options: for NativeExporter.
+        """
+        NativeExporter.__init__(self, item, **options)
+        self.tile_size = tile_size
+
+    def imageSize(self):
+        width, height = self.physicalSize()
+        return round(width * self.dpi), round(height * self.dpi)
+
+    def renderTiles(self, tile_size):
+        """Generate (x, y, array) of tiles in row-major order.
+
+        The array is a (rows, columns, 4) uint8 non-premultiplied RGBA view of an
+        image of the tile.
+        """
+        width, height = self.imageSize()
+        source = self.getSourceRect()
+        scale_x = width / source.width()
+        scale_y = height / source.height()
+        background = self.viewBackground() if self.background is None else self.background
+        tile = QtGui.QImage(tile_size, tile_size, QtGui.QImage.Format.Format_ARGB32_Premultiplied)
+        scene = self.getScene()
+        hint = QtGui.QPainter.RenderHint
+        self.setExportMode(True, {'antialias': self.antialias, 'background': background,
+                                  'resolutionScale': width / self.getTargetRect().width()})
+        try:
+            for y in range(0, height, tile_size):
+                rows = min(tile_size, height - y)
+                for x in range(0, width, tile_size):
+                    columns = min(tile_size, width - x)
+                    tile.fill(QtCore.Qt.GlobalColor.transparent)
+                    painter = QtGui.QPainter(tile)
+                    try:
+                        painter.setRenderHint(hint.Antialiasing, self.antialias)
+                        painter.setRenderHint(hint.TextAntialiasing, self.antialias)
+                        painter.setRenderHint(hint.SmoothPixmapTransform, self.interpolate)
+                        target = QtCore.QRectF(0, 0, columns, rows)
+                        painter.fillRect(target, background)
+                        painter.setClipRect(target)
+                        # The part of the source shown by this tile, so the scene
+                        # only paints the items intersecting it.
+                        part = QtCore.QRectF(source.x() + x / scale_x, source.y() + y / scale_y, columns / scale_x,
+                                             rows / scale_y)
+                        scene.render(painter, target, part, QtCore.Qt.AspectRatioMode.IgnoreAspectRatio)
+                    finally:
+                        painter.end()
+                    rgba = tile.convertToFormat(QtGui.QImage.Format.Format_RGBA8888)
+                    yield x, y, rgba_array(rgba)[:rows, :columns]
+        finally:
+            self.setExportMode(False)
+
+    def writePng(self, file):
+        """Write PNG to binary file object."""
+        width, height = self.imageSize()
+        tile_size = min(self.tile_size, max(width, height))
+        writer = PngRowWriter(file, width, height, self.dpi)
+        strip = np.empty((tile_size, width, 4), np.uint8)
+        for x, y, tile in self.renderTiles(tile_size):
+            strip[:tile.shape[0], x:x + tile.shape[1]] = tile
+            if x + tile.shape[1] == width:
+                writer.writeRows(strip[:tile.shape[0]])
+        writer.close()
+
+    def writeTiff(self, file):
+        """Write tiled TIFF to seekable binary file object."""
+        width, height = self.imageSize()
+        tile_size = -(-min(self.tile_size, max(width, height)) // 16) * 16
+        writer = TiffTileWriter(file, width, height, tile_size, self.dpi)
+        for _, _, tile in self.renderTiles(tile_size):
+            writer.writeTile(tile)
+        writer.close()
+
+    def export(self, fileName=None, toBytes=False, copy=False):
+        """Write to fileName, which must end in .png, .tif or .tiff."""
+        fmt = os.path.splitext(fileName)[1][1:].lower()
+        if fmt not in ('png', 'tif', 'tiff'):
+            raise ValueError('Tiled export is to PNG or TIFF, not %s' % fmt)
+        with open(fileName, 'wb') as file:
+            if fmt == 'png':
+                self.writePng(file)
+            else:
+                self.writeTiff(file)
+
+
+def export_tiled(o, filename, tile_size=1024, **opts):
+    """Export widget/item as a PNG or TIFF (by the extension of filename) without rendering it all at once.
+
+    For high resolution output, e.g. posters, where the image would not fit in
+    memory.
+
+    Args:
+        o: anything export accepts.
+        tile_size (int): width and height of the tiles rendered.
+        opts: options for NativeExporter e.g. dpi, width.
+    """
+    TiledImageExporter(export_item(o), tile_size, **opts).export(filename)
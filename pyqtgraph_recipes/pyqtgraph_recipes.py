@@ -1,4 +1,4 @@
-import math, os
+import functools, math, os
 import numpy as np
 import pyqtgraph_extended as pg
 import mathx
@@ -65,15 +65,24 @@ class ImageWithProjsAlignedPlot:
 
 class ImageWithProjsAligned(ImageWithProjsAlignedPlot):
     """Extends :class:`.ImageWithProjsAlignedPlot' to include the image item and
-    projection curve items."""
+    projection curve items.
+
+    The buffer traces horz_buffers and vert_buffers are each one MultiCurveItem,
+    no longer lists of PlotDataItems - use set_buffer_data, hide_show_buffer and
+    clear_buffer, or the MultiCurveItem's setCurveData etc. with the buffer index,
+    rather than horz_buffers[i].setData.
+    """
 
     def __init__(self, gl=None, cornertexts=None):
         ImageWithProjsAlignedPlot.__init__(self, gl, cornertexts)
         self.image = self.plots['image'].image()
         self.horz_proj = self.plots['horz'].plot()
         self.vert_proj = self.plots['vert'].plot()
-        self.horz_buffers = []
-        self.vert_buffers = []
+        # Overlaid buffer traces, all drawn by one item per plot.
+        self.horz_buffers = pg.MultiCurveItem()
+        self.plots['horz'].addItem(self.horz_buffers)
+        self.vert_buffers = pg.MultiCurveItem()
+        self.plots['vert'].addItem(self.vert_buffers)
         self.cbar.setImage(self.image)
 
     def set(self, x, y, image, horz_proj=None, vert_proj=None, pen=pg.mkPen(), **kwargs):
@@ -84,13 +93,15 @@ class ImageWithProjsAligned(ImageWithProjsAlignedPlot):
         Args:
             x (vector of length m): the x axis
             y (vector of length n): the y axis
-            image (mxn array): the image
+            image (mxn array): the image. Not copied, so can be a np.memmap or a
+                SharedFrameRing frame - pass release to be told when it is free.
             horz_proj (vector of length m): horizontal projection. If None, use
                 sum over y axis of image
             vert_proj (vector of length n): vertical projection. If None, use
                 sum over x axis of image
             pen: passed on to the projection setData methods
             lut: passed on to image setImage method
+            release: passed on to image setImage method
         """
         if any([x is None, y is None, image is None]):
             return
@@ -106,40 +117,45 @@ class ImageWithProjsAligned(ImageWithProjsAlignedPlot):
         self.vert_proj.setData(vert_proj, y, pen=pen)
 
     def add_buffers(self, num, pen_style=pg.QtCore.Qt.PenStyle.SolidLine):
-        pens = [pg.mkPen(color=col, style=pen_style) for col in ['r', 'g', 'b', 'm', 'c', 'y']]
+        colors = ['r', 'g', 'b', 'm', 'c', 'y']
         ret = []
         for i in range(num):
-            self.horz_buffers.append(self.plots['horz'].plot(pen=pens[i]))
-            self.vert_buffers.append(self.plots['vert'].plot(pen=pens[i]))
+            pen = pg.mkPen(color=colors[i % len(colors)], style=pen_style)
+            self.horz_buffers.addCurve(pen=pen)
+            self.vert_buffers.addCurve(pen=pen)
             ret.append(len(self.horz_buffers) - 1)
         return ret  # returns indices of buffers that were just added (to be used in set_buffer_data())
 
     def set_buffer_data(self, indx, x, y, h_data, v_data):
         x = x.squeeze()
         y = y.squeeze()
-        self.vert_buffers[indx].setData(v_data, y)
-        self.horz_buffers[indx].setData(x, h_data)
+        self.vert_buffers.setCurveData(indx, y, v_data)
+        self.horz_buffers.setCurveData(indx, h_data, x)
 
     def hide_show_buffer(self, indx, val):
-        if val:
-            self.vert_buffers[indx].show()
-            self.horz_buffers[indx].show()
-        else:
-            self.vert_buffers[indx].hide()
-            self.horz_buffers[indx].hide()
+        self.vert_buffers.setCurveVisible(indx, val)
+        self.horz_buffers.setCurveVisible(indx, val)
 
     def clear_buffer(self, indx):
-        self.vert_buffers[indx].clear()
-        self.horz_buffers[indx].clear()
+        self.vert_buffers.clearCurve(indx)
+        self.horz_buffers.clearCurve(indx)
 
 
 class ImageWithProjsAndLogAlignedPlot:
     """Plot items for an image, its projections, a colour bar as wells as two
-    additional items for logged (historical) image projections"""
+    additional items for logged (historical) image projections
 
-    def __init__(self, gl=None, cornertexts=None):
-        self.recursion_prevent = False
+    The log items hlog and vlog are WaterfallImageItems, not ImageItems - they
+    hold the history in a circular buffer, so use set_log or append_log rather
+    than ImageItem methods such as setImage.
+    """
 
+    def __init__(self, gl=None, cornertexts=None, log_capacity=1000):
+        """
+        Args:
+            log_capacity (int): number of rows of projection history shown by the
+                log items.
+        """
         def show(plt, axes):
             for axis in axes:
                 plt.showAxis(axis)
@@ -197,17 +213,17 @@ class ImageWithProjsAndLogAlignedPlot:
         self.vproj_log = vproj.plot()
         self.hproj_ref = hproj.plot()
         self.vproj_ref = vproj.plot()
-        self.hlog = hlog.image()
-        self.vlog = vlog.image()
+        self.hlog = pg.WaterfallImageItem(log_capacity, 'horizontal')
+        hlog.addItem(self.hlog)
+        self.vlog = pg.WaterfallImageItem(log_capacity, 'vertical')
+        vlog.addItem(self.vlog)
         self.logimg = logimg.image()
 
-        # link axes and colorbar
-        imageplot.setXLink(hproj)
-        hproj.setXLink(hlog)
-        vlog.sigXRangeChanged.connect(lambda: self.log_time_axis_link('v'))
-        hlog.sigYRangeChanged.connect(lambda: self.log_time_axis_link('h'))
-        imageplot.setYLink(vproj)
-        vproj.setYLink(vlog)
+        # link axes and colorbar. The time axes of the logs are x for the vertical
+        # log and y for the horizontal log.
+        self.range_sync = {'x': pg.RangeSyncGroup([(imageplot, 'x'), (hproj, 'x'), (hlog, 'x')]),
+                           'y': pg.RangeSyncGroup([(imageplot, 'y'), (vproj, 'y'), (vlog, 'y')]),
+                           'time': pg.RangeSyncGroup([(vlog, 'x'), (hlog, 'y')])}
         self.cbar.setImages([self.image])
 
     def set_image(self, x, y, image, pen=pg.mkPen('k'), datetimestr=None, **kwargs):
@@ -228,14 +244,59 @@ class ImageWithProjsAndLogAlignedPlot:
         if datetimestr is not None:
             self.image_cornertext.setText(datetimestr, color='00FF00')
 
-    def set_log(self, x, y, time, h_log, v_log, **kwargs):
+    def set_log(self, x, y, time, h_log, v_log, lut=None, levels=None, **kwargs):
+        """Replace the whole log history.
+
+        Cost is proportional to the length of the history - to add one entry use
+        append_log.
+
+        Args:
+            time (vector of length n): times of log entries.
+            h_log (array): horizontal projections, with axes (x, time) in the
+                column-major image axis order.
+            v_log (array): vertical projections, with axes (time, y) in the
+                column-major image axis order.
+            lut, levels: if not None, applied to the log items. By default levels
+                follow the range of the history.
+            kwargs: other ImageItem.setImage options, of which the log items
+                support only opacity. Others raise TypeError.
+        """
+        unsupported = set(kwargs) - {'opacity'}
+        if unsupported:
+            raise TypeError('WaterfallImageItem log items don\'t support setImage options %s' %
+                            ', '.join(sorted(unsupported)))
         x = x.squeeze()
         y = y.squeeze()
-        self.vlog.setImage(image=v_log, autoLevels=True, **kwargs)
-        self.hlog.setImage(image=h_log, autoLevels=True, **kwargs)
-        if len(time) > 1:
-            self.hlog.setRect(pg.axes_to_rect(x, time))
-            self.vlog.setRect(pg.axes_to_rect(time, y))
+        time = np.asarray(time).ravel()
+        if pg.getConfigOption('imageAxisOrder') == 'col-major':
+            h_rows, v_rows = h_log.T, v_log
+        else:
+            h_rows, v_rows = h_log, v_log.T
+        for item, axis, rows in ((self.hlog, x, h_rows), (self.vlog, y, v_rows)):
+            if lut is not None:
+                item.setLookupTable(lut)
+            if levels is not None:
+                item.setLevels(levels)
+            if 'opacity' in kwargs:
+                item.setOpacity(kwargs['opacity'])
+            if len(time) > item.capacity:
+                item.setCapacity(len(time))
+            item.setAxis(axis)
+            item.setData(time, rows)
+
+    def append_log(self, x, y, time, h_proj, v_proj):
+        """Add one entry to the log history, dropping the oldest if full.
+
+        Cost doesn't depend on the length of the history.
+
+        Args:
+            time (scalar): time of entry.
+            h_proj (vector of length m): horizontal projection, along x.
+            v_proj (vector of length n): vertical projection, along y.
+        """
+        for item, axis, row in ((self.hlog, x, h_proj), (self.vlog, y, v_proj)):
+            item.setAxis(axis)
+            item.append(row, time)
 
     def set_log_lines(self, x, y, hData, vData):
         x = x.squeeze()
@@ -257,22 +318,6 @@ class ImageWithProjsAndLogAlignedPlot:
         self.vproj_log.clear()
         self.hproj_log.clear()
 
-    def log_time_axis_link(self, direction):
-        if direction is 'v':
-            lims = self.plots['vert_log'].vb.state['viewRange'][0]
-            if self.recursion_prevent is True:
-                return
-            self.recursion_prevent = True
-            self.plots['horz_log'].setYRange(lims[0], lims[1])
-            self.recursion_prevent = False
-        else:
-            lims = self.plots['horz_log'].vb.state['viewRange'][1]
-            if self.recursion_prevent is True:
-                return
-            self.recursion_prevent = True
-            self.plots['vert_log'].setXRange(lims[0], lims[1])
-            self.recursion_prevent = False
-
     def set_ref_lines(self, x, y, hData, vData):
         x = x.squeeze()
         y = y.squeeze()
@@ -405,29 +450,27 @@ def plot_polar_image(r, phi, data, layout=None, r_label_phi=math.pi/4, grid_r=No
         return plt
 
 
+def load_colormap(name):
+    """Load color table (n x 3, 0-255) of one of the colormaps shipped with pyqtgraph_recipes."""
+    return np.load(os.path.join(os.path.dirname(__file__), name + '.npy'))
+
+
 def parula():
-    with open(os.path.join(os.path.dirname(__file__), 'parula.txt'), 'rb') as f:
-        lines = f.readlines()
-    r = np.array([[float(num) for num in line.strip().split()] for line in lines])*255
-    return r
+    return load_colormap('parula')
 
 
 def parula_white():
-    with open(os.path.join(os.path.dirname(__file__), 'parula_white.txt'), 'rb') as f:
-        lines = f.readlines()
-    r = np.array([[float(num) for num in line.strip().split()] for line in lines])*255
-    return r
+    return load_colormap('parula_white')
 
 
 def jet_white():
-    with open(os.path.join(os.path.dirname(__file__), 'jet_white.txt'), 'rb') as f:
-        lines = f.readlines()
-    r = np.array([[float(num) for num in line.strip().split()] for line in lines])*255
-    return r
+    return load_colormap('jet_white')
 
 
 def jet_white_clip():
-    with open(os.path.join(os.path.dirname(__file__), 'jet_white_clip.txt'), 'rb') as f:
-        lines = f.readlines()
-    r = np.array([[float(num) for num in line.strip().split()] for line in lines])*255
-    return r
\ No newline at end of file
+    return load_colormap('jet_white_clip')
+
+
+# Make them available by name e.g. to get_colormap_lut and the lut argument of plot_polar_image.
+for _name in ('parula', 'parula_white', 'jet_white', 'jet_white_clip'):
+    pg.register_colormap(_name, loader=functools.partial(load_colormap, _name))
@@ -11,6 +11,7 @@ if I don't. So will do so for good practice.
 """
 import math
 import numpy as np
+import pytest
 import pyqtgraph_extended as pg
 import pyqtgraph_recipes as pgr
 
@@ -51,4 +52,34 @@ def test_plot_radial_grid_lines(qtbot):
 def test_ImageWithProjsAligned(qtbot):
     ip=pgr.ImageWithProjsAligned()
     ip.widget.show()
+    x=np.arange(30)
+    y=np.arange(20)
+    indices=ip.add_buffers(8)
+    assert indices==list(range(8))
+    for indx in indices:
+        ip.set_buffer_data(indx,x,y,np.full(30,indx),np.full(20,indx))
+    ip.hide_show_buffer(7,False)
+    assert ip.horz_buffers.dataBounds(1)==(0,6)
+    ip.clear_buffer(0)
+    ip.widget.grab()
     return ip
+
+def test_ImageWithProjsAndLogAlignedPlot(qtbot):
+    ip=pgr.ImageWithProjsAndLogAlignedPlot(log_capacity=50)
+    x=np.arange(30)
+    y=np.arange(20)
+    time=np.arange(10.)
+    ip.set_log(x,y,time,np.random.random((30,10)),np.random.random((10,20)),opacity=0.5)
+    assert ip.hlog.count==10 and ip.hlog.opacity()==0.5
+    with pytest.raises(TypeError):
+        ip.set_log(x,y,time,np.random.random((30,10)),np.random.random((10,20)),autoDownsample=True)
+    for t in range(10,100):
+        ip.append_log(x,y,t,np.full(30,t),np.full(20,t))
+    times,rows=ip.hlog.orderedData()
+    assert np.array_equal(times,np.arange(50,100))
+    assert np.array_equal(rows[:,0],np.arange(50,100))
+    assert ip.vlog.mapRectToParent(ip.vlog.boundingRect()).left()==49.5
+    ip.widget.grab()
+    ip.clear_log()
+    assert ip.hlog.count==0
+    qtbot.addWidget(ip.widget)